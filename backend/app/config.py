@@ -0,0 +1,119 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# API启动时升级已有数据库的表结构（app/schema.py）；关闭时部署前运行 python -m app.jobs.upgrade_schema
+SCHEMA_AUTO_UPGRADE = os.getenv("SCHEMA_AUTO_UPGRADE", "true").lower() == "true"
+
+# 情感分析模型配置
+SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL", "cardiffnlp/twitter-xlm-roberta-base-sentiment")
+# 推理后端: pytorch, pytorch-int8, onnx, onnx-int8
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "pytorch")
+# ONNX导出/量化模型的缓存目录
+SENTIMENT_ONNX_DIR = os.getenv("SENTIMENT_ONNX_DIR", "models/onnx")
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+
+# 情感分析结果缓存
+SENTIMENT_CACHE_ENABLED = os.getenv("SENTIMENT_CACHE_ENABLED", "true").lower() == "true"
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "100000"))
+# 修改文本规范化或模型版本时递增，使旧缓存失效
+SENTIMENT_CACHE_VERSION = os.getenv("SENTIMENT_CACHE_VERSION", "2")
+
+# 评论情感分析流水线
+COMMENT_PIPELINE_CHUNK_SIZE = int(os.getenv("COMMENT_PIPELINE_CHUNK_SIZE", "2000"))
+# CPU上的目标吞吐量（条评论/秒）
+COMMENT_PIPELINE_TARGET_CPS = float(os.getenv("COMMENT_PIPELINE_TARGET_CPS", "200"))
+
+# 模型前分流（语言检测、表情/空文本短路）
+SENTIMENT_TRIAGE_ENABLED = os.getenv("SENTIMENT_TRIAGE_ENABLED", "true").lower() == "true"
+# 按语言使用的轻量模型，未配置时使用SENTIMENT_MODEL
+SENTIMENT_LANGUAGE_MODELS = {
+    language: model
+    for language, model in {
+        "ar": os.getenv("SENTIMENT_MODEL_AR", ""),
+        "en": os.getenv("SENTIMENT_MODEL_EN", ""),
+    }.items()
+    if model
+}
+
+# 长文本滑动窗口重叠的token数（窗口长度为模型最大长度512）
+SENTIMENT_WINDOW_STRIDE = int(os.getenv("SENTIMENT_WINDOW_STRIDE", "64"))
+
+# Prometheus指标（/metrics）
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+
+# 按请求的SQL分析（Server-Timing响应头 + N+1检测日志）
+SQL_PROFILING_ENABLED = os.getenv("SQL_PROFILING_ENABLED", "false").lower() == "true"
+# 同一语句在一个请求内重复超过该次数时视为疑似N+1
+SQL_PROFILING_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILING_REPEAT_THRESHOLD", "5"))
+
+# 响应压缩：超过该字节数的响应按Accept-Encoding使用brotli或gzip压缩
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+# 动态响应使用较低的brotli质量，压缩率接近gzip -9而耗时更短
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+# 分析器修订号：修改分类/情感/主题等分析逻辑时递增，已有分析结果视为过期并增量重新分析
+# （关键词表、停用词表和情感模型配置的变化会自动计入分析器版本）
+ANALYZER_REVISION = os.getenv("ANALYZER_REVISION", "2")
+
+# 帖子分析流水线：CPU阶段（分类/关键词/主题/质量评分）的工作进程数，1表示在主进程内执行
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "1"))
+ANALYSIS_CHUNK_SIZE = int(os.getenv("ANALYSIS_CHUNK_SIZE", "2000"))
+
+# Instagram登录：会话文件目录和加载会话的账户（逗号分隔，默认INSTAGRAM_USERNAME）；
+# 配置了密码的账户没有会话文件时登录一次并保存
+INSTAGRAM_USERNAME = os.getenv("INSTAGRAM_USERNAME", "")
+INSTAGRAM_PASSWORD = os.getenv("INSTAGRAM_PASSWORD", "")
+INSTAGRAM_SESSION_DIR = os.getenv("INSTAGRAM_SESSION_DIR", "sessions")
+INSTAGRAM_SESSION_USERNAMES = [
+    username.strip()
+    for username in (os.getenv("INSTAGRAM_SESSION_USERNAMES") or INSTAGRAM_USERNAME).split(",")
+    if username.strip()
+]
+# 会话池：上下文数（不少于账户数）、已登录上下文的健康检查间隔、被限流后的冷却时间（秒）
+SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "3"))
+SESSION_HEALTH_CHECK_SECONDS = int(os.getenv("SESSION_HEALTH_CHECK_SECONDS", "600"))
+SESSION_COOLDOWN_SECONDS = int(os.getenv("SESSION_COOLDOWN_SECONDS", "900"))
+
+# 抓取原始响应归档（内容寻址、zstd压缩、按账户和日期分区），用于不重新抓取地重新解析
+RAW_ARCHIVE_ENABLED = os.getenv("RAW_ARCHIVE_ENABLED", "false").lower() == "true"
+RAW_ARCHIVE_DIR = os.getenv("RAW_ARCHIVE_DIR", "archive/raw")
+RAW_ARCHIVE_ZSTD_LEVEL = int(os.getenv("RAW_ARCHIVE_ZSTD_LEVEL", "3"))
+
+# 抓取：所有线程共享的请求速率上限（令牌桶）
+SCRAPER_REQUESTS_PER_SECOND = float(os.getenv("SCRAPER_REQUESTS_PER_SECOND", "0.5"))
+SCRAPER_BURST = int(os.getenv("SCRAPER_BURST", "5"))
+# 同时抓取的hashtag数
+HASHTAG_WORKERS = int(os.getenv("HASHTAG_WORKERS", "3"))
+# hashtag发现的批量写库大小
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+
+# 流式热门标签：每个时间桶保留的Space-Saving计数器数、返回的标签数
+TRENDING_COUNTERS = int(os.getenv("TRENDING_COUNTERS", "200"))
+TRENDING_TOP_K = int(os.getenv("TRENDING_TOP_K", "20"))
+# 上升标签的最小当前窗口帖子数
+TRENDING_MIN_POSTS = int(os.getenv("TRENDING_MIN_POSTS", "3"))
+
+# 关键词引擎：BM25的文档频率取帖子所在月及之前共几个月（按账户统计）
+KEYWORD_DF_MONTHS = int(os.getenv("KEYWORD_DF_MONTHS", "3"))
+KEYWORD_BM25_K1 = float(os.getenv("KEYWORD_BM25_K1", "1.2"))
+KEYWORD_BM25_B = float(os.getenv("KEYWORD_BM25_B", "0.75"))
+
+# 近似重复标题：MinHash签名长度、LSH分段数（每段 签名长度/分段数 行）、判定重复的估计Jaccard相似度
+# 词3-gram分片下，25个词的标题改一个词相似度约0.77，默认值对改动两三个词的副本仍能命中
+NEAR_DUPLICATE_NUM_PERM = int(os.getenv("NEAR_DUPLICATE_NUM_PERM", "128"))
+NEAR_DUPLICATE_BANDS = int(os.getenv("NEAR_DUPLICATE_BANDS", "32"))
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.6"))
+
+# 互动率：按帖子发布时间取最接近的粉丝数快照计算（否则使用账户当前粉丝数）
+ENGAGEMENT_USE_FOLLOWER_SNAPSHOTS = os.getenv("ENGAGEMENT_USE_FOLLOWER_SNAPSHOTS", "false").lower() == "true"
+
+# 自适应抓取调度：每天的Instagram请求预算（所有被跟踪账户合计）、新帖检查间隔的上下限（小时）
+SCHEDULER_DAILY_REQUEST_BUDGET = int(os.getenv("SCHEDULER_DAILY_REQUEST_BUDGET", "2000"))
+SCHEDULER_MIN_CHECK_HOURS = float(os.getenv("SCHEDULER_MIN_CHECK_HOURS", "1"))
+SCHEDULER_MAX_CHECK_HOURS = float(os.getenv("SCHEDULER_MAX_CHECK_HOURS", "168"))
+# 学习发帖频率的回看天数；互动衰减数据不足时的默认时间常数（小时）
+SCHEDULER_CADENCE_DAYS = int(os.getenv("SCHEDULER_CADENCE_DAYS", "90"))
+SCHEDULER_DEFAULT_DECAY_HOURS = float(os.getenv("SCHEDULER_DEFAULT_DECAY_HOURS", "24"))
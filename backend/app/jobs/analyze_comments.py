@@ -0,0 +1,36 @@
+"""评论情感分析批处理任务
+
+用法（在backend目录下运行）:
+    python -m app.jobs.analyze_comments --chunk-size 2000 --limit 100000
+
+先升级数据库结构（评论表的情感标签和分析时间两列、受众情感表，见 app/schema.py）。
+"""
+import argparse
+import json
+import logging
+
+from app import schema
+from app.database import SessionLocal, engine
+from app.services.comment_analysis import CommentAnalysisService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="为未分析的评论填充情感分数和相关性")
+    parser.add_argument("--chunk-size", type=int, default=None, help="每块读取的评论数")
+    parser.add_argument("--limit", type=int, default=None, help="最多处理的评论数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    schema.upgrade(engine)
+
+    db = SessionLocal()
+    try:
+        stats = CommentAnalysisService(db).run(chunk_size=args.chunk_size, limit=args.limit)
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""帖子内容分析批处理任务
+
+用法（在backend目录下运行）:
+    python -m app.jobs.analyze_posts --workers 4 --limit 100000
+"""
+import argparse
+import json
+import logging
+
+from app.database import SessionLocal
+from app.services.analysis_pipeline import AnalysisPipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量分析尚无分析结果的帖子")
+    parser.add_argument("--workers", type=int, default=None, help="CPU阶段的工作进程数")
+    parser.add_argument("--chunk-size", type=int, default=None, help="每块读取的帖子数")
+    parser.add_argument("--limit", type=int, default=None, help="最多处理的帖子数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    try:
+        stats = AnalysisPipeline(db, workers=args.workers).run(limit=args.limit, chunk_size=args.chunk_size)
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
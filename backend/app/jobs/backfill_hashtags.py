@@ -0,0 +1,61 @@
+"""为已有帖子填充hashtags/post_hashtags倒排索引
+
+用法（在backend目录下运行）:
+    python -m app.jobs.backfill_hashtags --chunk-size 5000
+
+按主键分块读取帖子的caption_hashtags并重建关联，可重复运行。
+"""
+import argparse
+import logging
+import time
+
+from app.database import SessionLocal
+from app.models.instagram import InstagramPost
+from app.services.hashtag_index import HashtagIndex
+from app.services.trending import TrendingEngine
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回填标签倒排索引")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="每块处理的帖子数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    index = HashtagIndex(db)
+    started = time.perf_counter()
+    processed = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.query(
+                InstagramPost.id,
+                InstagramPost.account_id,
+                InstagramPost.posted_at,
+                InstagramPost.caption_hashtags
+            ).filter(InstagramPost.id > last_id).order_by(InstagramPost.id).limit(args.chunk_size).all()
+
+            if not rows:
+                break
+
+            index.index_rows([tuple(row) for row in rows])
+            db.commit()
+
+            processed += len(rows)
+            last_id = rows[-1][0]
+            logger.info(f"标签索引回填进度: {processed} 帖子")
+
+        # 回填的关联不经过写入路径，重建流式热门统计
+        TrendingEngine(db).rebuild()
+        db.commit()
+    finally:
+        db.close()
+
+    logger.info(f"标签索引回填完成: {processed} 帖子，耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
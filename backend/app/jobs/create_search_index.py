@@ -0,0 +1,43 @@
+"""为已有数据库添加全文检索列和GIN索引
+
+用法（在backend目录下运行）:
+    python -m app.jobs.create_search_index
+
+新建的数据库由create_all直接创建这些列；已有的表需要运行一次本任务（其他新增的列和索引见 app/schema.py）。
+生成列会重写整张表，因此不在启动时的结构升级中执行；索引使用CONCURRENTLY创建，不阻塞写入。
+"""
+import logging
+import time
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.models.instagram import search_vector_sql
+
+logger = logging.getLogger(__name__)
+
+STATEMENTS = [
+    f"ALTER TABLE instagram_posts ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({search_vector_sql('caption')}) STORED",
+    f"ALTER TABLE instagram_comments ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({search_vector_sql('text')}) STORED",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_instagram_posts_search_vector "
+    "ON instagram_posts USING gin (search_vector)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_instagram_comments_search_vector "
+    "ON instagram_comments USING gin (search_vector)",
+]
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    # CREATE INDEX CONCURRENTLY不能在事务中执行
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for statement in STATEMENTS:
+            started = time.perf_counter()
+            conn.execute(text(statement))
+            logger.info(f"{statement[:80]}... 耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""hashtag发现任务
+
+用法（在backend目录下运行）:
+    python -m app.jobs.discover_hashtags --max-posts-per-tag 100 --workers 3
+    python -m app.jobs.discover_hashtags --hashtags لغة_انجليزية تعليم_اونلاين
+
+每个hashtag从上次保存的游标继续，帖子和新发现的账户批量写库（按post_id去重）。
+"""
+import argparse
+import json
+import logging
+
+from app.database import SessionLocal
+from app.services.instagram_scraper import InstagramScraperService
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发抓取hashtag帖子并保存")
+    parser.add_argument("--hashtags", nargs="*", help="要抓取的hashtag，默认使用目标标签")
+    parser.add_argument("--max-posts-per-tag", type=int, default=30, help="本次每个hashtag最多抓取的帖子数")
+    parser.add_argument("--workers", type=int, default=None, help="同时抓取的hashtag数")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批写库的帖子数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    try:
+        results = InstagramScraperService(db).discover_hashtags(
+            args.hashtags, args.max_posts_per_tag, workers=args.workers, batch_size=args.batch_size
+        )
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""为已有帖子建立近似重复索引（MinHash签名 + LSH分桶）并归簇
+
+用法（在backend目录下运行）:
+    python -m app.jobs.index_duplicates --chunk-size 2000
+
+按主键顺序分块处理尚无签名的帖子，较早的帖子作为簇代表；中断后重新运行从未处理的帖子继续。
+应在normalize_text之后运行（签名基于tokens列）。
+"""
+import argparse
+import logging
+import time
+
+from app import schema
+from app.database import SessionLocal, engine
+from app.models.instagram import InstagramPost
+from app.models.duplicate import CaptionSignature
+from app.services.near_duplicates import NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回填近似重复标题索引")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="每块处理的帖子数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    schema.upgrade(engine)
+
+    db = SessionLocal()
+    index = NearDuplicateIndex(db)
+    started = time.perf_counter()
+    processed = 0
+    linked = 0
+    last_id = 0
+    try:
+        while True:
+            rows = db.query(InstagramPost.id, InstagramPost.tokens).outerjoin(
+                CaptionSignature, CaptionSignature.post_id == InstagramPost.id
+            ).filter(
+                InstagramPost.id > last_id,
+                CaptionSignature.post_id.is_(None)
+            ).order_by(InstagramPost.id).limit(args.chunk_size).all()
+
+            if not rows:
+                break
+
+            linked += len(index.index_rows([tuple(row) for row in rows]))
+            db.commit()
+
+            processed += len(rows)
+            last_id = rows[-1][0]
+            logger.info(f"近似重复索引进度: {processed} 帖子，{linked} 篇归簇")
+    finally:
+        db.close()
+
+    logger.info(f"近似重复索引完成: {processed} 帖子，{linked} 篇归簇，耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""把已有帖子计入关键词文档频率，可选用BM25重新计算已有分析结果的关键词
+
+用法（在backend目录下运行）:
+    python -m app.jobs.index_keywords --chunk-size 5000
+    python -m app.jobs.index_keywords --recompute   # 计入后重新计算content_analysis.keywords
+
+先升级数据库结构（keywords_indexed_at列，见 app/schema.py），再按主键分块读取；
+只处理尚未计入的帖子，中断后重新运行不会重复计数。应在normalize_text之后运行。
+"""
+import argparse
+import logging
+import time
+
+from sqlalchemy import update
+
+from app import schema
+from app.database import SessionLocal, engine
+from app.models.instagram import InstagramPost
+from app.models.analysis import ContentAnalysis
+from app.services.analysis_service import AnalysisService
+from app.services.keyword_engine import KeywordEngine
+
+logger = logging.getLogger(__name__)
+
+
+def index_all(db, chunk_size: int) -> int:
+    keyword_engine = KeywordEngine(db)
+    processed = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            InstagramPost.id,
+            InstagramPost.account_id,
+            InstagramPost.posted_at,
+            InstagramPost.tokens
+        ).filter(
+            InstagramPost.id > last_id,
+            InstagramPost.keywords_indexed_at.is_(None)
+        ).order_by(InstagramPost.id).limit(chunk_size).all()
+        if not rows:
+            return processed
+
+        keyword_engine.index_rows([tuple(row) for row in rows])
+        db.commit()
+
+        processed += len(rows)
+        last_id = rows[-1][0]
+        logger.info(f"关键词文档频率进度: {processed} 帖子")
+
+
+def recompute_keywords(db, chunk_size: int) -> int:
+    keyword_engine = KeywordEngine(db, AnalysisService(None).stop_tokens)
+    processed = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            ContentAnalysis.id,
+            InstagramPost.id,
+            InstagramPost.account_id,
+            InstagramPost.posted_at,
+            InstagramPost.tokens
+        ).join(InstagramPost, ContentAnalysis.post_id == InstagramPost.id).filter(
+            ContentAnalysis.id > last_id
+        ).order_by(ContentAnalysis.id).limit(chunk_size).all()
+        if not rows:
+            return processed
+
+        keywords_list = keyword_engine.keywords_for([tuple(row[1:]) for row in rows])
+        db.execute(update(ContentAnalysis), [
+            {"id": row[0], "keywords": keywords} for row, keywords in zip(rows, keywords_list)
+        ])
+        db.commit()
+
+        processed += len(rows)
+        last_id = rows[-1][0]
+        logger.info(f"关键词重新计算进度: {processed} 条分析结果")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回填关键词文档频率")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="每块处理的行数")
+    parser.add_argument("--recompute", action="store_true", help="计入后重新计算已有分析结果的关键词")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    schema.upgrade(engine)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        processed = index_all(db, args.chunk_size)
+        logger.info(f"关键词文档频率完成: {processed} 帖子，耗时 {time.perf_counter() - started:.1f}s")
+
+        if args.recompute:
+            started = time.perf_counter()
+            processed = recompute_keywords(db, args.chunk_size)
+            logger.info(f"关键词重新计算完成: {processed} 条分析结果，耗时 {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
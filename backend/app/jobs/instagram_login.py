@@ -0,0 +1,53 @@
+"""登录Instagram账户并保存会话文件，供抓取会话池加载
+
+用法（在backend目录下运行）:
+    python -m app.jobs.instagram_login --username my_account   # 交互输入密码，保存到INSTAGRAM_SESSION_DIR
+    python -m app.jobs.instagram_login --check                 # 验证已配置账户的会话文件是否仍有效
+
+会话文件名为 session-<账户>；把账户加入INSTAGRAM_SESSION_USERNAMES后，抓取任务直接复用会话而不再登录。
+"""
+import argparse
+import getpass
+import logging
+
+import instaloader
+
+from app import config
+from app.services.instagram_scraper import create_loader
+from app.services.session_pool import SessionPool
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="保存Instagram会话文件")
+    parser.add_argument("--username", help="要登录的账户")
+    parser.add_argument("--check", action="store_true", help="验证已配置账户的会话文件")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    pool = SessionPool(create_loader)
+    if args.username:
+        loader = create_loader()
+        try:
+            loader.login(args.username, getpass.getpass(f"{args.username} 的密码: "))
+        except instaloader.TwoFactorAuthRequiredException:
+            loader.two_factor_login(input("两步验证码: "))
+        pool.save(loader)
+        logger.info(f"已保存会话文件: {pool.session_file(args.username)}")
+
+    if args.check:
+        for username in config.INSTAGRAM_SESSION_USERNAMES:
+            loader = create_loader()
+            try:
+                loader.load_session_from_file(username, pool.session_file(username))
+            except FileNotFoundError:
+                logger.warning(f"{username}: 没有会话文件")
+                continue
+            valid = loader.test_login() == username
+            logger.info(f"{username}: 会话{'有效' if valid else '已失效'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""为已有帖子和评论填充规范化文本和tokens
+
+用法（在backend目录下运行）:
+    python -m app.jobs.normalize_text --chunk-size 5000
+    python -m app.jobs.normalize_text --all   # 修改规范化规则后重新处理全部数据
+
+先升级数据库结构（这两列，见 app/schema.py），再按主键分块读取、批量回写。
+帖子的tokens发生变化时（--all），先按旧tokens撤销关键词文档频率和近似重复签名，回写后按新tokens重新建立；
+tokens原为空的帖子由 index_keywords / index_duplicates 计入。
+"""
+import argparse
+import logging
+import time
+
+from sqlalchemy import update
+
+from app import schema
+from app.database import SessionLocal, engine
+from app.models.instagram import InstagramPost, InstagramComment
+from app.services.ingestion import IngestionService
+from app.services.keyword_engine import KeywordEngine
+from app.services.near_duplicates import NearDuplicateIndex
+from app.services.text_normalization import prepare_text
+
+logger = logging.getLogger(__name__)
+
+
+def backfill(db, model, text_column, chunk_size: int, reprocess_all: bool, reindex: bool = False) -> int:
+    """reindex: 帖子表，tokens变化的行同步更新关键词文档频率和近似重复签名"""
+    processed = 0
+    last_id = 0
+    columns = [model.id, text_column, model.tokens]
+    if reindex:
+        columns += [model.account_id, model.posted_at]
+    while True:
+        query = db.query(*columns).filter(model.id > last_id)
+        if not reprocess_all:
+            query = query.filter(model.tokens.is_(None))
+
+        rows = query.order_by(model.id).limit(chunk_size).all()
+        if not rows:
+            return processed
+
+        updates = []
+        changed = []
+        for row in rows:
+            row_id, text, old_tokens = row[:3]
+            normalized_text, tokens = prepare_text(text)
+            updates.append({"id": row_id, "normalized_text": normalized_text, "tokens": tokens})
+            if reindex and old_tokens is not None and old_tokens != tokens:
+                # 旧的 (帖子ID, 账户ID, 发布时间, tokens)
+                changed.append((row_id, row[3], row[4], old_tokens))
+
+        IngestionService(db).forget_content(changed)
+        db.execute(update(model), updates)
+        if changed:
+            changed_ids = [document[0] for document in changed]
+            KeywordEngine(db).index_posts(changed_ids)
+            NearDuplicateIndex(db).index_posts(changed_ids)
+        db.commit()
+
+        processed += len(rows)
+        last_id = rows[-1][0]
+        logger.info(f"{model.__tablename__} 规范化进度: {processed}，重建索引 {len(changed)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回填规范化文本和tokens")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="每块处理的行数")
+    parser.add_argument("--all", action="store_true", help="重新处理全部行（默认只处理tokens为空的行）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    schema.upgrade(engine)
+
+    db = SessionLocal()
+    try:
+        for model, text_column in ((InstagramPost, InstagramPost.caption), (InstagramComment, InstagramComment.text)):
+            started = time.perf_counter()
+            processed = backfill(db, model, text_column, args.chunk_size, args.all, reindex=model is InstagramPost)
+            elapsed = time.perf_counter() - started
+            logger.info(f"{model.__tablename__} 规范化完成: {processed} 行，耗时 {elapsed:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
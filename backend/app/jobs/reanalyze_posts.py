@@ -0,0 +1,99 @@
+"""增量重新分析：只处理内容哈希或分析器版本发生变化的帖子
+
+用法（在backend目录下运行）:
+    python -m app.jobs.reanalyze_posts --workers 4
+    python -m app.jobs.reanalyze_posts --dry-run          # 只统计待重新分析的帖子数
+    python -m app.jobs.reanalyze_posts --adopt-existing   # 首次启用：把已有结果标记为当前版本，不重新分析
+
+先升级数据库结构（content_hash/analyzer_version列，见 app/schema.py），再为缺少内容哈希的帖子
+分块补算哈希，最后由分析流水线分块重新分析过期的结果（同时分析尚无结果的帖子）。
+"""
+import argparse
+import json
+import logging
+
+from sqlalchemy import func, update
+
+from app import schema
+from app.database import SessionLocal, engine
+from app.models.instagram import InstagramPost
+from app.models.analysis import ContentAnalysis
+from app.services.analysis_pipeline import AnalysisPipeline
+from app.services.content_hash import content_hash
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_hashes(db, chunk_size: int) -> int:
+    """为写入时尚未计算内容哈希的旧帖子补算"""
+    processed = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            InstagramPost.id,
+            InstagramPost.caption,
+            InstagramPost.media_type,
+            InstagramPost.caption_hashtags,
+            InstagramPost.posted_at
+        ).filter(
+            InstagramPost.id > last_id,
+            InstagramPost.content_hash.is_(None)
+        ).order_by(InstagramPost.id).limit(chunk_size).all()
+        if not rows:
+            return processed
+
+        db.execute(update(InstagramPost), [
+            {"id": row[0], "content_hash": content_hash(*row[1:])} for row in rows
+        ])
+        db.commit()
+
+        processed += len(rows)
+        last_id = rows[-1][0]
+        logger.info(f"内容哈希补算进度: {processed} 帖子")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量重新分析过期的帖子分析结果")
+    parser.add_argument("--workers", type=int, default=None, help="CPU阶段的工作进程数")
+    parser.add_argument("--chunk-size", type=int, default=None, help="每块读取的帖子数")
+    parser.add_argument("--limit", type=int, default=None, help="最多处理的帖子数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计待重新分析的帖子数")
+    parser.add_argument("--adopt-existing", action="store_true",
+                        help="把没有版本记录的已有结果标记为当前内容和当前分析器版本")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    schema.upgrade(engine)
+
+    db = SessionLocal()
+    try:
+        backfill_hashes(db, args.chunk_size or 5000)
+        pipeline = AnalysisPipeline(db, workers=args.workers)
+        version = pipeline.analysis_service.analyzer_version
+
+        if args.adopt_existing:
+            adopted = db.execute(
+                update(ContentAnalysis).where(
+                    ContentAnalysis.post_id == InstagramPost.id,
+                    ContentAnalysis.analyzer_version.is_(None)
+                ).values(content_hash=InstagramPost.content_hash, analyzer_version=version)
+            ).rowcount
+            db.commit()
+            logger.info(f"已有分析结果标记为版本 {version}: {adopted} 条")
+
+        stale = db.query(func.count(InstagramPost.id)).outerjoin(ContentAnalysis).filter(
+            pipeline.pending_filter(reanalyze=True)
+        ).scalar()
+        logger.info(f"分析器版本 {version}，待分析/重新分析: {stale} 帖子")
+        if args.dry_run:
+            return
+
+        stats = pipeline.run(limit=args.limit, chunk_size=args.chunk_size, reanalyze=True)
+        print(json.dumps(stats | {"analyzer_version": version}, ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""按账户重算帖子互动率，可选创建实时计算互动率的视图
+
+用法（在backend目录下运行）:
+    python -m app.jobs.recompute_engagement                    # 按账户当前粉丝数重算
+    python -m app.jobs.recompute_engagement --use-snapshots    # 按发布时间最接近的粉丝数快照重算
+    python -m app.jobs.recompute_engagement --create-view      # 创建/更新post_engagement_rates视图
+
+每个账户一条UPDATE，只改写数值变化的行。首次运行时为已有账户记录当前粉丝数快照。
+视图与UPDATE使用同一表达式，查询时由数据库计算，读取方可直接查询视图而不依赖存储的engagement_rate。
+"""
+import argparse
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app import schema
+from app.database import SessionLocal, engine
+from app.models.instagram import InstagramAccount
+from app.services.engagement import EngagementRateService
+
+logger = logging.getLogger(__name__)
+
+VIEW_NAME = "post_engagement_rates"
+
+SETUP_STATEMENTS = [
+    # 没有快照的账户以当前粉丝数作为第一条快照
+    """INSERT INTO account_follower_snapshots (account_id, captured_at, followers_count)
+       SELECT a.id, now(), a.followers_count FROM instagram_accounts a
+       WHERE a.followers_count > 0
+         AND NOT EXISTS (SELECT 1 FROM account_follower_snapshots s WHERE s.account_id = a.id)
+       ON CONFLICT DO NOTHING""",
+]
+
+
+def create_view(service: EngagementRateService):
+    """用与重算相同的查询创建视图"""
+    query = service.rates_query().compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE OR REPLACE VIEW {VIEW_NAME} AS {query}"))
+    logger.info(f"已创建视图 {VIEW_NAME}（粉丝数快照: {service.use_snapshots}）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按账户重算帖子互动率")
+    parser.add_argument("--use-snapshots", action="store_true", default=None,
+                        help="按发布时间最接近的粉丝数快照计算（默认取ENGAGEMENT_USE_FOLLOWER_SNAPSHOTS）")
+    parser.add_argument("--create-view", action="store_true", help=f"创建/更新{VIEW_NAME}视图后退出")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    schema.upgrade(engine)
+    with engine.begin() as conn:
+        for statement in SETUP_STATEMENTS:
+            conn.execute(text(statement))
+
+    db = SessionLocal()
+    service = EngagementRateService(db, use_snapshots=args.use_snapshots)
+    try:
+        if args.create_view:
+            create_view(service)
+            return
+
+        started = time.perf_counter()
+        account_ids = [row[0] for row in db.query(InstagramAccount.id).order_by(InstagramAccount.id).all()]
+        updated = 0
+        for index, account_id in enumerate(account_ids, start=1):
+            updated += service.recompute([account_id])
+            db.commit()
+            if index % 100 == 0:
+                logger.info(f"互动率重算进度: {index}/{len(account_ids)} 账户，改写 {updated} 帖子")
+    finally:
+        db.close()
+
+    logger.info(f"互动率重算完成: {len(account_ids)} 账户，改写 {updated} 帖子，耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
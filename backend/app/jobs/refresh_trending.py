@@ -0,0 +1,39 @@
+"""刷新流式热门标签快照
+
+用法（在backend目录下运行，建议每小时定时执行）:
+    python -m app.jobs.refresh_trending            # 丢弃过期的桶并重新计算快照
+    python -m app.jobs.refresh_trending --rebuild  # 从post_hashtags重建全部窗口
+
+写入路径只累加每小时的标签计数，快照由本任务并入计数后重新计算，需要定时运行。
+"""
+import argparse
+import logging
+
+from app import schema
+from app.database import SessionLocal, engine as db_engine
+from app.services.trending import TrendingEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="刷新流式热门标签快照")
+    parser.add_argument("--rebuild", action="store_true", help="从post_hashtags重建分桶统计")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    schema.upgrade(db_engine)
+
+    db = SessionLocal()
+    try:
+        engine = TrendingEngine(db)
+        if args.rebuild:
+            engine.rebuild()
+        else:
+            engine.refresh()
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""从原始响应归档重新解析入库（不访问网络）
+
+用法（在backend目录下运行）:
+    python -m app.jobs.reparse_archive
+    python -m app.jobs.reparse_archive --accounts 51talkksa novakid_mena --since 2024-01-01
+
+修改save_post_info等字段提取逻辑后运行，按日期顺序把归档的账户资料、帖子和评论重新走一遍解析和写库路径，
+较新的抓取结果最后写入。归档由抓取器在RAW_ARCHIVE_ENABLED=true时写入RAW_ARCHIVE_DIR。
+"""
+import argparse
+import json
+import logging
+import time
+from datetime import date
+
+from app import config
+from app.database import SessionLocal
+from app.services.instagram_scraper import InstagramScraperService
+from app.services.raw_archive import RawArchive
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从原始响应归档重新解析入库")
+    parser.add_argument("--archive-dir", default=None, help="归档目录，默认RAW_ARCHIVE_DIR")
+    parser.add_argument("--accounts", nargs="*", help="只处理这些账户")
+    parser.add_argument("--since", type=date.fromisoformat, help="起始抓取日期（YYYY-MM-DD）")
+    parser.add_argument("--until", type=date.fromisoformat, help="截止抓取日期（含）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    archive = RawArchive(args.archive_dir or config.RAW_ARCHIVE_DIR)
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        stats = InstagramScraperService(db).reparse_archive(archive, args.accounts, args.since, args.until)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    print(json.dumps(stats | {"seconds": round(elapsed, 1)}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
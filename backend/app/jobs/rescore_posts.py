@@ -0,0 +1,49 @@
+"""批量重新计算内容质量分和预测互动率
+
+用法（在backend目录下运行）:
+    python -m app.jobs.rescore_posts --fit              # 先用历史engagement_rate拟合系数，再重新打分
+    python -m app.jobs.rescore_posts --fit --since-days 180
+    python -m app.jobs.rescore_posts --chunk-size 50000 # 只用当前系数重新打分
+
+按content_analysis主键分块读取特征列，整块向量化打分后批量回写，可重复运行。
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from app import schema
+from app.database import SessionLocal, engine
+from app.services.scoring import BatchScorer
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量重新打分")
+    parser.add_argument("--fit", action="store_true", help="打分前重新拟合互动率系数")
+    parser.add_argument("--since-days", type=int, help="只用最近N天的帖子拟合")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="每块处理的行数")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    schema.upgrade(engine)
+
+    db = SessionLocal()
+    scorer = BatchScorer(db)
+    try:
+        if args.fit:
+            since = datetime.now(timezone.utc) - timedelta(days=args.since_days) if args.since_days else None
+            result = scorer.fit(since)
+            logger.info(f"互动率模型: {result}")
+
+        started = time.perf_counter()
+        processed = scorer.rescore(args.chunk_size)
+        logger.info(f"批量打分完成: {processed} 条分析结果，耗时 {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
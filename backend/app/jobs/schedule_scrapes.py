@@ -0,0 +1,106 @@
+"""自适应账户抓取调度
+
+用法（在backend目录下运行）:
+    python -m app.jobs.schedule_scrapes                     # 重新学习间隔并抓取到期的账户
+    python -m app.jobs.schedule_scrapes --learn-only        # 只重新学习并排期
+    python -m app.jobs.schedule_scrapes --enroll 51talkksa novakid_mena
+    python -m app.jobs.schedule_scrapes --simulate --days 30 --baseline-hours 6
+
+调度器从posted_at历史学习每个账户的发帖频率和互动衰减时间常数，在每天的请求预算内分配新帖检查间隔
+（约每出现一篇新帖检查一次）和增长期内的互动刷新间隔。按账户抓取过的账户会自动加入调度。
+--simulate用最近N天的历史回放调度（每天按当时已发布的帖子重新学习），与固定间隔轮询比较请求数和新鲜度，不访问Instagram。
+"""
+import argparse
+import json
+import logging
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import func
+
+from app import config, schema
+from app.database import SessionLocal, engine
+from app.models.instagram import InstagramAccount, InstagramPost
+from app.models.schedule import ScrapeSchedule
+from app.services.instagram_scraper import InstagramScraperService
+from app.services.scrape_scheduler import ScrapeScheduler, decay_hours, simulate
+
+logger = logging.getLogger(__name__)
+
+
+def run_simulation(db, days: int, baseline_hours: float, budget: int) -> dict:
+    """回放被调度账户（没有时为所有有帖子的账户）的最近days天"""
+    end = db.query(func.max(InstagramPost.posted_at)).scalar()
+    if end is None:
+        return {"accounts": 0}
+    start = end - timedelta(days=days)
+
+    account_ids = [row[0] for row in db.query(ScrapeSchedule.account_id).all()]
+    if not account_ids:
+        account_ids = [row[0] for row in db.query(InstagramPost.account_id).distinct().all()]
+
+    scheduler = ScrapeScheduler(db, budget=budget)
+    history = scheduler.history(account_ids, start - timedelta(days=config.SCHEDULER_CADENCE_DAYS))
+    # 衰减时间常数只用回放开始前的帖子学习
+    decays = {
+        account_id: decay_hours(ages[posted < start.timestamp()], interactions[posted < start.timestamp()],
+                                config.SCHEDULER_DEFAULT_DECAY_HOURS)
+        for account_id, (posted, ages, interactions) in history.items()
+    }
+    return simulate(
+        {account_id: posted for account_id, (posted, _, _) in history.items()},
+        decays,
+        start.timestamp(),
+        end.timestamp(),
+        budget,
+        baseline_hours,
+        config.SCHEDULER_MIN_CHECK_HOURS,
+        config.SCHEDULER_MAX_CHECK_HOURS,
+        config.SCHEDULER_CADENCE_DAYS
+    ) | {"median_decay_hours": round(float(np.median(list(decays.values()))), 2) if decays else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自适应账户抓取调度")
+    parser.add_argument("--limit", type=int, default=None, help="本次最多抓取的到期账户数")
+    parser.add_argument("--include-comments", action="store_true", help="抓取时同时抓取评论（请求数显著增加）")
+    parser.add_argument("--learn-only", action="store_true", help="只重新学习并排期，不抓取")
+    parser.add_argument("--enroll", nargs="*", help="把已入库的账户加入调度")
+    parser.add_argument("--budget", type=int, default=None, help="每天的请求预算，默认SCHEDULER_DAILY_REQUEST_BUDGET")
+    parser.add_argument("--simulate", action="store_true", help="回放历史，报告节省的请求数和新鲜度")
+    parser.add_argument("--days", type=int, default=30, help="回放的天数")
+    parser.add_argument("--baseline-hours", type=float, default=6, help="对比的固定轮询间隔（小时）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    schema.upgrade(engine)
+
+    db = SessionLocal()
+    scheduler = ScrapeScheduler(db, budget=args.budget)
+    try:
+        if args.simulate:
+            report = run_simulation(db, args.days, args.baseline_hours, scheduler.budget)
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+
+        if args.enroll:
+            account_ids = [row[0] for row in db.query(InstagramAccount.id).filter(
+                InstagramAccount.username.in_(args.enroll)
+            ).all()]
+            scheduler.enroll(account_ids)
+            logger.info(f"加入调度: {len(account_ids)} 账户")
+
+        scheduler.learn()
+        db.commit()
+        if args.learn_only:
+            return
+
+        stats = scheduler.run_due(InstagramScraperService(db), limit=args.limit, include_comments=args.include_comments)
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
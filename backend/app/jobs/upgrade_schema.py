@@ -0,0 +1,20 @@
+"""升级已有数据库的表结构（新增的表、列和索引，见 app/schema.py）
+
+用法（在backend目录下运行）:
+    python -m app.jobs.upgrade_schema
+
+API启动时默认自动执行；设置SCHEMA_AUTO_UPGRADE=false时在部署时运行本任务。重复运行不做任何修改。
+"""
+import logging
+
+from app import schema
+from app.database import engine
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    schema.upgrade(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,21 @@ from sqlalchemy.orm import Session
 import uvicorn
 from app.database import get_db, engine
 from app.models import Base
-from app.routers import instagram, analysis
+from app.routers import instagram, analysis, search, dashboard
+from app import config, metrics, profiling, responses, schema
+from app.responses import FastJSONResponse
 
-# 创建数据库表
-Base.metadata.create_all(bind=engine)
+# 创建数据库表，并给已有的表补充新增的列和索引
+if config.SCHEMA_AUTO_UPGRADE:
+    schema.upgrade(engine)
+else:
+    Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Instagram竞争对手分析API",
     description="沙特K12市场Instagram竞品分析仪表盘",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # 配置CORS
@@ -24,9 +30,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Prometheus指标
+metrics.install(app)
+
+# 按请求的SQL分析（Server-Timing）
+profiling.install(app)
+
+# 响应压缩（brotli/gzip）
+responses.install(app)
+
 # 注册路由
 app.include_router(instagram.router, prefix="/api/instagram", tags=["Instagram"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["分析"])
+app.include_router(search.router, prefix="/api", tags=["检索"])
+app.include_router(dashboard.router, prefix="/api", tags=["仪表盘"])
 
 @app.get("/")
 def read_root():
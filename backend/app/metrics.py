@@ -0,0 +1,196 @@
+"""Prometheus指标
+
+METRICS_ENABLED=false（或未安装prometheus_client）时所有指标均为空操作，
+装饰器直接返回原函数，对业务代码几乎没有额外开销。
+"""
+import functools
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+ENABLED = config.METRICS_ENABLED and prometheus_client is not None
+
+if config.METRICS_ENABLED and prometheus_client is None:
+    logger.warning("METRICS_ENABLED已开启但未安装prometheus_client，指标将被禁用")
+
+
+class _NoopMetric:
+    """禁用时使用的空指标"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def observe(self, amount: float):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def time(self):
+        return nullcontext()
+
+
+_noop = _NoopMetric()
+
+
+def _histogram(name, documentation, labelnames=(), buckets=None):
+    if not ENABLED:
+        return _noop
+    if buckets:
+        return prometheus_client.Histogram(name, documentation, labelnames, buckets=buckets)
+    return prometheus_client.Histogram(name, documentation, labelnames)
+
+
+def _counter(name, documentation, labelnames=()):
+    if not ENABLED:
+        return _noop
+    return prometheus_client.Counter(name, documentation, labelnames)
+
+
+def _gauge(name, documentation, labelnames=()):
+    if not ENABLED:
+        return _noop
+    return prometheus_client.Gauge(name, documentation, labelnames)
+
+
+# HTTP
+HTTP_REQUEST_DURATION = _histogram(
+    "http_request_duration_seconds", "HTTP请求耗时", ("method", "route", "status")
+)
+
+# 抓取
+SCRAPER_REQUESTS = _counter("scraper_requests_total", "Instagram请求次数", ("query_type",))
+SCRAPER_RATE_LIMITED = _counter("scraper_rate_limited_total", "Instagram返回429的次数", ("query_type",))
+SCRAPER_SLEEP_SECONDS = _counter("scraper_sleep_seconds_total", "抓取过程中主动等待的秒数", ("reason",))
+SCRAPED_ITEMS = _counter("scraper_items_total", "抓取并保存的对象数", ("kind",))
+SCHEDULED_SCRAPES = _counter("scheduled_scrapes_total", "调度器执行的账户抓取次数", ("kind", "result"))
+
+# 模型推理
+MODEL_LOAD_SECONDS = _gauge("sentiment_model_load_seconds", "情感模型加载耗时", ("model_id",))
+SENTIMENT_BATCH_DURATION = _histogram(
+    "sentiment_batch_duration_seconds", "情感模型单批前向计算耗时", ("model_id",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+SENTIMENT_TEXTS = _counter("sentiment_texts_total", "送入情感模型的文本/窗口数", ("model_id",))
+
+# 分析
+ANALYSIS_DURATION = _histogram(
+    "analysis_duration_seconds", "分析函数耗时", ("function",),
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+)
+
+# 仪表盘各面板（及共享查询）的计算耗时
+DASHBOARD_PANEL_DURATION = _histogram(
+    "dashboard_panel_duration_seconds", "仪表盘面板计算耗时", ("panel",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+# 数据库
+DB_QUERY_DURATION = _histogram(
+    "db_query_duration_seconds", "SQL语句执行耗时", ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+
+# 缓存
+CACHE_LOOKUPS = _counter("cache_lookups_total", "缓存查找次数", ("cache", "result"))
+
+
+def timed(histogram, **labels):
+    """函数耗时装饰器；禁用时直接返回原函数"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        metric = histogram.labels(**labels) if labels else histogram
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def track(histogram, **labels):
+    """代码块耗时上下文管理器"""
+    if not ENABLED:
+        return nullcontext()
+    return _track(histogram.labels(**labels) if labels else histogram)
+
+
+@contextmanager
+def _track(metric):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric.observe(time.perf_counter() - started)
+
+
+def sleep(seconds: float, reason: str):
+    """带统计的time.sleep"""
+    SCRAPER_SLEEP_SECONDS.labels(reason=reason).inc(seconds)
+    time.sleep(seconds)
+
+
+def instrument_engine(engine):
+    """为SQLAlchemy引擎注册SQL耗时统计"""
+    if not ENABLED:
+        return
+
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_start"].pop()
+        operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "unknown"
+        DB_QUERY_DURATION.labels(operation=operation).observe(time.perf_counter() - started)
+
+
+def install(app):
+    """注册HTTP耗时中间件和/metrics端点"""
+    if not ENABLED:
+        return
+
+    from fastapi import Response
+
+    @app.middleware("http")
+    async def _http_metrics(request, call_next):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method=request.method,
+                route=route.path if route else "unmatched",
+                status=str(status)
+            ).observe(time.perf_counter() - started)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(prometheus_client.generate_latest(), media_type=prometheus_client.CONTENT_TYPE_LATEST)
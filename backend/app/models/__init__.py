@@ -1,12 +1,32 @@
 from .base import Base
-from .instagram import InstagramAccount, InstagramPost, InstagramComment
-from .analysis import ContentAnalysis, TrendAnalysis
+from .instagram import InstagramAccount, AccountFollowerSnapshot, InstagramPost, InstagramComment, HashtagCursor
+from .analysis import ContentAnalysis, TrendAnalysis, PostAudienceSentiment, EngagementModel
+from .cache import SentimentCacheEntry
+from .hashtag import Hashtag, PostHashtag, TrendingWindow, TrendingHourCount
+from .keyword import TermDocumentFrequency, KeywordCorpusStats
+from .duplicate import DuplicateCluster, CaptionSignature, LshBucket
+from .schedule import ScrapeSchedule
 
 __all__ = [
     "Base",
     "InstagramAccount", 
+    "AccountFollowerSnapshot",
     "InstagramPost",
     "InstagramComment",
+    "HashtagCursor",
     "ContentAnalysis",
-    "TrendAnalysis"
+    "TrendAnalysis",
+    "PostAudienceSentiment",
+    "EngagementModel",
+    "SentimentCacheEntry",
+    "Hashtag",
+    "PostHashtag",
+    "TrendingWindow",
+    "TrendingHourCount",
+    "TermDocumentFrequency",
+    "KeywordCorpusStats",
+    "DuplicateCluster",
+    "CaptionSignature",
+    "LshBucket",
+    "ScrapeSchedule"
 ]
\ No newline at end of file
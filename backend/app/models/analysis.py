@@ -25,6 +25,10 @@ class ContentAnalysis(BaseModel):
     content_quality_score = Column(Float, default=0.0)  # 0-100
     engagement_prediction = Column(Float, default=0.0)  # 预测的互动率
     
+    # 分析时帖子的内容哈希和分析器版本，任一变化即需要重新分析
+    content_hash = Column(String(64))
+    analyzer_version = Column(String(50), index=True)
+    
     # 竞品对比分析
     competitor_comparison = Column(JSON)  # 与竞品的对比数据
     market_position = Column(String(50))  # 市场定位
@@ -85,4 +89,33 @@ class CompetitorBenchmark(BaseModel):
     threats = Column(JSON)
     
     # 建议
-    recommendations = Column(JSON)
\ No newline at end of file
+    recommendations = Column(JSON)
+
+class PostAudienceSentiment(BaseModel):
+    __tablename__ = "post_audience_sentiment"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("instagram_posts.id"), unique=True, nullable=False)
+    
+    # 评论统计
+    comments_analyzed = Column(Integer, default=0)
+    relevant_comments = Column(Integer, default=0)
+    
+    # 受众情感（仅统计相关评论）
+    avg_sentiment_score = Column(Float, default=0.0)
+    positive_count = Column(Integer, default=0)
+    neutral_count = Column(Integer, default=0)
+    negative_count = Column(Integer, default=0)
+
+class EngagementModel(BaseModel):
+    __tablename__ = "engagement_models"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # 最小二乘拟合的线性模型：{特征名: 系数}，预测值为互动率（比例，不是百分数）
+    coefficients = Column(JSON, nullable=False)
+    
+    # 拟合数据和拟合优度
+    samples = Column(Integer, default=0)
+    r_squared = Column(Float)
+    fitted_at = Column(DateTime(timezone=True), index=True)
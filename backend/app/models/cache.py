@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Float
+from .base import BaseModel
+
+class SentimentCacheEntry(BaseModel):
+    __tablename__ = "sentiment_cache"
+    
+    # sha256(模型标识 + 规范化文本)
+    cache_key = Column(String(64), primary_key=True)
+    model_id = Column(String(200), nullable=False)
+    
+    # 情感分析结果
+    label = Column(String(20), nullable=False)  # positive, negative, neutral
+    confidence = Column(Float, default=0.0)
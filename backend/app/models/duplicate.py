@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, DateTime, ForeignKey, LargeBinary
+from .base import BaseModel
+
+class DuplicateCluster(BaseModel):
+    __tablename__ = "duplicate_clusters"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # 最早入库的帖子，作为簇的代表
+    representative_post_id = Column(Integer, ForeignKey("instagram_posts.id", ondelete="SET NULL"))
+    
+    # 成员统计，每次有帖子加入时按成员重新计算
+    size = Column(Integer, nullable=False, default=0)
+    accounts_count = Column(Integer, nullable=False, default=0)
+    first_posted_at = Column(DateTime(timezone=True))
+    last_posted_at = Column(DateTime(timezone=True), index=True)
+
+class CaptionSignature(BaseModel):
+    __tablename__ = "caption_signatures"
+    
+    post_id = Column(Integer, ForeignKey("instagram_posts.id", ondelete="CASCADE"), primary_key=True)
+    # 没有近似重复的帖子为空
+    cluster_id = Column(Integer, ForeignKey("duplicate_clusters.id", ondelete="SET NULL"), index=True)
+    
+    # MinHash签名：NEAR_DUPLICATE_NUM_PERM个uint32（小端字节）
+    signature = Column(LargeBinary, nullable=False)
+
+class LshBucket(BaseModel):
+    __tablename__ = "lsh_buckets"
+    
+    # 签名每一段的哈希值；bucket在主键首位，按桶查找候选帖子
+    bucket = Column(BigInteger, primary_key=True)
+    band = Column(SmallInteger, primary_key=True)
+    post_id = Column(Integer, ForeignKey("instagram_posts.id", ondelete="CASCADE"), primary_key=True)
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, JSON
+from .base import BaseModel
+
+class Hashtag(BaseModel):
+    __tablename__ = "hashtags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # 去掉#并casefold后的标签，用于去重和查询
+    normalized = Column(String(200), unique=True, index=True, nullable=False)
+    # 首次出现时的写法，用于展示
+    name = Column(String(200), nullable=False)
+
+class PostHashtag(BaseModel):
+    __tablename__ = "post_hashtags"
+    
+    post_id = Column(Integer, ForeignKey("instagram_posts.id", ondelete="CASCADE"), primary_key=True)
+    hashtag_id = Column(Integer, ForeignKey("hashtags.id", ondelete="CASCADE"), primary_key=True)
+    
+    # 冗余帖子的账户和发布时间，热门标签等聚合不需要回表
+    account_id = Column(Integer, nullable=False)
+    posted_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_post_hashtags_posted_at_hashtag", "posted_at", "hashtag_id"),
+        Index("ix_post_hashtags_hashtag_posted_at", "hashtag_id", "posted_at"),
+    )
+
+class TrendingWindow(BaseModel):
+    __tablename__ = "trending_windows"
+    
+    # day, week, month
+    window = Column(String(20), primary_key=True)
+    
+    # 分桶的Space-Saving计数器: {桶序号: {标签ID: [计数, 误差]}}，覆盖当前和上一个窗口
+    buckets = Column(JSON, nullable=False, default=dict)
+    
+    # 预先计算的热门/上升标签，接口直接返回
+    snapshot = Column(JSON)
+    computed_at = Column(DateTime(timezone=True))
+
+class TrendingHourCount(BaseModel):
+    __tablename__ = "trending_hour_counts"
+    
+    # 写入路径累加的每小时新增标签关联数，定时刷新时并入各窗口的分桶统计后删除
+    hour = Column(Integer, primary_key=True)  # UTC整点序号（epoch秒 // 3600）
+    hashtag_id = Column(Integer, ForeignKey("hashtags.id", ondelete="CASCADE"), primary_key=True)
+    posts = Column(Integer, nullable=False, default=0)
\ No newline at end of file
@@ -1,7 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger, Float, Boolean, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger, Float, Boolean, ForeignKey, JSON, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from .base import BaseModel
+from app.services.text_normalization import ARABIC_DIACRITICS, ARABIC_FOLD
+
+def search_vector_sql(column: str) -> str:
+    """生成tsvector的SQL表达式：同一文本分别按arabic和english配置分词后合并（词干化覆盖两种语言）"""
+    normalized = f"translate(regexp_replace(coalesce({column}, ''), '{ARABIC_DIACRITICS}', '', 'g'), '{ARABIC_FOLD[0]}', '{ARABIC_FOLD[1]}')"
+    return f"to_tsvector('arabic'::regconfig, {normalized}) || to_tsvector('english'::regconfig, {normalized})"
 
 class InstagramAccount(BaseModel):
     __tablename__ = "instagram_accounts"
@@ -21,12 +28,20 @@ class InstagramAccount(BaseModel):
     # 关系
     posts = relationship("InstagramPost", back_populates="account", cascade="all, delete-orphan")
 
+class AccountFollowerSnapshot(BaseModel):
+    __tablename__ = "account_follower_snapshots"
+    
+    # 粉丝数变化时记录一条，用于按帖子发布时间取最接近的粉丝数
+    account_id = Column(Integer, ForeignKey("instagram_accounts.id", ondelete="CASCADE"), primary_key=True)
+    captured_at = Column(DateTime(timezone=True), primary_key=True)
+    followers_count = Column(BigInteger, nullable=False)
+
 class InstagramPost(BaseModel):
     __tablename__ = "instagram_posts"
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(String(100), unique=True, index=True, nullable=False)
-    account_id = Column(Integer, ForeignKey("instagram_accounts.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("instagram_accounts.id"), nullable=False, index=True)
     shortcode = Column(String(50), unique=True, index=True)
     
     # 内容信息
@@ -46,19 +61,34 @@ class InstagramPost(BaseModel):
     saves_count = Column(BigInteger, default=0)
     
     # 时间和位置
-    posted_at = Column(DateTime(timezone=True))
+    posted_at = Column(DateTime(timezone=True), index=True)
     location_name = Column(String(200))
     location_id = Column(String(100))
     
     # 分析字段
-    engagement_rate = Column(Float, default=0.0)
+    engagement_rate = Column(Float, default=0.0)  # 由EngagementRateService按账户在数据库中整体重算
     content_category = Column(String(50))  # 互动游戏/竞赛, 促销/销售, 纯教育内容, 品牌/社区, 其他
     sentiment_score = Column(Float, default=0.0)  # -1到1的情感分数
     
+    # 写入时规范化和分词的结果（text_normalization.prepare_text）
+    normalized_text = deferred(Column(Text))
+    tokens = deferred(Column(JSON))
+    # 计入关键词文档频率的时间，为空表示尚未计入
+    keywords_indexed_at = Column(DateTime(timezone=True))
+    # 分析输入（标题、媒体类型、hashtags、发布时间）的哈希（content_hash.content_hash）
+    content_hash = Column(String(64))
+    
+    # 全文检索（写入时由数据库生成）
+    search_vector = deferred(Column(TSVECTOR, Computed(search_vector_sql("caption"), persisted=True)))
+    
     # 关系
     account = relationship("InstagramAccount", back_populates="posts")
     comments = relationship("InstagramComment", back_populates="post", cascade="all, delete-orphan")
     analysis = relationship("ContentAnalysis", back_populates="post", uselist=False, cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_instagram_posts_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
 class InstagramComment(BaseModel):
     __tablename__ = "instagram_comments"
@@ -76,12 +106,36 @@ class InstagramComment(BaseModel):
     likes_count = Column(BigInteger, default=0)
     
     # 时间和回复
-    commented_at = Column(DateTime(timezone=True))
+    commented_at = Column(DateTime(timezone=True), index=True)
     parent_comment_id = Column(String(100))  # 如果是回复，存储父评论ID
     
     # 分析字段
     sentiment_score = Column(Float, default=0.0)
+    sentiment_label = Column(String(20))  # positive, negative, neutral
     is_relevant = Column(Boolean, default=True)  # 是否与主题相关
+    analyzed_at = Column(DateTime(timezone=True), index=True)  # 为空表示尚未进行情感分析
+    
+    # 写入时规范化和分词的结果（text_normalization.prepare_text）
+    normalized_text = deferred(Column(Text))
+    tokens = deferred(Column(JSON))
+    
+    # 全文检索（写入时由数据库生成）
+    search_vector = deferred(Column(TSVECTOR, Computed(search_vector_sql("text"), persisted=True)))
     
     # 关系
-    post = relationship("InstagramPost", back_populates="comments")
\ No newline at end of file
+    post = relationship("InstagramPost", back_populates="comments")
+    
+    __table_args__ = (
+        Index("ix_instagram_comments_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+class HashtagCursor(BaseModel):
+    __tablename__ = "hashtag_cursors"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    hashtag = Column(String(200), unique=True, index=True, nullable=False)
+    
+    # instaloader FrozenNodeIterator状态，为空表示下次从最新帖子开始
+    state = Column(JSON)
+    posts_seen = Column(BigInteger, default=0)
+    last_run_at = Column(DateTime(timezone=True))
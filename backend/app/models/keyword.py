@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, BigInteger, ForeignKey
+from .base import BaseModel
+
+class TermDocumentFrequency(BaseModel):
+    __tablename__ = "term_document_frequencies"
+    
+    # 每个账户每个月（period = 年*12 + 月-1）的文档频率
+    account_id = Column(Integer, ForeignKey("instagram_accounts.id", ondelete="CASCADE"), primary_key=True)
+    period = Column(Integer, primary_key=True)
+    term = Column(String(100), primary_key=True)
+    
+    # 包含该词的帖子数
+    df = Column(Integer, nullable=False, default=0)
+
+class KeywordCorpusStats(BaseModel):
+    __tablename__ = "keyword_corpus_stats"
+    
+    account_id = Column(Integer, ForeignKey("instagram_accounts.id", ondelete="CASCADE"), primary_key=True)
+    period = Column(Integer, primary_key=True)
+    
+    # 已计入的帖子数和词数（BM25的N和平均文档长度）
+    documents = Column(Integer, nullable=False, default=0)
+    tokens = Column(BigInteger, nullable=False, default=0)
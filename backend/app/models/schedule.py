@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from .base import BaseModel
+
+class ScrapeSchedule(BaseModel):
+    __tablename__ = "scrape_schedules"
+    
+    # 被自适应调度器跟踪的账户（按账户抓取过一次即加入）
+    account_id = Column(Integer, ForeignKey("instagram_accounts.id", ondelete="CASCADE"), primary_key=True)
+    
+    # 由posted_at历史学习的发帖频率（篇/天）和互动衰减时间常数（小时）
+    posts_per_day = Column(Float, nullable=False, default=0.0)
+    decay_hours = Column(Float)
+    learned_at = Column(DateTime(timezone=True))
+    
+    # 在全局请求预算内分配的新帖检查间隔和互动数据刷新间隔（小时）
+    check_interval_hours = Column(Float)
+    refresh_interval_hours = Column(Float)
+    
+    next_check_at = Column(DateTime(timezone=True), index=True)
+    # 最新帖子仍在互动增长期内时才刷新，为空表示不需要刷新
+    next_refresh_at = Column(DateTime(timezone=True), index=True)
+    refresh_until = Column(DateTime(timezone=True))
+    last_scraped_at = Column(DateTime(timezone=True))
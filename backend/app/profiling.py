@@ -0,0 +1,113 @@
+"""按请求的SQL分析与N+1检测
+
+通过SQLAlchemy引擎事件记录当前上下文中的语句数、总耗时和重复的语句形状。
+中间件把结果写入Server-Timing响应头和debug日志；测试中可用assert_max_queries限制查询数。
+"""
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Optional
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+_current_profile = contextvars.ContextVar("sql_profile", default=None)
+
+# 展开后的IN参数列表、多余空白
+_in_params = re.compile(r"\((?:\s*%\([^)]+\)s\s*,?)+\)|\((?:\s*\?\s*,?)+\)")
+_whitespace = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """语句形状：折叠IN参数列表和空白，使同一查询的不同参数归为一类"""
+    shape = _in_params.sub("(...)", statement)
+    return _whitespace.sub(" ", shape).strip()
+
+
+class QueryProfile:
+    """一次请求（或代码块）内的SQL统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: Optional[int] = None) -> List[tuple[str, int]]:
+        """重复次数达到阈值的语句形状（疑似N+1）"""
+        threshold = threshold or config.SQL_PROFILING_REPEAT_THRESHOLD
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+def instrument_engine(engine):
+    """注册引擎事件；仅在存在活动的QueryProfile时记录"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile.get() is not None:
+            conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        starts = conn.info.get("profile_query_start")
+        if profile is not None and starts:
+            profile.record(statement, time.perf_counter() - starts.pop())
+
+
+@contextmanager
+def profile_queries():
+    """在代码块内记录SQL统计"""
+    profile = QueryProfile()
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """测试辅助：代码块内的查询数超过上限时失败
+
+    用法:
+        with assert_max_queries(3):
+            client.get("/api/instagram/competitors")
+    """
+    with profile_queries() as profile:
+        yield profile
+
+    if profile.count > max_queries:
+        details = "\n".join(f"  {count}x {shape[:200]}" for shape, count in profile.shapes.most_common(5))
+        raise AssertionError(f"执行了{profile.count}条SQL，超过上限{max_queries}:\n{details}")
+
+
+def install(app):
+    """注册按请求的SQL分析中间件"""
+    if not config.SQL_PROFILING_ENABLED:
+        return
+
+    @app.middleware("http")
+    async def _sql_profile(request, call_next):
+        with profile_queries() as profile:
+            response = await call_next(request)
+
+        response.headers.append("Server-Timing", profile.server_timing())
+
+        logger.debug(f"{request.method} {request.url.path}: {profile.count} 条SQL，耗时 {profile.total_seconds * 1000:.1f}ms")
+        for shape, count in profile.repeated():
+            logger.warning(f"疑似N+1查询 {request.method} {request.url.path}: 重复{count}次 {shape[:200]}")
+
+        return response
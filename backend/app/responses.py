@@ -0,0 +1,168 @@
+"""快速JSON序列化与响应压缩
+
+FastJSONResponse用orjson序列化（未安装时退回标准库json），作为应用的默认响应类。
+大列表接口可以只查询响应需要的列，用row_dicts把行元组直接交给FastJSONResponse，
+跳过ORM对象构建、Pydantic校验和jsonable_encoder的逐层复制。
+
+CompressionMiddleware按Accept-Encoding对超过RESPONSE_COMPRESSION_MIN_BYTES的JSON/文本响应
+使用brotli（已安装时优先）或gzip压缩；流式响应和已编码的响应原样返回。
+压缩后的响应与未压缩的表示不同，强ETag改为弱ETag（If-None-Match按弱比较仍然命中）。
+"""
+import gzip
+import json
+import logging
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+if orjson is None:
+    logger.warning("未安装orjson，JSON响应使用标准库json序列化")
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+
+def _default(obj: Any):
+    """orjson/json不能直接序列化的类型"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # 标准库json不支持时间类型（orjson原生支持，不会走到这里）
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_columns(model) -> List:
+    """模型的非延迟加载列（与ORM对象默认加载、原接口返回的字段一致）"""
+    return [getattr(model, prop.key) for prop in inspect(model).column_attrs if not prop.deferred]
+
+
+def row_dicts(rows: Sequence) -> List[Dict]:
+    """查询结果行（Row元组）转为以列名为键的字典，每行只构建一次"""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """按Accept-Encoding选择编码：br（已安装brotli）优先于gzip，q=0表示拒绝"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    def allowed(encoding: str) -> bool:
+        return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=config.RESPONSE_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=config.RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """ASGI响应压缩中间件（整体压缩非流式响应，不分块）"""
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = config.RESPONSE_COMPRESSION_MIN_BYTES if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        decided = False
+
+        async def send_compressed(message):
+            nonlocal start_message, decided
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if decided or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            decided = True
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def install(app):
+    """注册响应压缩中间件（最后注册，位于最外层）"""
+    app.add_middleware(CompressionMiddleware)
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from app.database import get_db
-from app.models.analysis import ContentAnalysis, TrendAnalysis, CompetitorBenchmark
+from app.models.analysis import ContentAnalysis, TrendAnalysis, CompetitorBenchmark, PostAudienceSentiment
+from app.models.hashtag import TrendingWindow
 from app.models.instagram import InstagramPost, InstagramAccount
 from app.services.analysis_service import AnalysisService
+from app.services.sentiment_cache import get_cache_stats
+from app.services.comment_analysis import CommentAnalysisService
+from app.services.analysis_pipeline import AnalysisPipeline
+from app.services.text_triage import get_triage_stats
+from app.services.hashtag_index import HashtagIndex
+from app.services.trending import WINDOWS
+from app.services.near_duplicates import NearDuplicateIndex
 
 router = APIRouter()
 
@@ -61,6 +69,27 @@ def analyze_content(post_id: str, db: Session = Depends(get_db)):
     
     return analysis
 
+@router.post("/content/analyze-pending")
+def analyze_pending_content(
+    background_tasks: BackgroundTasks,
+    limit: Optional[int] = None,
+    reanalyze: bool = False,
+    db: Session = Depends(get_db)
+):
+    """批量分析所有尚无分析结果的帖子；reanalyze时同时重新分析内容或分析器版本已变化的帖子"""
+    pipeline = AnalysisPipeline(db)
+    
+    # 在后台任务中执行分析
+    background_tasks.add_task(pipeline.run, limit=limit, reanalyze=reanalyze)
+    
+    return {
+        "message": "批量内容分析任务已添加到后台队列",
+        "limit": limit,
+        "reanalyze": reanalyze,
+        "analyzer_version": pipeline.analysis_service.analyzer_version,
+        "workers": pipeline.workers
+    }
+
 @router.get("/content/category-distribution")
 def get_category_distribution(
     start_date: Optional[datetime] = None,
@@ -131,6 +160,53 @@ def get_sentiment_overview(
         "overall_sentiment": "positive" if avg_sentiment_score > 0.1 else "negative" if avg_sentiment_score < -0.1 else "neutral"
     }
 
+@router.get("/sentiment/cache-stats")
+def get_sentiment_cache_stats():
+    """获取情感分析缓存命中率（当前进程）"""
+    return get_cache_stats()
+
+@router.get("/sentiment/triage-stats")
+def get_sentiment_triage_stats():
+    """获取模型前分流统计（当前进程）"""
+    return get_triage_stats()
+
+@router.post("/comments/analyze")
+def analyze_comments(
+    background_tasks: BackgroundTasks,
+    limit: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """对尚未分析的评论批量进行情感分析"""
+    comment_service = CommentAnalysisService(db)
+    
+    # 在后台任务中执行分析
+    background_tasks.add_task(comment_service.run, limit=limit)
+    
+    return {"message": "评论分析任务已添加到后台队列", "limit": limit}
+
+@router.get("/comments/sentiment/{post_id}")
+def get_audience_sentiment(post_id: str, db: Session = Depends(get_db)):
+    """获取帖子的受众（评论）情感汇总"""
+    post = db.query(InstagramPost).filter(InstagramPost.post_id == post_id).first()
+    if not post:
+        raise HTTPException(status_code=404, detail="帖子未找到")
+    
+    audience = db.query(PostAudienceSentiment).filter(PostAudienceSentiment.post_id == post.id).first()
+    if not audience:
+        raise HTTPException(status_code=404, detail="评论情感数据未找到")
+    
+    return {
+        "post_id": post_id,
+        "comments_analyzed": audience.comments_analyzed,
+        "relevant_comments": audience.relevant_comments,
+        "average_sentiment_score": audience.avg_sentiment_score,
+        "sentiment_distribution": {
+            "positive": audience.positive_count,
+            "neutral": audience.neutral_count,
+            "negative": audience.negative_count
+        }
+    }
+
 @router.get("/trends/latest", response_model=TrendResponse)
 def get_latest_trends(db: Session = Depends(get_db)):
     """获取最新的趋势分析"""
@@ -151,6 +227,116 @@ def generate_trend_analysis(
     
     return trend_analysis
 
+@router.get("/hashtags/trending")
+def get_trending_hashtags(
+    days: int = 7,
+    account_username: Optional[str] = None,
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    """获取时间窗口内的热门标签"""
+    start_date = datetime.now() - timedelta(days=days)
+    usernames = [account_username] if account_username else None
+    
+    return {
+        "days": days,
+        "hashtags": HashtagIndex(db).trending(start_date, usernames=usernames, limit=limit)
+    }
+
+@router.get("/hashtags/live")
+def get_live_trending_hashtags(window: str = "day", db: Session = Depends(get_db)):
+    """获取流式统计的热门和上升标签（预先计算的快照）"""
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"不支持的窗口: {window}，可选 {', '.join(WINDOWS)}")
+    
+    state = db.get(TrendingWindow, window)
+    if not state or not state.snapshot:
+        raise HTTPException(status_code=404, detail="热门标签数据未找到")
+    
+    return state.snapshot
+
+@router.get("/hashtags/engagement")
+def get_hashtag_engagement(
+    days: int = 30,
+    account_username: Optional[str] = None,
+    min_posts: int = 3,
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    """获取各标签帖子的平均互动表现"""
+    start_date = datetime.now() - timedelta(days=days)
+    usernames = [account_username] if account_username else None
+    
+    return {
+        "days": days,
+        "hashtags": HashtagIndex(db).engagement(start_date, usernames=usernames, min_posts=min_posts, limit=limit)
+    }
+
+@router.get("/hashtags/{hashtag}/co-occurrence")
+def get_hashtag_co_occurrence(
+    hashtag: str,
+    days: int = 30,
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    """获取与指定标签一起使用的标签"""
+    start_date = datetime.now() - timedelta(days=days)
+    
+    return {
+        "hashtag": hashtag,
+        "days": days,
+        "co_occurring": HashtagIndex(db).co_occurrence(hashtag, start_date, limit=limit)
+    }
+
+@router.get("/hashtags/{hashtag}/posts")
+def get_hashtag_posts(
+    hashtag: str,
+    limit: int = 50,
+    db: Session = Depends(get_db)
+):
+    """获取使用指定标签的帖子"""
+    post_ids = HashtagIndex(db).posts_for_tag(hashtag, limit)
+    posts = db.query(InstagramPost).filter(InstagramPost.id.in_(post_ids)).order_by(InstagramPost.posted_at.desc()).all()
+    
+    return {
+        "hashtag": hashtag,
+        "posts": [
+            {
+                "post_id": post.post_id,
+                "shortcode": post.shortcode,
+                "caption": post.caption[:200] + "..." if post.caption and len(post.caption) > 200 else post.caption,
+                "engagement_rate": post.engagement_rate,
+                "likes_count": post.likes_count,
+                "comments_count": post.comments_count,
+                "posted_at": post.posted_at
+            }
+            for post in posts
+        ]
+    }
+
+@router.get("/duplicates/clusters")
+def get_duplicate_clusters(
+    min_size: int = 2,
+    account_username: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    db: Session = Depends(get_db)
+):
+    """获取近似重复标题簇（同一宣传文案在多个账户/多周的副本）"""
+    return {
+        "min_size": min_size,
+        "clusters": NearDuplicateIndex(db).clusters(min_size, account_username, limit, offset)
+    }
+
+@router.get("/duplicates/clusters/{cluster_id}")
+def get_duplicate_cluster_posts(cluster_id: int, limit: int = 100, db: Session = Depends(get_db)):
+    """获取近似重复簇内的帖子"""
+    posts = NearDuplicateIndex(db).cluster_posts(cluster_id, limit)
+    if not posts:
+        raise HTTPException(status_code=404, detail="重复簇未找到")
+    
+    return {"cluster_id": cluster_id, "posts": posts}
+
 @router.get("/competitors/benchmark")
 def get_competitor_benchmark(
     days: int = 30,
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.dashboard import DashboardService, etag_matches
+
+router = APIRouter()
+
+@router.get("/dashboard")
+def get_dashboard(
+    request: Request,
+    days: int = Query(30, ge=1, le=365, description="情感概览和互动表现的统计天数"),
+    db: Session = Depends(get_db)
+):
+    """仪表盘全部面板（竞品、情感概览、内容分类、互动表现、最新趋势）
+
+    响应带强ETag，数据未变化时对If-None-Match返回304；各面板耗时见Server-Timing响应头
+    """
+    service = DashboardService(db)
+    version, as_of = service.version(days)
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        response = Response(status_code=304, headers=headers)
+    else:
+        body = service.render(version, as_of, days)
+        response = Response(content=body, media_type="application/json", headers=headers)
+
+    response.headers.append("Server-Timing", service.server_timing())
+    return response
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
 from app.database import get_db
 from app.models.instagram import InstagramAccount, InstagramPost, InstagramComment
+from app.responses import FastJSONResponse, model_columns, row_dicts
 from app.services.instagram_scraper import InstagramScraperService
+from app.services.scrape_scheduler import ScrapeScheduler
 
 router = APIRouter()
 
@@ -45,6 +48,14 @@ class ScrapingRequest(BaseModel):
     max_posts: int = 50
     include_comments: bool = True
 
+class HashtagScrapingRequest(BaseModel):
+    hashtags: Optional[List[str]] = None  # 为空时使用默认目标标签
+    max_posts_per_tag: int = 30
+
+class ScheduledScrapingRequest(BaseModel):
+    limit: Optional[int] = None  # 本次最多抓取的到期账户数
+    include_comments: bool = False
+
 @router.get("/accounts", response_model=List[AccountResponse])
 def get_accounts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """获取所有Instagram账户列表"""
@@ -74,6 +85,42 @@ def scrape_accounts(request: ScrapingRequest, background_tasks: BackgroundTasks,
     
     return {"message": "抓取任务已添加到后台队列", "usernames": request.usernames}
 
+@router.post("/scrape-hashtags")
+def scrape_hashtags(request: HashtagScrapingRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """按hashtag发现帖子并保存，从上次停止的位置继续"""
+    scraper_service = InstagramScraperService(db)
+    hashtags = request.hashtags or scraper_service.target_hashtags
+    
+    # 在后台任务中执行抓取
+    background_tasks.add_task(
+        scraper_service.discover_hashtags,
+        hashtags,
+        request.max_posts_per_tag
+    )
+    
+    return {"message": "hashtag抓取任务已添加到后台队列", "hashtags": hashtags}
+
+@router.post("/scrape-scheduled")
+def scrape_scheduled(request: ScheduledScrapingRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """按自适应调度抓取到期的账户（新帖检查和互动数据刷新）"""
+    scheduler = ScrapeScheduler(db)
+    due = scheduler.due(limit=request.limit)
+    
+    # 在后台任务中执行抓取
+    background_tasks.add_task(
+        scheduler.run,
+        InstagramScraperService(db),
+        request.limit,
+        request.include_comments
+    )
+    
+    return {"message": "调度抓取任务已添加到后台队列", "due": due}
+
+@router.get("/schedule")
+def get_schedule(limit: int = 100, offset: int = 0, db: Session = Depends(get_db)):
+    """被调度账户的发帖频率、衰减时间常数和下次检查/刷新时间"""
+    return {"schedules": ScrapeScheduler(db).schedules(limit=limit, offset=offset)}
+
 @router.get("/posts", response_model=List[PostResponse])
 def get_posts(
     skip: int = 0, 
@@ -83,7 +130,8 @@ def get_posts(
     db: Session = Depends(get_db)
 ):
     """获取帖子列表，支持筛选"""
-    query = db.query(InstagramPost)
+    # 只查询响应字段，行元组直接序列化（跳过ORM对象和Pydantic校验）
+    query = db.query(*[getattr(InstagramPost, field) for field in PostResponse.model_fields])
     
     if account_username:
         query = query.join(InstagramAccount).filter(InstagramAccount.username == account_username)
@@ -91,45 +139,68 @@ def get_posts(
     if content_category:
         query = query.filter(InstagramPost.content_category == content_category)
     
-    posts = query.order_by(InstagramPost.posted_at.desc()).offset(skip).limit(limit).all()
-    return posts
+    rows = query.order_by(InstagramPost.posted_at.desc()).offset(skip).limit(limit).all()
+    return FastJSONResponse(row_dicts(rows))
 
 @router.get("/posts/{post_id}")
 def get_post(post_id: str, db: Session = Depends(get_db)):
     """获取特定帖子详情"""
-    post = db.query(InstagramPost).filter(InstagramPost.post_id == post_id).first()
+    post = db.query(*model_columns(InstagramPost)).filter(InstagramPost.post_id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="帖子未找到")
     
     # 获取相关评论
-    comments = db.query(InstagramComment).filter(InstagramComment.post_id == post.id).all()
+    comments = row_dicts(
+        db.query(*model_columns(InstagramComment)).filter(InstagramComment.post_id == post.id).all()
+    )
     
-    return {
-        "post": post,
+    return FastJSONResponse({
+        "post": post._asdict(),
         "comments": comments,
         "comment_count": len(comments)
-    }
+    })
 
 @router.get("/competitors")
 def get_competitor_analysis(db: Session = Depends(get_db)):
     """获取竞争对手分析数据"""
     target_competitors = ["51talkksa", "novakid_mena", "vipkid_ar"]
     
+    accounts = {
+        account.username: account
+        for account in db.query(InstagramAccount).filter(InstagramAccount.username.in_(target_competitors)).all()
+    }
+    account_ids = [account.id for account in accounts.values()]
+    
+    # 在数据库中聚合，避免逐账户加载全部帖子
+    post_stats = {
+        account_id: (total_posts, avg_engagement)
+        for account_id, total_posts, avg_engagement in db.query(
+            InstagramPost.account_id,
+            func.count(InstagramPost.id),
+            func.avg(InstagramPost.engagement_rate)
+        ).filter(InstagramPost.account_id.in_(account_ids)).group_by(InstagramPost.account_id).all()
+    }
+    
+    # 内容分类统计
+    category_stats_by_account = {}
+    for account_id, category, count in db.query(
+        InstagramPost.account_id,
+        InstagramPost.content_category,
+        func.count(InstagramPost.id)
+    ).filter(
+        InstagramPost.account_id.in_(account_ids),
+        InstagramPost.content_category.isnot(None)
+    ).group_by(InstagramPost.account_id, InstagramPost.content_category).all():
+        category_stats_by_account.setdefault(account_id, {})[category] = count
+    
     analysis = []
     for username in target_competitors:
-        account = db.query(InstagramAccount).filter(InstagramAccount.username == username).first()
+        account = accounts.get(username)
         if account:
-            posts = db.query(InstagramPost).filter(InstagramPost.account_id == account.id).all()
-            
             # 计算统计数据
-            total_posts = len(posts)
-            avg_engagement = sum(post.engagement_rate for post in posts) / total_posts if total_posts > 0 else 0
-            
-            # 内容分类统计
-            category_stats = {}
-            for post in posts:
-                if post.content_category:
-                    category_stats[post.content_category] = category_stats.get(post.content_category, 0) + 1
+            total_posts, avg_engagement = post_stats.get(account.id, (0, 0))
+            avg_engagement = avg_engagement or 0
+            category_stats = category_stats_by_account.get(account.id, {})
             
             analysis.append({
                 "username": username,
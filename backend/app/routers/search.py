@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+
+from app.database import get_db
+from app.services.search_service import SearchService
+
+router = APIRouter()
+
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1, description="检索词，支持引号短语、OR和-排除"),
+    type: str = Query("posts", description="posts 或 comments"),
+    account_username: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    sort: str = Query("rank", description="rank（相关度）或 recent（时间）"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """全文检索帖子标题或评论，返回高亮片段和下一页游标"""
+    try:
+        return SearchService(db).search(
+            q,
+            search_type=type,
+            account_username=account_username,
+            start_date=start_date,
+            end_date=end_date,
+            sort=sort,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
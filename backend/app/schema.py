@@ -0,0 +1,60 @@
+"""数据库结构升级
+
+create_all只创建缺失的表，不修改已有的表。后续版本给已有表补充的列和索引集中列在这里，
+全部语句幂等（IF NOT EXISTS），API启动时执行（SCHEMA_AUTO_UPGRADE=true，默认），
+也可以单独运行 python -m app.jobs.upgrade_schema。
+
+全文检索的生成列会重写整张表，不在这里执行，已有数据库需运行一次 python -m app.jobs.create_search_index。
+"""
+import logging
+import time
+
+from sqlalchemy import text
+
+from app.models import Base
+
+logger = logging.getLogger(__name__)
+
+# ORM映射但基线表中没有的列
+ADD_COLUMNS = [
+    # 写入时规范化和分词（normalize_text回填旧数据）
+    "ALTER TABLE instagram_posts ADD COLUMN IF NOT EXISTS normalized_text text",
+    "ALTER TABLE instagram_posts ADD COLUMN IF NOT EXISTS tokens json",
+    "ALTER TABLE instagram_comments ADD COLUMN IF NOT EXISTS normalized_text text",
+    "ALTER TABLE instagram_comments ADD COLUMN IF NOT EXISTS tokens json",
+    # 关键词文档频率（index_keywords计入旧帖子）
+    "ALTER TABLE instagram_posts ADD COLUMN IF NOT EXISTS keywords_indexed_at timestamptz",
+    # 增量重新分析（reanalyze_posts补算旧帖子的哈希）
+    "ALTER TABLE instagram_posts ADD COLUMN IF NOT EXISTS content_hash varchar(64)",
+    "ALTER TABLE content_analysis ADD COLUMN IF NOT EXISTS content_hash varchar(64)",
+    "ALTER TABLE content_analysis ADD COLUMN IF NOT EXISTS analyzer_version varchar(50)",
+    # 评论情感分析（analyze_comments）
+    "ALTER TABLE instagram_comments ADD COLUMN IF NOT EXISTS sentiment_label varchar(20)",
+    "ALTER TABLE instagram_comments ADD COLUMN IF NOT EXISTS analyzed_at timestamptz",
+]
+
+# 已有表上新增的索引，使用CONCURRENTLY创建，不阻塞写入
+CREATE_INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_instagram_posts_account_id ON instagram_posts (account_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_instagram_posts_posted_at ON instagram_posts (posted_at)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_instagram_comments_commented_at ON instagram_comments (commented_at)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_instagram_comments_analyzed_at ON instagram_comments (analyzed_at)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_content_analysis_analyzer_version ON content_analysis (analyzer_version)",
+]
+
+
+def upgrade(engine):
+    """创建缺失的表，再给已有的表补充列和索引（重复执行不做任何修改）"""
+    started = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        for statement in ADD_COLUMNS:
+            conn.execute(text(statement))
+
+    # CREATE INDEX CONCURRENTLY不能在事务中执行
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for statement in CREATE_INDEXES:
+            conn.execute(text(statement))
+
+    logger.info(f"数据库结构已是最新，耗时 {time.perf_counter() - started:.1f}s")
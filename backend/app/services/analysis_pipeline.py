@@ -0,0 +1,259 @@
+from sqlalchemy import update, or_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Dict, Iterator
+import logging
+import time
+
+from app import config, metrics
+from app.models.instagram import InstagramPost
+from app.models.analysis import ContentAnalysis
+from app.services.analysis_service import AnalysisService
+from app.services.keyword_engine import KeywordEngine
+from app.services.near_duplicates import NearDuplicateIndex
+from app.services.scoring import BatchScorer, FeatureFrame
+from app.services.content_hash import content_hash
+from app.services.text_normalization import tokenize
+
+logger = logging.getLogger(__name__)
+
+# 分析写入的列（重新分析时全部覆盖）
+ANALYSIS_COLUMNS = (
+    "content_category", "category_confidence", "sentiment_score", "sentiment_label", "confidence",
+    "keywords", "topics", "content_quality_score", "engagement_prediction", "content_hash", "analyzer_version"
+)
+
+# 工作进程内的AnalysisService：关键词表和停用词表在每个进程只构建一次，不加载情感模型
+_worker_service: Optional[AnalysisService] = None
+
+
+def _init_worker():
+    global _worker_service
+    _worker_service = AnalysisService(None)
+
+
+def analyze_cpu_stages(items: List[tuple]) -> List[tuple]:
+    """纯CPU的分析阶段（在工作进程中执行）
+
+    输入: (帖子ID, 标题, 写入时存储的tokens) 元组
+    输出: (帖子ID, 分类, 分类置信度, 主题)，只传回紧凑结果；
+    关键词需要语料级文档频率、质量分和互动率按整块向量化计算，均由主进程完成
+    """
+    service = _worker_service or AnalysisService(None)
+    results = []
+    for post_id, caption, tokens in items:
+        if tokens is None:
+            tokens = tokenize(caption)
+        category, category_confidence = service.classify_content(caption, tokens)
+        results.append((
+            post_id,
+            category,
+            category_confidence,
+            service.extract_topics(caption, tokens)
+        ))
+    return results
+
+
+class AnalysisPipeline:
+    """批量帖子分析：CPU阶段分发到进程池，情感分析在主进程批量推理，结果批量写库"""
+
+    def __init__(self, db: Session, workers: Optional[int] = None, analysis_service: Optional[AnalysisService] = None):
+        self.db = db
+        self.workers = workers or config.ANALYSIS_WORKERS
+        self.analysis_service = analysis_service or AnalysisService(db)
+        self.scorer = BatchScorer(db)
+
+    def create_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 1:
+            return None
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def run_cpu_stages(self, items: List[tuple], executor: Optional[ProcessPoolExecutor]) -> List[tuple]:
+        """把标题分块发送到工作进程；单进程模式直接在本进程执行"""
+        if executor is None:
+            return analyze_cpu_stages(items)
+
+        # 每个进程分到若干小块，兼顾负载均衡和进程间通信开销
+        size = max(len(items) // (self.workers * 4), 1)
+        chunks = [items[start:start + size] for start in range(0, len(items), size)]
+        results = []
+        for chunk_results in executor.map(analyze_cpu_stages, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def pending_filter(self, reanalyze: bool):
+        """尚无分析结果的帖子；reanalyze时还包括内容哈希或分析器版本变化的帖子"""
+        if not reanalyze:
+            return ContentAnalysis.id.is_(None)
+        return or_(
+            ContentAnalysis.id.is_(None),
+            ContentAnalysis.analyzer_version.is_distinct_from(self.analysis_service.analyzer_version),
+            ContentAnalysis.content_hash.is_distinct_from(InstagramPost.content_hash)
+        )
+
+    def iter_pending(self, chunk_size: int, reanalyze: bool = False) -> Iterator[List[tuple]]:
+        """按主键分块读取待分析的帖子（只取需要的列，不加载ORM对象）"""
+        last_id = 0
+        while True:
+            rows = self.db.query(
+                InstagramPost.id,
+                InstagramPost.caption,
+                InstagramPost.media_type,
+                InstagramPost.caption_hashtags,
+                InstagramPost.posted_at,
+                InstagramPost.tokens,
+                InstagramPost.account_id,
+                InstagramPost.content_hash
+            ).outerjoin(ContentAnalysis).filter(
+                self.pending_filter(reanalyze),
+                InstagramPost.id > last_id
+            ).order_by(InstagramPost.id).limit(chunk_size).all()
+
+            if not rows:
+                return
+
+            yield rows
+            last_id = rows[-1][0]
+
+    def analyze_rows(self, rows: List[tuple], executor: Optional[ProcessPoolExecutor]) -> List[Dict]:
+        """分析一块帖子，返回ContentAnalysis行"""
+        cpu_results = self.run_cpu_stages([(row.id, row.caption, row.tokens) for row in rows], executor)
+        reused, sentiments = self.cluster_sentiments(rows)
+        qualities, engagement_predictions = self.scorer.score(FeatureFrame.from_rows([
+            (
+                len(row.caption) if row.caption else 0,
+                row.media_type,
+                len(row.caption_hashtags) if row.caption_hashtags else 0,
+                row.posted_at,
+                sentiment[0]
+            )
+            for row, sentiment in zip(rows, sentiments)
+        ]))
+        # 分析管道与写入路径一样负责把帖子计入文档频率（已计入的不重复计数）
+        keyword_engine = KeywordEngine(self.db, self.analysis_service.stop_tokens)
+        keyword_engine.index_posts([row.id for row in rows])
+        keywords_list = keyword_engine.keywords_for([
+            (row.id, row.account_id, row.posted_at, row.tokens if row.tokens is not None else tokenize(row.caption))
+            for row in rows
+        ])
+
+        analyses = []
+        for row, cpu_result, sentiment, keywords, quality, engagement_prediction in zip(
+            rows, cpu_results, sentiments, keywords_list, qualities, engagement_predictions
+        ):
+            post_id, category, category_confidence, topics = cpu_result
+            sentiment_score, sentiment_label, confidence = sentiment
+            if post_id in reused:
+                category, category_confidence = reused[post_id][:2]
+
+            analyses.append({
+                "post_id": post_id,
+                "content_category": category,
+                "category_confidence": category_confidence,
+                "sentiment_score": sentiment_score,
+                "sentiment_label": sentiment_label,
+                "confidence": confidence,
+                "keywords": keywords,
+                "topics": topics,
+                "content_quality_score": float(quality),
+                "engagement_prediction": round(float(engagement_prediction), 6),
+                "content_hash": row.content_hash or content_hash(
+                    row.caption, row.media_type, row.caption_hashtags, row.posted_at
+                ),
+                "analyzer_version": self.analysis_service.analyzer_version
+            })
+
+        return analyses
+
+    def cluster_sentiments(self, rows: List[tuple]) -> tuple[Dict[int, tuple], List[tuple]]:
+        """近似重复的帖子复用同簇已有的分析结果，本块内同簇的帖子只推理一次
+
+        返回 (帖子ID -> 同簇已有的分析结果, 每行的(情感分数, 情感标签, 置信度))
+        """
+        duplicates = NearDuplicateIndex(self.db)
+        post_ids = [row.id for row in rows]
+        duplicates.index_posts(post_ids)
+        reused = duplicates.cluster_analyses(post_ids, self.analysis_service.analyzer_version)
+        clusters = duplicates.clusters_of(post_ids)
+
+        pending = {}
+        keys = []
+        for row in rows:
+            if row.id in reused:
+                keys.append(None)
+                continue
+            key = ("cluster", clusters[row.id]) if row.id in clusters else ("post", row.id)
+            pending.setdefault(key, row.caption)
+            keys.append(key)
+
+        inferred = dict(zip(pending, self.analysis_service.analyze_sentiment_batch(list(pending.values()))))
+        metrics.CACHE_LOOKUPS.labels(cache="near_duplicate", result="hit").inc(len(rows) - len(pending))
+        metrics.CACHE_LOOKUPS.labels(cache="near_duplicate", result="miss").inc(len(pending))
+
+        sentiments = [
+            reused[row.id][2:] if key is None else inferred[key]
+            for row, key in zip(rows, keys)
+        ]
+        return reused, sentiments
+
+    @metrics.timed(metrics.ANALYSIS_DURATION, function="analysis_pipeline")
+    def run(self, limit: Optional[int] = None, chunk_size: Optional[int] = None, reanalyze: bool = False) -> Dict:
+        """分析所有尚无分析结果的帖子，返回处理统计
+
+        reanalyze为True时同时增量重新分析过期的结果（帖子内容或分析器版本变化），原地更新。
+        """
+        chunk_size = chunk_size or config.ANALYSIS_CHUNK_SIZE
+        started = time.perf_counter()
+        processed = 0
+
+        executor = self.create_executor()
+        try:
+            for rows in self.iter_pending(chunk_size, reanalyze):
+                if limit is not None:
+                    rows = rows[:limit - processed]
+
+                try:
+                    analyses = self.analyze_rows(rows, executor)
+                    # 已有的过期结果按post_id原地更新
+                    stmt = pg_insert(ContentAnalysis)
+                    self.db.execute(stmt.on_conflict_do_update(
+                        index_elements=["post_id"],
+                        set_={column: stmt.excluded[column] for column in ANALYSIS_COLUMNS} | {"updated_at": func.now()}
+                    ), analyses)
+
+                    # 更新帖子的分析字段
+                    self.db.execute(update(InstagramPost), [
+                        {
+                            "id": analysis["post_id"],
+                            "content_category": analysis["content_category"],
+                            "sentiment_score": analysis["sentiment_score"],
+                            # 旧帖子尚无内容哈希时一并补上
+                            "content_hash": analysis["content_hash"]
+                        }
+                        for analysis in analyses
+                    ])
+                    self.db.commit()
+                except Exception as e:
+                    logger.error(f"批量内容分析失败: {e}")
+                    self.db.rollback()
+                    raise e
+
+                processed += len(rows)
+                logger.info(f"批量内容分析进度: {processed} 帖子")
+
+                if limit is not None and processed >= limit:
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"批量内容分析完成: {processed} 帖子，{self.workers} 个进程，耗时 {elapsed:.1f}s")
+
+        return {
+            "posts_processed": processed,
+            "workers": self.workers,
+            "elapsed_seconds": round(elapsed, 2),
+            "posts_per_second": round(processed / elapsed, 1) if elapsed > 0 else 0.0
+        }
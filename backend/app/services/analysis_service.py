@@ -1,32 +1,33 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, selectinload, undefer
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
+import hashlib
+import json
 import logging
-import re
-from transformers import pipeline
-import torch
 
 from app.models.instagram import InstagramPost, InstagramComment, InstagramAccount
 from app.models.analysis import ContentAnalysis, TrendAnalysis, CompetitorBenchmark
+from app import config, metrics
+from app.services.sentiment_backends import SentimentBackend, get_sentiment_backend
+from app.services.sentiment_cache import SentimentCache
+from app.services.text_triage import triage
+from app.services.hashtag_index import HashtagIndex
+from app.services.keyword_engine import KeywordEngine
+from app.services.near_duplicates import NearDuplicateIndex
+from app.services.scoring import BatchScorer, FeatureFrame, quality_scores
+from app.services.content_hash import content_hash
+from app.services.text_normalization import match_forms, tokenize, words
 
 logger = logging.getLogger(__name__)
 
 class AnalysisService:
     def __init__(self, db: Session):
         self.db = db
-        
-        # 初始化情感分析模型
-        try:
-            # 使用多语言情感分析模型，支持阿拉伯语
-            self.sentiment_analyzer = pipeline(
-                "sentiment-analysis",
-                model="cardiffnlp/twitter-xlm-roberta-base-sentiment",
-                tokenizer="cardiffnlp/twitter-xlm-roberta-base-sentiment"
-            )
-            logger.info("情感分析模型加载成功")
-        except Exception as e:
-            logger.error(f"加载情感分析模型失败: {e}")
-            self.sentiment_analyzer = None
+        self._sentiment_backend = None
+        self._sentiment_backend_failed = False
+        # 加载失败的按语言模型，之后的批次直接使用默认模型，不再重试
+        self._failed_language_models = set()
+        self.scorer = BatchScorer(db)
         
         # 内容分类关键词定义（阿拉伯语和英语）
         self.content_categories = {
@@ -47,47 +48,93 @@ class AnalysisService:
                 "en": ["community", "family", "connection", "relationship", "support", "initiative", "event"]
             }
         }
+        
+        # 停用词（简单的阿拉伯语和英语停用词）
+        self.stop_words = {
+            "the", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+            "في", "من", "إلى", "على", "هذا", "هذه", "التي", "الذي", "و", "أو", "لكن"
+        }
+        
+        # 分类关键词和停用词按与帖子相同的方式规范化，关键词作为存储tokens的前缀匹配（见classify_content）
+        self.category_tokens = {
+            category: {token for keyword in keywords["ar"] + keywords["en"] for token in tokenize(keyword)}
+            for category, keywords in self.content_categories.items()
+        }
+        self.keyword_tokens = set().union(*self.category_tokens.values())
+        self.keyword_lengths = sorted({len(token) for token in self.keyword_tokens})
+        self.stop_tokens = {token for word in self.stop_words for token in tokenize(word)}
+        
+        # 分析器版本：修订号 + 关键词表、停用词表和情感模型配置的指纹
+        fingerprint = json.dumps({
+            "categories": self.content_categories,
+            "stop_words": sorted(self.stop_words),
+            "sentiment_model": config.SENTIMENT_MODEL,
+            "sentiment_backend": config.SENTIMENT_BACKEND,
+            "language_models": config.SENTIMENT_LANGUAGE_MODELS,
+            "triage": config.SENTIMENT_TRIAGE_ENABLED
+        }, sort_keys=True, ensure_ascii=False)
+        self.analyzer_version = f"{config.ANALYZER_REVISION}.{hashlib.sha1(fingerprint.encode()).hexdigest()[:12]}"
     
+    @metrics.timed(metrics.ANALYSIS_DURATION, function="analyze_content")
     def analyze_content(self, post: InstagramPost) -> ContentAnalysis:
         """分析单个帖子的内容"""
         try:
-            # 检查是否已有分析结果
+            # 检查是否已有分析结果：内容和分析器版本都未变化时直接返回
             existing_analysis = self.db.query(ContentAnalysis).filter(
                 ContentAnalysis.post_id == post.id
             ).first()
             
-            if existing_analysis:
+            post_hash = post.content_hash or content_hash(
+                post.caption, post.media_type, post.caption_hashtags, post.posted_at
+            )
+            if existing_analysis and self.is_current(existing_analysis, post_hash):
                 return existing_analysis
             
-            # 内容分类
-            content_category, category_confidence = self.classify_content(post.caption)
-            
-            # 情感分析
-            sentiment_score, sentiment_label, confidence = self.analyze_sentiment(post.caption)
-            
-            # 关键词提取
-            keywords = self.extract_keywords(post.caption)
-            topics = self.extract_topics(post.caption)
-            
-            # 内容质量评分
-            content_quality_score = self.calculate_content_quality(post)
-            
-            # 互动预测
-            engagement_prediction = self.predict_engagement(post)
-            
-            # 创建分析记录
-            analysis = ContentAnalysis(
-                post_id=post.id,
-                content_category=content_category,
-                category_confidence=category_confidence,
-                sentiment_score=sentiment_score,
-                sentiment_label=sentiment_label,
-                confidence=confidence,
-                keywords=keywords,
-                topics=topics,
-                content_quality_score=content_quality_score,
-                engagement_prediction=engagement_prediction
-            )
+            # 写入时已分词的标题
+            tokens = self.post_tokens(post)
+            
+            # 近似重复的帖子复用同簇已有的分类和情感结果（签名和文档频率由写入路径和分析管道建立，这里只读）
+            reused = NearDuplicateIndex(self.db).cluster_analyses([post.id], self.analyzer_version).get(post.id)
+            
+            if reused:
+                content_category, category_confidence, sentiment_score, sentiment_label, confidence = reused
+            else:
+                # 内容分类
+                content_category, category_confidence = self.classify_content(post.caption, tokens)
+                
+                # 情感分析
+                sentiment_score, sentiment_label, confidence = self.analyze_sentiment(post.caption)
+            
+            # 关键词提取（语料级BM25，同账户常用词权重低）
+            keywords = KeywordEngine(self.db, self.stop_tokens).keywords_for(
+                [(post.id, post.account_id, post.posted_at, tokens)]
+            )[0]
+            topics = self.extract_topics(post.caption, tokens)
+            
+            # 内容质量评分和互动预测（使用本次的情感分数）
+            quality, engagement = self.scorer.score(FeatureFrame.from_rows([(
+                len(post.caption) if post.caption else 0,
+                post.media_type,
+                len(post.caption_hashtags) if post.caption_hashtags else 0,
+                post.posted_at,
+                sentiment_score
+            )]))
+            content_quality_score = float(quality[0])
+            engagement_prediction = round(float(engagement[0]), 6)
+            
+            # 创建分析记录（已有的过期记录原地更新）
+            analysis = existing_analysis or ContentAnalysis(post_id=post.id)
+            analysis.content_category = content_category
+            analysis.category_confidence = category_confidence
+            analysis.sentiment_score = sentiment_score
+            analysis.sentiment_label = sentiment_label
+            analysis.confidence = confidence
+            analysis.keywords = keywords
+            analysis.topics = topics
+            analysis.content_quality_score = content_quality_score
+            analysis.engagement_prediction = engagement_prediction
+            analysis.content_hash = post_hash
+            analysis.analyzer_version = self.analyzer_version
             
             self.db.add(analysis)
             self.db.commit()
@@ -106,33 +153,40 @@ class AnalysisService:
             self.db.rollback()
             raise e
     
-    def classify_content(self, text: Optional[str]) -> tuple[str, float]:
+    def is_current(self, analysis: ContentAnalysis, post_hash: str) -> bool:
+        """分析结果是否由当前分析器基于帖子当前内容生成"""
+        return analysis.content_hash == post_hash and analysis.analyzer_version == self.analyzer_version
+    
+    def post_tokens(self, post: InstagramPost) -> List[str]:
+        """帖子标题的词：优先使用写入时存储的tokens，旧数据现场分词"""
+        if post.tokens is not None:
+            return post.tokens
+        return tokenize(post.caption)
+    
+    def classify_content(self, text: Optional[str], tokens: Optional[List[str]] = None) -> tuple[str, float]:
         """内容分类"""
-        if not text:
+        if tokens is None:
+            tokens = tokenize(text)
+        if not tokens:
             return "其他", 0.0
         
-        text_lower = text.lower()
+        # 命中的关键词：关键词是某个词形的前缀（games、lessons、لتعليم 都能命中）
+        hits = set()
+        for token in tokens:
+            for form in match_forms(token):
+                for length in self.keyword_lengths:
+                    if len(form) < length:
+                        break
+                    if form[:length] in self.keyword_tokens:
+                        hits.add(form[:length])
         category_scores = {}
         
-        # 为每个分类计算分数
-        for category, keywords in self.content_categories.items():
-            score = 0
-            total_keywords = 0
-            
-            # 检查阿拉伯语关键词
-            for keyword in keywords["ar"]:
-                if keyword.lower() in text_lower:
-                    score += 1
-                total_keywords += 1
-            
-            # 检查英语关键词
-            for keyword in keywords["en"]:
-                if keyword.lower() in text_lower:
-                    score += 1
-                total_keywords += 1
+        # 为每个分类计算分数：命中的关键词数 / 关键词总数
+        for category, keywords in self.category_tokens.items():
+            score = len(keywords & hits)
             
             # 计算置信度
-            confidence = score / total_keywords if total_keywords > 0 else 0
+            confidence = score / len(keywords) if keywords else 0
             category_scores[category] = confidence
         
         # 选择分数最高的分类
@@ -143,49 +197,131 @@ class AnalysisService:
         
         return "其他", 0.0
     
+    @property
+    def sentiment_backend(self) -> Optional[SentimentBackend]:
+        """情感分析推理后端（按配置选择，首次使用时加载）"""
+        if self._sentiment_backend is None and not self._sentiment_backend_failed:
+            try:
+                # 使用多语言情感分析模型，支持阿拉伯语
+                self._sentiment_backend = get_sentiment_backend()
+            except Exception as e:
+                logger.error(f"加载情感分析模型失败: {e}")
+                self._sentiment_backend_failed = True
+        return self._sentiment_backend
+    
     def analyze_sentiment(self, text: Optional[str]) -> tuple[float, str, float]:
         """情感分析"""
-        if not text or not self.sentiment_analyzer:
-            return 0.0, "neutral", 0.0
+        return self.analyze_sentiment_batch([text])[0]
+    
+    @metrics.timed(metrics.ANALYSIS_DURATION, function="analyze_sentiment_batch")
+    def analyze_sentiment_batch(self, texts: List[Optional[str]], with_scored: bool = False):
+        """批量情感分析，返回 (情感分数, 标签, 置信度) 列表
+
+        with_scored=True时返回 (结果列表, 是否已评分列表)：没有可用模型或推理失败的文本保留中性占位结果，
+        对应位置为False，调用方可以据此稍后重试而不是把占位结果当作中性情感保存。
+        """
+        results = [(0.0, "neutral", 0.0)] * len(texts)
+        scored = [False] * len(texts)
+        
+        # 分流：空文本、纯表情/标签等直接给出结果，实质性文本按语言分组
+        routed = {}
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            if not config.SENTIMENT_TRIAGE_ENABLED:
+                routed.setdefault(None, []).append((i, text))
+                continue
+            
+            result = triage(text)
+            if result.route != "model":
+                results[i] = result.sentiment
+                scored[i] = True
+            else:
+                routed.setdefault(result.language, []).append((i, result.text))
         
-        try:
-            # 使用模型进行情感分析
-            result = self.sentiment_analyzer(text[:512])[0]  # 限制文本长度
-            
-            label = result['label']
-            confidence = result['score']
+        for language, pending in routed.items():
+            backend = self.backend_for_language(language)
+            if not backend:
+                continue
             
-            # 将标签转换为情感分数
-            if label == "positive":
-                sentiment_score = confidence
-            elif label == "negative":
-                sentiment_score = -confidence
-            else:  # neutral
-                sentiment_score = 0.0
+            predictions = self.predict_with_cache(backend, [text for _, text in pending])
             
-            return sentiment_score, label.lower(), confidence
-            
-        except Exception as e:
-            logger.error(f"情感分析失败: {e}")
-            return 0.0, "neutral", 0.0
+            for (i, _), prediction in zip(pending, predictions):
+                if prediction:
+                    results[i] = self.to_sentiment_score(*prediction)
+                    scored[i] = True
+        
+        if with_scored:
+            return results, scored
+        return results
     
-    def extract_keywords(self, text: Optional[str]) -> List[str]:
-        """关键词提取"""
-        if not text:
+    def backend_for_language(self, language: Optional[str]) -> Optional[SentimentBackend]:
+        """按语言选择推理后端，配置了轻量模型的语言使用对应模型"""
+        model_name = config.SENTIMENT_LANGUAGE_MODELS.get(language)
+        if model_name and model_name not in self._failed_language_models:
+            try:
+                return get_sentiment_backend(model_name=model_name)
+            except Exception as e:
+                logger.error(f"加载{language}情感分析模型失败，使用默认模型: {e}")
+                self._failed_language_models.add(model_name)
+        return self.sentiment_backend
+    
+    def predict_with_cache(self, backend: SentimentBackend, texts: List[str]) -> List[Optional[tuple[str, float]]]:
+        """先查缓存，只把未命中（且去重后）的文本送入模型"""
+        if not config.SENTIMENT_CACHE_ENABLED:
+            try:
+                return backend.predict(texts)
+            except Exception as e:
+                logger.error(f"情感分析失败: {e}")
+                return [None] * len(texts)
+        
+        cache = SentimentCache(self.db, backend.cache_id)
+        keys = cache.keys_for(texts)
+        found = cache.get_many(keys)
+        
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in misses:
+                misses[key] = text
+        
+        if misses:
+            try:
+                predictions = backend.predict(list(misses.values()))
+            except Exception as e:
+                logger.error(f"情感分析失败: {e}")
+                predictions = []
+            computed = dict(zip(misses.keys(), predictions))
+            cache.put_many(computed)
+            found.update(computed)
+        
+        return [found.get(key) for key in keys]
+    
+    @staticmethod
+    def to_sentiment_score(label: str, confidence: float) -> tuple[float, str, float]:
+        """将标签转换为情感分数"""
+        label = label.lower()
+        if label == "positive":
+            sentiment_score = confidence
+        elif label == "negative":
+            sentiment_score = -confidence
+        else:  # neutral
+            sentiment_score = 0.0
+        
+        return sentiment_score, label, confidence
+    
+    def extract_keywords(self, text: Optional[str], tokens: Optional[List[str]] = None) -> List[str]:
+        """关键词提取（单篇词频，无数据库时使用；入库帖子使用KeywordEngine）"""
+        if tokens is None:
+            tokens = tokenize(text)
+        if not tokens:
             return []
         
-        # 简单的关键词提取 - 基于频率和重要性
-        words = re.findall(r'\b\w+\b', text.lower())
-        
-        # 过滤停用词（简单的阿拉伯语和英语停用词）
-        stop_words = {
-            "the", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
-            "في", "من", "إلى", "على", "هذا", "هذه", "التي", "الذي", "و", "أو", "لكن"
-        }
+        # 过滤停用词
+        stop_words = self.stop_tokens
         
-        # 计算词频
+        # 计算词频 - 基于频率和重要性
         word_freq = {}
-        for word in words:
+        for word in words(tokens):
             if len(word) > 2 and word not in stop_words:
                 word_freq[word] = word_freq.get(word, 0) + 1
         
@@ -193,14 +329,16 @@ class AnalysisService:
         sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
         return [word for word, freq in sorted_words[:10]]
     
-    def extract_topics(self, text: Optional[str]) -> List[str]:
+    def extract_topics(self, text: Optional[str], tokens: Optional[List[str]] = None) -> List[str]:
         """主题提取"""
-        if not text:
+        if tokens is None:
+            tokens = tokenize(text)
+        if not tokens:
             return []
         
         # 基于hashtag和关键词提取主题
-        hashtags = re.findall(r'#\w+', text)
-        mentions = re.findall(r'@\w+', text)
+        hashtags = [token for token in tokens if token.startswith("#")]
+        mentions = [token for token in tokens if token.startswith("@")]
         
         topics = []
         topics.extend([tag[1:] for tag in hashtags])  # 移除#符号
@@ -209,90 +347,14 @@ class AnalysisService:
         return topics[:10]  # 限制主题数量
     
     def calculate_content_quality(self, post: InstagramPost) -> float:
-        """计算内容质量评分"""
-        score = 0.0
-        
-        # 标题长度评分 (0-20分)
-        if post.caption:
-            caption_length = len(post.caption)
-            if 100 <= caption_length <= 500:
-                score += 20
-            elif caption_length > 500:
-                score += 15
-            elif caption_length >= 50:
-                score += 10
-            else:
-                score += 5
-        
-        # 媒体类型评分 (0-15分)
-        if post.media_type == "carousel":
-            score += 15  # 轮播图通常表现更好
-        elif post.media_type == "video":
-            score += 12
-        elif post.media_type == "image":
-            score += 10
-        
-        # Hashtag使用评分 (0-15分)
-        if post.caption_hashtags:
-            hashtag_count = len(post.caption_hashtags)
-            if 5 <= hashtag_count <= 15:
-                score += 15
-            elif hashtag_count > 15:
-                score += 10  # 过多的hashtag可能被视为垃圾信息
-            elif hashtag_count >= 3:
-                score += 10
-            else:
-                score += 5
-        
-        # 发布时间评分 (0-10分) - 基于沙特时区的最佳发布时间
-        if post.posted_at:
-            saudi_hour = (post.posted_at.hour + 3) % 24  # 转换为沙特时间
-            if 18 <= saudi_hour <= 22:  # 晚上6-10点是最佳时间
-                score += 10
-            elif 12 <= saudi_hour <= 16:  # 下午也不错
-                score += 8
-            else:
-                score += 5
-        
-        # 内容多样性评分 (0-10分)
-        if post.caption_hashtags and len(post.caption_hashtags) > 3:
-            score += 10
-        
-        # 基础分
-        score += 30
-        
-        return min(score, 100)  # 确保不超过100分
+        """计算内容质量评分（单个帖子；批量打分使用BatchScorer）"""
+        return float(quality_scores(FeatureFrame.from_posts([post]))[0])
     
     def predict_engagement(self, post: InstagramPost) -> float:
-        """预测互动率"""
-        # 基于历史数据和内容特征预测互动率
-        # 这里使用简化的预测模型
-        
-        base_engagement = 0.02  # 基础互动率2%
-        
-        # 内容质量影响
-        if hasattr(post, 'analysis') and post.analysis:
-            quality_score = post.analysis.content_quality_score / 100
-            base_engagement += quality_score * 0.03
-        
-        # 媒体类型影响
-        if post.media_type == "carousel":
-            base_engagement += 0.01
-        elif post.media_type == "video":
-            base_engagement += 0.008
-        
-        # Hashtag数量影响
-        if post.caption_hashtags:
-            hashtag_count = len(post.caption_hashtags)
-            if 8 <= hashtag_count <= 12:
-                base_engagement += 0.005
-        
-        # 情感影响
-        if post.sentiment_score > 0.5:
-            base_engagement += 0.005
-        
-        return min(base_engagement, 0.1)  # 限制最大预测互动率为10%
+        """预测互动率（单个帖子；批量打分使用BatchScorer）"""
+        return float(self.scorer.score(FeatureFrame.from_posts([post]))[1][0])
     
+    @metrics.timed(metrics.ANALYSIS_DURATION, function="generate_trend_analysis")
     def generate_trend_analysis(self, analysis_period: str = "weekly") -> TrendAnalysis:
         """生成趋势分析"""
         try:
@@ -311,7 +373,12 @@ class AnalysisService:
             target_competitors = ["51talkksa", "novakid_mena", "vipkid_ar"]
             
             # 获取相关帖子
-            posts = self.db.query(InstagramPost).join(InstagramAccount).filter(
+            # 预加载账户和分析结果，避免逐帖懒加载(N+1)
+            posts = self.db.query(InstagramPost).join(InstagramAccount).options(
+                contains_eager(InstagramPost.account),
+                selectinload(InstagramPost.analysis),
+                undefer(InstagramPost.tokens)
+            ).filter(
                 InstagramAccount.username.in_(target_competitors),
                 InstagramPost.posted_at >= start_date,
                 InstagramPost.posted_at <= end_date
@@ -321,27 +388,24 @@ class AnalysisService:
                 logger.warning(f"在{analysis_period}期间没有找到帖子数据")
                 return None
             
-            # 分析热门hashtags
-            hashtag_counter = {}
-            for post in posts:
-                if post.caption_hashtags:
-                    for hashtag in post.caption_hashtags:
-                        hashtag_counter[hashtag] = hashtag_counter.get(hashtag, 0) + 1
-            
-            trending_hashtags = dict(sorted(hashtag_counter.items(), key=lambda x: x[1], reverse=True)[:20])
+            # 分析热门hashtags（post_hashtags索引上的SQL聚合）
+            trending_hashtags = {
+                row["hashtag"]: row["posts"]
+                for row in HashtagIndex(self.db).trending(start_date, end_date, target_competitors, limit=20)
+            }
             
-            # 分析热门话题
-            topic_counter = {}
-            for post in posts:
-                if hasattr(post, 'analysis') and post.analysis and post.analysis.topics:
-                    for topic in post.analysis.topics:
-                        topic_counter[topic] = topic_counter.get(topic, 0) + 1
+            # 同一标题的多个近似副本只计一次
+            unique_posts = NearDuplicateIndex(self.db).unique_posts(posts)
             
-            trending_topics = dict(sorted(topic_counter.items(), key=lambda x: x[1], reverse=True)[:15])
+            # 分析热门话题：期间帖子BM25总分最高的词
+            trending_topics = KeywordEngine(self.db, self.stop_tokens).top_terms(
+                [(post.id, post.account_id, post.posted_at, self.post_tokens(post)) for post in unique_posts],
+                limit=15
+            )
             
             # 内容分类表现分析
             category_performance = {}
-            for post in posts:
+            for post in unique_posts:
                 if post.content_category:
                     if post.content_category not in category_performance:
                         category_performance[post.content_category] = {
@@ -506,6 +570,7 @@ class AnalysisService:
         
         return {"best_hours": [18, 19, 20], "hourly_performance": {}}  # 默认最佳时间
     
+    @metrics.timed(metrics.ANALYSIS_DURATION, function="generate_competitor_benchmark")
     def generate_competitor_benchmark(self, competitors: List[str], days: int = 30) -> CompetitorBenchmark:
         """生成竞争对手基准测试"""
         try:
@@ -0,0 +1,192 @@
+from sqlalchemy import update, func, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Iterator
+from datetime import datetime, timezone
+import logging
+import re
+import time
+
+from app import config, metrics
+from app.models.instagram import InstagramComment
+from app.models.analysis import PostAudienceSentiment
+from app.services.analysis_service import AnalysisService
+
+logger = logging.getLogger(__name__)
+
+class CommentAnalysisService:
+    """评论情感分析流水线：分块读取未分析评论 -> 批量推理 -> 批量回写 -> 汇总到帖子"""
+
+    # 常见的引流/垃圾评论
+    spam_patterns = re.compile(
+        r"https?://|www\.|follow\s*(me|back)|check\s*(my|our)\s*(page|profile|bio)|dm\s*(me|us)|تابعوني|تابع\s*حسابي",
+        re.IGNORECASE
+    )
+    mention_pattern = re.compile(r"@[\w.]+")
+
+    def __init__(self, db: Session, analysis_service: Optional[AnalysisService] = None):
+        self.db = db
+        self.analysis_service = analysis_service or AnalysisService(db)
+
+    def is_relevant(self, text: Optional[str]) -> bool:
+        """判断评论是否相关：排除空评论、纯@好友评论和引流评论"""
+        if not text or not text.strip():
+            return False
+
+        if self.spam_patterns.search(text):
+            return False
+
+        # 去掉@提及后必须还剩实际内容（文字或表情）
+        remainder = self.mention_pattern.sub("", text).strip()
+        return bool(remainder)
+
+    def iter_unscored(self, chunk_size: int, post_ids: Optional[List[int]] = None) -> Iterator[List[tuple]]:
+        """按主键顺序分块读取尚未分析的评论（只取需要的列）"""
+        last_id = 0
+        while True:
+            query = self.db.query(
+                InstagramComment.id,
+                InstagramComment.post_id,
+                InstagramComment.text,
+                InstagramComment.normalized_text
+            ).filter(
+                InstagramComment.analyzed_at.is_(None),
+                InstagramComment.id > last_id
+            )
+            if post_ids:
+                query = query.filter(InstagramComment.post_id.in_(post_ids))
+
+            rows = query.order_by(InstagramComment.id).limit(chunk_size).all()
+            if not rows:
+                return
+
+            yield rows
+            last_id = rows[-1][0]
+
+    def analyze_chunk(self, rows: List[tuple]) -> List[Dict]:
+        """对一个分块批量推理，返回批量更新的参数
+
+        相关但未能评分的评论（没有可用模型或推理失败）不更新，analyzed_at保持为空，下次运行时重试，
+        也不计入帖子汇总。
+        """
+        now = datetime.now(timezone.utc)
+        # 相关性判断使用写入时规范化的文本（旧数据回退到原文）
+        relevant = [self.is_relevant(normalized_text or text) for _, _, text, normalized_text in rows]
+
+        # 只对相关评论跑模型（模型使用原文）
+        texts = [text if is_relevant else None for (_, _, text, _), is_relevant in zip(rows, relevant)]
+        sentiments, scored = self.analysis_service.analyze_sentiment_batch(texts, with_scored=True)
+
+        return [
+            {
+                "id": comment_id,
+                "sentiment_score": score,
+                "sentiment_label": label,
+                "is_relevant": is_relevant,
+                "analyzed_at": now
+            }
+            for (comment_id, _, _, _), is_relevant, (score, label, _), is_scored
+            in zip(rows, relevant, sentiments, scored)
+            if is_scored or not is_relevant
+        ]
+
+    def rollup_posts(self, post_ids: List[int]):
+        """把评论情感汇总为帖子级受众情感"""
+        if not post_ids:
+            return
+
+        relevant = InstagramComment.is_relevant.is_(True)
+        aggregates = self.db.query(
+            InstagramComment.post_id,
+            func.count(InstagramComment.id),
+            func.count(case((relevant, 1))),
+            func.coalesce(func.avg(case((relevant, InstagramComment.sentiment_score))), 0.0),
+            func.count(case((relevant & (InstagramComment.sentiment_score > 0), 1))),
+            func.count(case((relevant & (InstagramComment.sentiment_score == 0), 1))),
+            func.count(case((relevant & (InstagramComment.sentiment_score < 0), 1)))
+        ).filter(
+            InstagramComment.post_id.in_(post_ids),
+            InstagramComment.analyzed_at.isnot(None)
+        ).group_by(InstagramComment.post_id).all()
+
+        if not aggregates:
+            return
+
+        stmt = pg_insert(PostAudienceSentiment).values([
+            {
+                "post_id": post_id,
+                "comments_analyzed": analyzed,
+                "relevant_comments": relevant_count,
+                "avg_sentiment_score": float(avg_score),
+                "positive_count": positive,
+                "neutral_count": neutral,
+                "negative_count": negative
+            }
+            for post_id, analyzed, relevant_count, avg_score, positive, neutral, negative in aggregates
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["post_id"],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "comments_analyzed", "relevant_comments", "avg_sentiment_score",
+                    "positive_count", "neutral_count", "negative_count"
+                )
+            } | {"updated_at": func.now()}
+        )
+        self.db.execute(stmt)
+
+    @metrics.timed(metrics.ANALYSIS_DURATION, function="analyze_comments")
+    def run(self, chunk_size: Optional[int] = None, limit: Optional[int] = None, post_ids: Optional[List[int]] = None) -> Dict:
+        """运行评论分析流水线，返回处理统计"""
+        chunk_size = chunk_size or config.COMMENT_PIPELINE_CHUNK_SIZE
+        started = time.perf_counter()
+        processed = 0
+        unscored = 0
+        touched_posts = set()
+
+        for rows in self.iter_unscored(chunk_size, post_ids):
+            if limit is not None:
+                rows = rows[:limit - processed]
+
+            chunk_started = time.perf_counter()
+            try:
+                updates = self.analyze_chunk(rows)
+                if updates:
+                    self.db.execute(update(InstagramComment), updates)
+
+                chunk_posts = {post_id for _, post_id, _, _ in rows}
+                self.rollup_posts(list(chunk_posts))
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"评论分析分块失败: {e}")
+                self.db.rollback()
+                raise e
+
+            touched_posts |= chunk_posts
+            processed += len(rows)
+            unscored += len(rows) - len(updates)
+            chunk_seconds = time.perf_counter() - chunk_started
+            logger.info(f"评论分析进度: {processed} 条，本块 {len(rows) / chunk_seconds:.1f} 条/秒")
+
+            if limit is not None and processed >= limit:
+                break
+
+        elapsed = time.perf_counter() - started
+        throughput = processed / elapsed if elapsed > 0 else 0.0
+
+        if processed and throughput < config.COMMENT_PIPELINE_TARGET_CPS:
+            logger.warning(f"评论分析吞吐量 {throughput:.1f} 条/秒 低于目标 {config.COMMENT_PIPELINE_TARGET_CPS} 条/秒")
+
+        logger.info(f"评论分析完成: {processed} 条评论，{len(touched_posts)} 个帖子，{throughput:.1f} 条/秒")
+        if unscored:
+            logger.warning(f"{unscored} 条相关评论未能评分（模型不可用或推理失败），将在下次运行时重试")
+
+        return {
+            "comments_processed": processed,
+            "comments_unscored": unscored,
+            "posts_updated": len(touched_posts),
+            "elapsed_seconds": round(elapsed, 2),
+            "comments_per_second": round(throughput, 1),
+            "target_comments_per_second": config.COMMENT_PIPELINE_TARGET_CPS
+        }
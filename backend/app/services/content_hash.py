@@ -0,0 +1,23 @@
+"""帖子分析输入的内容哈希
+
+分析结果（分类、情感、关键词、主题、质量分）只取决于标题、媒体类型、hashtags和发布时间；
+写入帖子时计算一次存入instagram_posts.content_hash，分析时复制到content_analysis.content_hash，
+两者不一致即表示帖子在分析后被修改，需要重新分析。
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import List, Optional
+
+
+def content_hash(caption: Optional[str], media_type: Optional[str], caption_hashtags: Optional[List[str]],
+                 posted_at: Optional[datetime]) -> str:
+    """分析输入的SHA-256（十六进制）；无时区的发布时间按UTC处理"""
+    if posted_at is not None and posted_at.tzinfo is None:
+        posted_at = posted_at.replace(tzinfo=timezone.utc)
+    payload = json.dumps(
+        [caption or "", media_type or "", caption_hashtags or [], posted_at.timestamp() if posted_at else None],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
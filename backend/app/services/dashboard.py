@@ -0,0 +1,249 @@
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import threading
+import time
+
+from app import metrics
+from app.responses import dumps
+from app.models.instagram import InstagramAccount, InstagramPost
+from app.models.analysis import ContentAnalysis, TrendAnalysis
+
+# 仪表盘展示的竞争对手（与 /api/instagram/competitors 相同）
+TARGET_COMPETITORS = ["51talkksa", "novakid_mena", "vipkid_ar"]
+# 修改面板内容或格式时递增，使客户端缓存的版本失效
+DASHBOARD_SCHEMA = 1
+# 数据版本取自这些表的写入计数
+VERSION_TABLES = (
+    InstagramAccount.__tablename__, InstagramPost.__tablename__,
+    ContentAnalysis.__tablename__, TrendAnalysis.__tablename__
+)
+# 进程内缓存的已序列化版本数
+CACHE_SIZE = 16
+
+_payload_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match是否包含当前ETag（按弱比较，忽略W/前缀）"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+
+class DashboardService:
+    """仪表盘聚合：一次请求内用共享的查询结果计算所有面板（竞品、情感概览、内容分类、互动表现、最新趋势）
+
+    数据版本由相关表的写入计数（pg_stat_user_tables）、计数的起算时间和统计窗口的起点决定，版本不变时
+    客户端带If-None-Match即可得到304，不执行面板查询；同一版本的响应体在进程内缓存，保证强ETag字节一致。
+    写入计数在事务提交后约一秒内更新，因此新数据可能延迟一两秒出现在仪表盘上；
+    计数在统计信息重置或数据库重启后归零，版本中包含重置时间和启动时间，归零后的版本不会与旧版本重合。
+    版本只读系统统计视图，304响应不扫描数据表。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def timed(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed * 1000
+            metrics.DASHBOARD_PANEL_DURATION.labels(panel=name).observe(elapsed)
+
+    def server_timing(self) -> str:
+        """各面板和共享查询的耗时，写入Server-Timing响应头"""
+        return ", ".join(f"{name};dur={duration:.1f}" for name, duration in self.timings.items())
+
+    def version(self, days: int) -> tuple[str, datetime]:
+        """返回 (数据版本, 统计时间)；统计时间按小时取整，窗口起点在一小时内不变"""
+        as_of = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        with self.timed("version"):
+            counters = self.db.execute(text(
+                "SELECT relname, n_tup_ins, n_tup_upd, n_tup_del FROM pg_stat_user_tables "
+                "WHERE relname = ANY(:tables) ORDER BY relname"
+            ), {"tables": list(VERSION_TABLES)}).all()
+            # 计数归零的时间点：统计信息重置时间和数据库启动时间（只读系统视图，不扫描数据表）
+            epoch = self.db.execute(text(
+                "SELECT stats_reset, pg_postmaster_start_time() FROM pg_stat_database "
+                "WHERE datname = current_database()"
+            )).one()
+        key = json.dumps([
+            DASHBOARD_SCHEMA, days, as_of.isoformat(), [list(row) for row in counters], list(epoch)
+        ], default=str)
+        return hashlib.sha256(key.encode()).hexdigest()[:32], as_of
+
+    def render(self, version: str, as_of: datetime, days: int) -> bytes:
+        """序列化的仪表盘数据；同一版本只计算一次"""
+        with _cache_lock:
+            body = _payload_cache.get(version)
+            if body is not None:
+                _payload_cache.move_to_end(version)
+        if body is not None:
+            metrics.CACHE_LOOKUPS.labels(cache="dashboard", result="hit").inc()
+            return body
+        metrics.CACHE_LOOKUPS.labels(cache="dashboard", result="miss").inc()
+
+        payload = {"version": version, "as_of": as_of.isoformat(), "period_days": days}
+        payload["panels"] = self.panels(as_of - timedelta(days=days), days)
+        body = dumps(payload)
+
+        with _cache_lock:
+            _payload_cache[version] = body
+            while len(_payload_cache) > CACHE_SIZE:
+                _payload_cache.popitem(last=False)
+        return body
+
+    def panels(self, start: datetime, days: int) -> Dict:
+        # 共享查询1：全部帖子按账户和分类聚合（竞品面板和内容分类面板）
+        with self.timed("posts_by_account"):
+            by_account = self.db.query(
+                InstagramPost.account_id,
+                InstagramPost.content_category,
+                func.count(InstagramPost.id),
+                func.coalesce(func.sum(InstagramPost.engagement_rate), 0.0)
+            ).group_by(InstagramPost.account_id, InstagramPost.content_category).all()
+
+        # 共享查询2：统计窗口内的帖子按分类和情感标签聚合（情感概览面板和互动表现面板）
+        with self.timed("posts_in_window"):
+            in_window = self.db.query(
+                InstagramPost.content_category,
+                ContentAnalysis.sentiment_label,
+                func.count(InstagramPost.id),
+                func.coalesce(func.sum(InstagramPost.engagement_rate), 0.0),
+                func.count(ContentAnalysis.id),
+                func.coalesce(func.sum(ContentAnalysis.sentiment_score), 0.0)
+            ).outerjoin(ContentAnalysis, ContentAnalysis.post_id == InstagramPost.id).filter(
+                InstagramPost.posted_at >= start
+            ).group_by(InstagramPost.content_category, ContentAnalysis.sentiment_label).all()
+
+        with self.timed("competitors"):
+            competitors = self.competitors(by_account)
+        with self.timed("category_distribution"):
+            category_distribution = self.category_distribution(by_account)
+        with self.timed("sentiment_overview"):
+            sentiment_overview = self.sentiment_overview(in_window, days)
+        with self.timed("engagement"):
+            engagement = self.engagement(in_window, days)
+        with self.timed("latest_trends"):
+            latest_trends = self.latest_trends()
+
+        return {
+            "competitors": competitors,
+            "sentiment_overview": sentiment_overview,
+            "category_distribution": category_distribution,
+            "engagement": engagement,
+            "latest_trends": latest_trends,
+        }
+
+    def competitors(self, by_account: List[tuple]) -> List[Dict]:
+        accounts = {
+            account.username: account
+            for account in self.db.query(InstagramAccount).filter(
+                InstagramAccount.username.in_(TARGET_COMPETITORS)
+            ).all()
+        }
+        stats: Dict[int, Dict] = {}
+        for account_id, category, count, engagement in by_account:
+            entry = stats.setdefault(account_id, {"posts": 0, "engagement": 0.0, "categories": {}})
+            entry["posts"] += count
+            entry["engagement"] += float(engagement)
+            if category:
+                entry["categories"][category] = count
+
+        result = []
+        for username in TARGET_COMPETITORS:
+            account = accounts.get(username)
+            if not account:
+                continue
+            entry = stats.get(account.id, {"posts": 0, "engagement": 0.0, "categories": {}})
+            result.append({
+                "username": username,
+                "followers_count": account.followers_count,
+                "total_posts": entry["posts"],
+                "avg_engagement_rate": entry["engagement"] / entry["posts"] if entry["posts"] else 0,
+                "content_category_distribution": entry["categories"],
+                "last_updated": account.updated_at.isoformat() if account.updated_at else None
+            })
+        return result
+
+    def category_distribution(self, by_account: List[tuple]) -> Dict:
+        distribution: Dict[str, int] = {}
+        for _, category, count, _ in by_account:
+            if category:
+                distribution[category] = distribution.get(category, 0) + count
+        return {
+            "total_posts": sum(row[2] for row in by_account),
+            "category_distribution": distribution,
+            "time_range": {"start": None, "end": None}
+        }
+
+    def sentiment_overview(self, in_window: List[tuple], days: int) -> Dict:
+        distribution = {"positive": 0, "negative": 0, "neutral": 0}
+        analyses = 0
+        total_score = 0.0
+        for _, label, _, _, analyzed, score in in_window:
+            if not analyzed:
+                continue
+            distribution[label] = distribution.get(label, 0) + analyzed
+            analyses += analyzed
+            total_score += float(score)
+
+        if not analyses:
+            return {"message": "没有找到分析数据"}
+        average = total_score / analyses
+        return {
+            "period_days": days,
+            "total_analyses": analyses,
+            "sentiment_distribution": distribution,
+            "average_sentiment_score": average,
+            "overall_sentiment": "positive" if average > 0.1 else "negative" if average < -0.1 else "neutral"
+        }
+
+    def engagement(self, in_window: List[tuple], days: int) -> Dict:
+        posts = 0
+        total = 0.0
+        by_category: Dict[str, List[float]] = {}
+        for category, _, count, engagement, _, _ in in_window:
+            posts += count
+            total += float(engagement)
+            if category:
+                entry = by_category.setdefault(category, [0, 0.0])
+                entry[0] += count
+                entry[1] += float(engagement)
+
+        if not posts:
+            return {"message": "没有找到帖子数据"}
+        averages = {category: engagement / count for category, (count, engagement) in by_category.items()}
+        return {
+            "period_days": days,
+            "total_posts": posts,
+            "average_engagement_rate": total / posts,
+            "engagement_by_category": averages,
+            "best_performing_category": max(averages.items(), key=lambda item: item[1])[0] if averages else None
+        }
+
+    def latest_trends(self) -> Optional[Dict]:
+        trend = self.db.query(TrendAnalysis).order_by(TrendAnalysis.analysis_date.desc()).first()
+        if not trend:
+            return None
+        return {
+            "id": trend.id,
+            "analysis_date": trend.analysis_date.isoformat() if trend.analysis_date else None,
+            "analysis_period": trend.analysis_period,
+            "trending_hashtags": trend.trending_hashtags,
+            "trending_topics": trend.trending_topics,
+            "engagement_trends": trend.engagement_trends,
+            "market_insights": trend.market_insights
+        }
@@ -0,0 +1,83 @@
+from sqlalchemy import Float, Numeric, cast, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+from typing import Iterable, Optional
+from datetime import datetime, timezone
+import logging
+
+from app import config
+from app.models.instagram import InstagramAccount, AccountFollowerSnapshot, InstagramPost
+
+logger = logging.getLogger(__name__)
+
+
+class EngagementRateService:
+    """互动率 = (点赞数 + 评论数) / 粉丝数 * 100（保留4位小数，粉丝数为0时为0）
+
+    由数据库用一条UPDATE对整个账户（或一批帖子）重算，不在Python中逐帖计算；
+    同一表达式也用于post_engagement_rates视图。
+    """
+
+    def __init__(self, db: Session, use_snapshots: Optional[bool] = None):
+        self.db = db
+        self.use_snapshots = config.ENGAGEMENT_USE_FOLLOWER_SNAPSHOTS if use_snapshots is None else use_snapshots
+
+    def record_followers(self, account_id: int, followers_count: int, captured_at: Optional[datetime] = None) -> bool:
+        """粉丝数与最近一次快照不同时记录快照，返回是否记录"""
+        latest = self.db.query(AccountFollowerSnapshot.followers_count).filter(
+            AccountFollowerSnapshot.account_id == account_id
+        ).order_by(AccountFollowerSnapshot.captured_at.desc()).limit(1).scalar()
+        if latest == followers_count:
+            return False
+
+        self.db.execute(pg_insert(AccountFollowerSnapshot).values(
+            account_id=account_id,
+            followers_count=followers_count,
+            captured_at=captured_at or datetime.now(timezone.utc)
+        ).on_conflict_do_nothing())
+        return True
+
+    def rates_query(self, account_ids: Optional[Iterable[int]] = None, post_ids: Optional[Iterable[int]] = None):
+        """(帖子ID, 账户ID, 互动率) 的查询；不指定账户和帖子时覆盖全部帖子"""
+        post = aliased(InstagramPost)
+        followers = InstagramAccount.followers_count
+        if self.use_snapshots:
+            # 与发布时间最接近的快照；没有快照（或发布时间未知时按当前时间）退回账户当前粉丝数
+            nearest = select(AccountFollowerSnapshot.followers_count).where(
+                AccountFollowerSnapshot.account_id == post.account_id
+            ).order_by(
+                func.abs(func.extract(
+                    "epoch", AccountFollowerSnapshot.captured_at - func.coalesce(post.posted_at, func.now())
+                ))
+            ).limit(1).scalar_subquery()
+            followers = func.coalesce(nearest, followers)
+
+        interactions = func.coalesce(post.likes_count, 0) + func.coalesce(post.comments_count, 0)
+        rate = func.coalesce(
+            cast(func.round(cast(interactions, Numeric) * 100 / func.nullif(followers, 0), 4), Float), 0.0
+        )
+
+        query = select(
+            post.id.label("post_id"), post.account_id.label("account_id"), rate.label("engagement_rate")
+        ).join(InstagramAccount, post.account_id == InstagramAccount.id)
+        if account_ids is not None:
+            query = query.where(post.account_id.in_(list(account_ids)))
+        if post_ids is not None:
+            query = query.where(post.id.in_(list(post_ids)))
+        return query
+
+    def recompute(self, account_ids: Optional[Iterable[int]] = None, post_ids: Optional[Iterable[int]] = None) -> int:
+        """一条UPDATE重算指定账户（或帖子）的互动率，只改写数值变化的行，返回改写的行数"""
+        account_ids = None if account_ids is None else list(account_ids)
+        post_ids = None if post_ids is None else list(post_ids)
+        if account_ids == [] or post_ids == []:
+            return 0
+
+        rates = self.rates_query(account_ids, post_ids).subquery()
+        return self.db.execute(
+            update(InstagramPost).where(
+                InstagramPost.id == rates.c.post_id,
+                InstagramPost.engagement_rate.is_distinct_from(rates.c.engagement_rate)
+            ).values(engagement_rate=rates.c.engagement_rate),
+            execution_options={"synchronize_session": "fetch"}
+        ).rowcount
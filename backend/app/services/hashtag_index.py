@@ -0,0 +1,180 @@
+from sqlalchemy import func, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+from typing import List, Dict, Iterable, Optional
+from datetime import datetime
+import logging
+
+from app.models.instagram import InstagramAccount, InstagramPost
+from app.models.hashtag import Hashtag, PostHashtag
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_hashtag(tag: str) -> str:
+    """去掉#并casefold，#KSA_K12 与 #ksa_k12 视为同一标签"""
+    return tag.lstrip("#").strip().casefold()
+
+
+class HashtagIndex:
+    """hashtags + post_hashtags 倒排索引：写入时批量填充，热门标签等统计用SQL聚合"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ensure_hashtags(self, tags: Iterable[str]) -> Dict[str, int]:
+        """确保标签存在，返回 规范化标签 -> 标签ID"""
+        names = {}
+        for tag in tags:
+            normalized = normalize_hashtag(tag)
+            if normalized:
+                names.setdefault(normalized, tag.lstrip("#").strip())
+
+        if not names:
+            return {}
+
+        stmt = pg_insert(Hashtag).values([
+            {"normalized": normalized, "name": name} for normalized, name in sorted(names.items())
+        ])
+        self.db.execute(stmt.on_conflict_do_nothing(index_elements=["normalized"]))
+
+        rows = self.db.query(Hashtag.normalized, Hashtag.id).filter(Hashtag.normalized.in_(list(names))).all()
+        return dict(rows)
+
+    def index_rows(self, rows: List[tuple]) -> List[tuple]:
+        """为一批帖子重建标签关联，返回新增的 (标签ID, 发布时间)，供流式热门统计使用
+
+        rows: (帖子ID, 账户ID, 发布时间, caption_hashtags) 元组
+        """
+        if not rows:
+            return []
+
+        tag_ids = self.ensure_hashtags(tag for _, _, _, tags in rows for tag in (tags or []))
+
+        links = {}
+        for post_id, account_id, posted_at, tags in rows:
+            for tag in tags or []:
+                hashtag_id = tag_ids.get(normalize_hashtag(tag))
+                if hashtag_id is not None:
+                    links[(post_id, hashtag_id)] = {
+                        "post_id": post_id,
+                        "hashtag_id": hashtag_id,
+                        "account_id": account_id,
+                        "posted_at": posted_at
+                    }
+
+        post_ids = [row[0] for row in rows]
+        existing = set(self.db.query(PostHashtag.post_id, PostHashtag.hashtag_id).filter(
+            PostHashtag.post_id.in_(post_ids)
+        ).all())
+
+        # 帖子重新抓取后标题可能变化，先删除旧关联
+        self.db.execute(delete(PostHashtag).where(PostHashtag.post_id.in_(post_ids)))
+        if links:
+            self.db.execute(pg_insert(PostHashtag).on_conflict_do_nothing(), list(links.values()))
+
+        return [(link["hashtag_id"], link["posted_at"]) for key, link in links.items() if key not in existing]
+
+    def index_posts(self, post_ids: List[int]) -> List[tuple]:
+        """从帖子表读取标签并重建关联，返回新增的 (标签ID, 发布时间)"""
+        if not post_ids:
+            return []
+
+        rows = self.db.query(
+            InstagramPost.id,
+            InstagramPost.account_id,
+            InstagramPost.posted_at,
+            InstagramPost.caption_hashtags
+        ).filter(InstagramPost.id.in_(post_ids)).all()
+        return self.index_rows([tuple(row) for row in rows])
+
+    def counts_for(self, hashtag_ids: List[int], start_date: Optional[datetime] = None,
+                   end_date: Optional[datetime] = None) -> Dict[int, int]:
+        """指定标签在时间窗口内的精确帖子数"""
+        if not hashtag_ids:
+            return {}
+
+        query = self.db.query(PostHashtag.hashtag_id, func.count(PostHashtag.post_id)).filter(
+            PostHashtag.hashtag_id.in_(hashtag_ids)
+        )
+        query = self._filter_window(query, PostHashtag, start_date, end_date, None)
+        return dict(query.group_by(PostHashtag.hashtag_id).all())
+
+    def _filter_window(self, query, link, start_date: Optional[datetime], end_date: Optional[datetime],
+                       usernames: Optional[List[str]]):
+        if start_date:
+            query = query.filter(link.posted_at >= start_date)
+        if end_date:
+            query = query.filter(link.posted_at <= end_date)
+        if usernames:
+            account_ids = self.db.query(InstagramAccount.id).filter(InstagramAccount.username.in_(usernames))
+            query = query.filter(link.account_id.in_(account_ids.scalar_subquery()))
+        return query
+
+    def trending(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                 usernames: Optional[List[str]] = None, limit: int = 20) -> List[Dict]:
+        """时间窗口内使用次数最多的标签"""
+        usage = func.count(PostHashtag.post_id).label("posts")
+        query = self.db.query(Hashtag.name, usage).join(Hashtag, PostHashtag.hashtag_id == Hashtag.id)
+        query = self._filter_window(query, PostHashtag, start_date, end_date, usernames)
+        rows = query.group_by(Hashtag.id, Hashtag.name).order_by(usage.desc(), Hashtag.name).limit(limit).all()
+        return [{"hashtag": f"#{name}", "posts": posts} for name, posts in rows]
+
+    def co_occurrence(self, tag: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                      usernames: Optional[List[str]] = None, limit: int = 20) -> List[Dict]:
+        """与指定标签出现在同一帖子中的标签及次数"""
+        base = aliased(PostHashtag)
+        other = aliased(PostHashtag)
+        together = func.count(other.post_id).label("posts")
+
+        target_id = self.db.query(Hashtag.id).filter(Hashtag.normalized == normalize_hashtag(tag)).scalar()
+        if target_id is None:
+            return []
+
+        query = self.db.query(Hashtag.name, together).select_from(base).join(
+            other, (other.post_id == base.post_id) & (other.hashtag_id != base.hashtag_id)
+        ).join(Hashtag, other.hashtag_id == Hashtag.id).filter(base.hashtag_id == target_id)
+        query = self._filter_window(query, base, start_date, end_date, usernames)
+        rows = query.group_by(Hashtag.id, Hashtag.name).order_by(together.desc(), Hashtag.name).limit(limit).all()
+        return [{"hashtag": f"#{name}", "posts": posts} for name, posts in rows]
+
+    def engagement(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                   usernames: Optional[List[str]] = None, min_posts: int = 3, limit: int = 20) -> List[Dict]:
+        """各标签帖子的平均互动数据，按平均互动率排序"""
+        posts = func.count(InstagramPost.id).label("posts")
+        avg_engagement = func.avg(InstagramPost.engagement_rate).label("avg_engagement")
+
+        query = self.db.query(
+            Hashtag.name,
+            posts,
+            avg_engagement,
+            func.avg(InstagramPost.likes_count).label("avg_likes"),
+            func.avg(InstagramPost.comments_count).label("avg_comments")
+        ).select_from(PostHashtag).join(Hashtag, PostHashtag.hashtag_id == Hashtag.id).join(
+            InstagramPost, PostHashtag.post_id == InstagramPost.id
+        )
+        query = self._filter_window(query, PostHashtag, start_date, end_date, usernames)
+        rows = query.group_by(Hashtag.id, Hashtag.name).having(posts >= min_posts).order_by(
+            avg_engagement.desc()
+        ).limit(limit).all()
+
+        return [
+            {
+                "hashtag": f"#{row.name}",
+                "posts": row.posts,
+                "avg_engagement_rate": round(float(row.avg_engagement or 0), 4),
+                "avg_likes": round(float(row.avg_likes or 0), 1),
+                "avg_comments": round(float(row.avg_comments or 0), 1)
+            }
+            for row in rows
+        ]
+
+    def posts_for_tag(self, tag: str, limit: int = 50) -> List[int]:
+        """使用该标签的帖子ID，按发布时间倒序"""
+        return [
+            post_id for post_id, in self.db.query(PostHashtag.post_id).join(
+                Hashtag, PostHashtag.hashtag_id == Hashtag.id
+            ).filter(
+                Hashtag.normalized == normalize_hashtag(tag)
+            ).order_by(PostHashtag.posted_at.desc().nullslast()).limit(limit).all()
+        ]
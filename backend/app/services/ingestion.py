@@ -0,0 +1,117 @@
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import List, Dict, Iterable
+import logging
+
+from app import metrics
+from app.models.instagram import InstagramAccount, InstagramPost
+from app.services.engagement import EngagementRateService
+from app.services.hashtag_index import HashtagIndex
+from app.services.keyword_engine import KeywordEngine
+from app.services.near_duplicates import NearDuplicateIndex
+from app.services.trending import TrendingEngine
+
+logger = logging.getLogger(__name__)
+
+# 帖子重复出现时刷新的字段（互动数据和文本可能变化）
+POST_REFRESH_COLUMNS = (
+    "caption", "caption_hashtags", "caption_mentions", "normalized_text", "tokens", "media_type", "content_hash",
+    "likes_count", "comments_count", "media_url", "thumbnail_url"
+)
+
+
+class IngestionService:
+    """批量写入抓取结果：按username/post_id去重的upsert，一批一条语句"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ensure_accounts(self, usernames: Iterable[str]) -> Dict[str, int]:
+        """确保账户存在（已有账户不覆盖资料），返回 username -> 账户ID"""
+        usernames = sorted(set(username for username in usernames if username))
+        if not usernames:
+            return {}
+
+        stmt = pg_insert(InstagramAccount).values([{"username": username} for username in usernames])
+        self.db.execute(stmt.on_conflict_do_nothing(index_elements=["username"]))
+
+        rows = self.db.query(InstagramAccount.username, InstagramAccount.id).filter(
+            InstagramAccount.username.in_(usernames)
+        ).all()
+        return dict(rows)
+
+    def upsert_posts(self, posts: List[Dict]) -> int:
+        """批量写入帖子，post_id已存在时刷新互动数据；返回写入的帖子数
+
+        posts中的每项需包含owner_username，账户ID由ensure_accounts解析。
+        """
+        if not posts:
+            return 0
+
+        # 同一批内按post_id去重（同一帖子可能出现在多个hashtag下），ON CONFLICT不允许同一行更新两次
+        unique_posts = {post["post_id"]: post for post in posts}
+        account_ids = self.ensure_accounts(post["owner_username"] for post in unique_posts.values())
+
+        rows = []
+        for post in unique_posts.values():
+            account_id = account_ids.get(post["owner_username"])
+            if account_id is None:
+                continue
+            row = {key: value for key, value in post.items() if key != "owner_username"}
+            row["account_id"] = account_id
+            rows.append(row)
+
+        if not rows:
+            return 0
+
+        # 已入库且内容变化的帖子：按旧内容撤销关键词文档频率和近似重复签名，下面按新内容重新计入
+        previous = self.db.query(
+            InstagramPost.id,
+            InstagramPost.account_id,
+            InstagramPost.posted_at,
+            InstagramPost.tokens,
+            InstagramPost.post_id,
+            InstagramPost.content_hash
+        ).filter(InstagramPost.post_id.in_([row["post_id"] for row in rows])).all()
+        hashes = {row["post_id"]: row.get("content_hash") for row in rows}
+        self.forget_content([
+            tuple(row[:4]) for row in previous
+            if row.content_hash is not None and row.content_hash != hashes.get(row.post_id)
+        ])
+
+        stmt = pg_insert(InstagramPost).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["post_id"],
+            set_={column: stmt.excluded[column] for column in POST_REFRESH_COLUMNS} | {"updated_at": func.now()}
+        )
+        written = self.db.execute(stmt.returning(
+            InstagramPost.id,
+            InstagramPost.account_id,
+            InstagramPost.posted_at,
+            InstagramPost.caption_hashtags
+        )).all()
+
+        # 同一事务内填充标签倒排索引，新增的标签关联计入流式热门统计
+        new_links = HashtagIndex(self.db).index_rows([tuple(row) for row in written])
+        TrendingEngine(self.db).observe(new_links)
+        # 新帖子计入关键词文档频率（已计入的帖子不重复计数）
+        post_ids = [row[0] for row in written]
+        KeywordEngine(self.db).index_posts(post_ids)
+        # 新帖子归入近似重复簇，分析时复用同簇结果
+        NearDuplicateIndex(self.db).index_posts(post_ids)
+        # 刷新了互动数据的帖子重算互动率（账户已有粉丝数时）
+        EngagementRateService(self.db).recompute(post_ids=post_ids)
+
+        metrics.SCRAPED_ITEMS.labels(kind="post").inc(len(rows))
+        return len(rows)
+
+    def forget_content(self, documents: List[tuple]):
+        """标题等分析输入变化的帖子：撤销按旧内容建立的关键词文档频率和近似重复签名
+
+        documents: 旧的 (帖子ID, 账户ID, 发布时间, tokens) 元组；之后的index_posts会按新内容重新建立。
+        """
+        if not documents:
+            return
+        KeywordEngine(self.db).forget(documents)
+        NearDuplicateIndex(self.db).forget([document[0] for document in documents])
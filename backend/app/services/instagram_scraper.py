@@ -1,31 +1,115 @@
 import instaloader
-import requests
 import time
 import logging
-from typing import List, Optional, Dict
-from datetime import datetime, timedelta
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Iterator, NamedTuple
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 import re
 from urllib.parse import urlparse
 
-from app.models.instagram import InstagramAccount, InstagramPost, InstagramComment
+from app import config, metrics
+from app.models.instagram import InstagramAccount, InstagramPost, InstagramComment, HashtagCursor
+from app.services.ingestion import IngestionService
+from app.services.hashtag_index import HashtagIndex
+from app.services.trending import TrendingEngine
+from app.services.keyword_engine import KeywordEngine
+from app.services.near_duplicates import NearDuplicateIndex
+from app.services.text_normalization import prepare_text
+from app.services.content_hash import content_hash
+from app.services.engagement import EngagementRateService
+from app.services.scrape_scheduler import ScrapeScheduler
+from app.services.session_pool import SessionPool
+from app.services import raw_archive
+from app.services.raw_archive import RawArchive
 
 logger = logging.getLogger(__name__)
 
+class TokenBucket:
+    """线程安全的令牌桶，限制所有抓取线程合计的请求速率"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """取一个令牌，不足时等待"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            metrics.sleep(wait, "token_bucket")
+
+# 进程内所有Instaloader实例共享的请求速率上限
+request_bucket = TokenBucket(config.SCRAPER_REQUESTS_PER_SECOND, config.SCRAPER_BURST)
+
+class MetricsRateController(instaloader.RateController):
+    """记录请求数、429和限流等待时间的RateController，并受共享令牌桶限制"""
+    
+    def wait_before_query(self, query_type: str) -> None:
+        metrics.SCRAPER_REQUESTS.labels(query_type=query_type).inc()
+        request_bucket.acquire()
+        super().wait_before_query(query_type)
+    
+    def handle_429(self, query_type: str) -> None:
+        metrics.SCRAPER_RATE_LIMITED.labels(query_type=query_type).inc()
+        # 该上下文冷却，新的租用轮换到其他会话
+        session_pool.throttled(self._context)
+        super().handle_429(query_type)
+    
+    def sleep(self, secs: float):
+        metrics.SCRAPER_SLEEP_SECONDS.labels(reason="rate_controller").inc(secs)
+        super().sleep(secs)
+
+class OfflineArchiveError(instaloader.InstaloaderException):
+    """从归档重新解析时需要访问网络（归档的节点缺少所需字段）"""
+
+class OfflineRateController(instaloader.RateController):
+    """重新解析归档用：任何请求在发出前直接报错"""
+    
+    def wait_before_query(self, query_type: str) -> None:
+        raise OfflineArchiveError(f"重新解析归档时不访问网络（{query_type}）")
+
+class HashtagPost(NamedTuple):
+    """hashtag发现流水线产出的一条帖子，cursor为产出该帖子后的迭代器状态"""
+    hashtag: str
+    post: Dict
+    cursor: Dict
+
+def create_loader() -> instaloader.Instaloader:
+    """创建Instaloader实例；多个实例通过MetricsRateController共享请求速率上限"""
+    return instaloader.Instaloader(
+        download_pictures=False,
+        download_videos=False,
+        download_video_thumbnails=False,
+        download_geotags=False,
+        download_comments=True,
+        save_metadata=True,
+        compress_json=False,
+        post_metadata_txt_pattern='',
+        rate_controller=lambda context: MetricsRateController(context)
+    )
+
+# 进程内共享的已登录Instaloader上下文，抓取任务之间复用
+session_pool = SessionPool(create_loader)
+
 class InstagramScraperService:
     def __init__(self, db: Session):
         self.db = db
-        self.loader = instaloader.Instaloader(
-            download_pictures=False,
-            download_videos=False,
-            download_video_thumbnails=False,
-            download_geotags=False,
-            download_comments=True,
-            save_metadata=True,
-            compress_json=False,
-            post_metadata_txt_pattern=''
-        )
-        self.session = requests.Session()
+        # 原始响应归档（RAW_ARCHIVE_ENABLED），用于不重新抓取地重新解析
+        self.archive = RawArchive() if raw_archive.ENABLED else None
         
         # 目标竞争对手列表
         self.target_competitors = [
@@ -47,9 +131,9 @@ class InstagramScraperService:
         ]
     
     def login(self, username: str, password: str) -> bool:
-        """登录Instagram账户"""
+        """登录Instagram账户，会话文件保存后加入会话池"""
         try:
-            self.loader.login(username, password)
+            session_pool.login(username, password)
             logger.info(f"成功登录Instagram账户: {username}")
             return True
         except Exception as e:
@@ -67,7 +151,7 @@ class InstagramScraperService:
                 results.append(account_data)
                 
                 # 添加延迟避免被限制
-                time.sleep(5)
+                metrics.sleep(5, "between_accounts")
                 
             except Exception as e:
                 logger.error(f"抓取账户 {username} 失败: {e}")
@@ -78,45 +162,53 @@ class InstagramScraperService:
     def scrape_account(self, username: str, max_posts: int = 50, include_comments: bool = True) -> Dict:
         """抓取单个账户的数据"""
         try:
-            # 获取账户信息
-            profile = instaloader.Profile.from_username(self.loader.context, username)
-            
-            # 保存或更新账户信息
-            account = self.save_account_info(profile)
-            
-            # 获取帖子
-            posts_data = []
-            posts_count = 0
-            
-            for post in profile.get_posts():
-                if posts_count >= max_posts:
-                    break
+            # 租用会话池中的上下文，账户、帖子和评论都通过同一上下文获取
+            with session_pool.lease() as loader:
+                # 获取账户信息
+                profile = instaloader.Profile.from_username(loader.context, username)
+                if self.archive:
+                    self.archive.write("profile", profile.username, instaloader.get_json_structure(profile))
                 
-                try:
-                    # 保存帖子信息
-                    post_data = self.save_post_info(post, account.id)
-                    
-                    # 如果需要，获取评论
-                    if include_comments:
-                        comments = self.scrape_post_comments(post, post_data.id)
-                        post_data.comments_count = len(comments)
-                    
-                    # 计算互动率
-                    engagement_rate = self.calculate_engagement_rate(post_data, account)
-                    post_data.engagement_rate = engagement_rate
-                    
-                    posts_data.append(post_data)
-                    posts_count += 1
-                    
-                    # 添加延迟
-                    time.sleep(2)
+                # 保存或更新账户信息
+                account = self.save_account_info(profile)
+                
+                # 获取帖子
+                posts_data = []
+                posts_count = 0
+                
+                for post in profile.get_posts():
+                    if posts_count >= max_posts:
+                        break
                     
-                except Exception as e:
-                    logger.error(f"处理帖子失败: {e}")
-                    continue
-            
-            # 提交数据库更改
+                    try:
+                        # 保存帖子信息
+                        post_data = self.save_post_info(post, account.id)
+                        
+                        # 如果需要，获取评论
+                        if include_comments:
+                            comments = self.scrape_post_comments(post, post_data.id)
+                            post_data.comments_count = len(comments)
+                        
+                        # 解析时惰性加载的字段已合并进节点，归档后可离线重新解析
+                        if self.archive:
+                            self.archive.write("post", profile.username, instaloader.get_json_structure(post))
+                        
+                        posts_data.append(post_data)
+                        posts_count += 1
+                        
+                        # 添加延迟
+                        metrics.sleep(2, "between_posts")
+                        
+                    except Exception as e:
+                        logger.error(f"处理帖子失败: {e}")
+                        continue
+                
+            # 填充标签倒排索引等并提交数据库更改
+            self.index_saved_posts(account.id, posts_data)
+            # 记录本次抓取，按账户的发帖频率安排下次检查
+            ScrapeScheduler(self.db).observe(account.id)
             self.db.commit()
+            metrics.SCRAPED_ITEMS.labels(kind="post").inc(posts_count)
             
             logger.info(f"成功抓取账户 {username}: {posts_count} 帖子")
             
@@ -131,8 +223,19 @@ class InstagramScraperService:
             self.db.rollback()
             raise e
     
-    def save_account_info(self, profile) -> InstagramAccount:
-        """保存账户信息到数据库"""
+    def index_saved_posts(self, account_id: int, posts: List[InstagramPost]):
+        """账户的帖子保存后：重算互动率，填充标签倒排索引、热门统计、关键词和近似重复索引（不提交）"""
+        self.db.flush()
+        # 粉丝数或互动数据已更新，按账户整体重算互动率（包括以前抓取的帖子）
+        EngagementRateService(self.db).recompute([account_id])
+        post_ids = [post.id for post in posts]
+        new_links = HashtagIndex(self.db).index_posts(post_ids)
+        TrendingEngine(self.db).observe(new_links)
+        KeywordEngine(self.db).index_posts(post_ids)
+        NearDuplicateIndex(self.db).index_posts(post_ids)
+    
+    def save_account_info(self, profile, fetched_at: Optional[datetime] = None) -> InstagramAccount:
+        """保存账户信息到数据库；fetched_at为抓取时间（重新解析归档时为归档时间）"""
         # 检查账户是否已存在
         existing_account = self.db.query(InstagramAccount).filter(
             InstagramAccount.username == profile.username
@@ -165,6 +268,10 @@ class InstagramScraperService:
                 external_url=profile.external_url
             )
             self.db.add(account)
+            self.db.flush()
+        
+        # 粉丝数变化时记录快照（互动率可按发布时间取最接近的粉丝数）
+        EngagementRateService(self.db).record_followers(account.id, profile.followers, fetched_at)
         
         return account
     
@@ -179,6 +286,9 @@ class InstagramScraperService:
         caption_hashtags = self.extract_hashtags(post.caption) if post.caption else []
         caption_mentions = self.extract_mentions(post.caption) if post.caption else []
         
+        # 规范化和分词只在写入时执行一次
+        normalized_text, tokens = prepare_text(post.caption)
+        
         # 判断媒体类型
         media_type = self.determine_media_type(post)
         
@@ -187,11 +297,20 @@ class InstagramScraperService:
         thumbnail_url = post.thumbnail_url if hasattr(post, 'thumbnail_url') else None
         
         if existing_post:
+            new_hash = content_hash(post.caption, media_type, caption_hashtags, post.date)
+            if existing_post.content_hash is not None and existing_post.content_hash != new_hash:
+                # 内容变化：撤销按旧内容建立的关键词和近似重复索引，保存后按新内容重新建立
+                IngestionService(self.db).forget_content([
+                    (existing_post.id, existing_post.account_id, existing_post.posted_at, existing_post.tokens)
+                ])
             # 更新现有帖子
             existing_post.caption = post.caption
             existing_post.caption_hashtags = caption_hashtags
             existing_post.caption_mentions = caption_mentions
+            existing_post.normalized_text = normalized_text
+            existing_post.tokens = tokens
             existing_post.media_type = media_type
+            existing_post.content_hash = new_hash
             existing_post.media_url = media_url
             existing_post.thumbnail_url = thumbnail_url
             existing_post.likes_count = post.likes
@@ -208,7 +327,10 @@ class InstagramScraperService:
                 caption=post.caption,
                 caption_hashtags=caption_hashtags,
                 caption_mentions=caption_mentions,
+                normalized_text=normalized_text,
+                tokens=tokens,
                 media_type=media_type,
+                content_hash=content_hash(post.caption, media_type, caption_hashtags, post.date),
                 media_url=media_url,
                 thumbnail_url=thumbnail_url,
                 likes_count=post.likes,
@@ -220,26 +342,36 @@ class InstagramScraperService:
         
         return post_obj
     
+    def comment_row(self, comment, post_db_id: int) -> Dict:
+        """把instaloader评论转换为写库的行"""
+        normalized_text, tokens = prepare_text(comment.text)
+        return {
+            "comment_id": str(comment.id),
+            "post_id": post_db_id,
+            "text": comment.text,
+            "normalized_text": normalized_text,
+            "tokens": tokens,
+            "author_username": comment.owner.username,
+            "author_full_name": comment.owner.full_name,
+            "likes_count": comment.likes_count if hasattr(comment, 'likes_count') else 0,
+            "commented_at": comment.created_at_utc,
+            "parent_comment_id": str(comment.parent_comment_id) if hasattr(comment, 'parent_comment_id') and comment.parent_comment_id else None
+        }
+    
     def scrape_post_comments(self, post, post_db_id: int) -> List[InstagramComment]:
         """抓取帖子的评论"""
         comments = []
+        nodes = []
         
         try:
             for comment in post.get_comments():
                 try:
                     # 保存评论信息
-                    comment_obj = InstagramComment(
-                        comment_id=str(comment.id),
-                        post_id=post_db_id,
-                        text=comment.text,
-                        author_username=comment.owner.username,
-                        author_full_name=comment.owner.full_name,
-                        likes_count=comment.likes_count if hasattr(comment, 'likes_count') else 0,
-                        commented_at=comment.created_at_utc,
-                        parent_comment_id=str(comment.parent_comment_id) if hasattr(comment, 'parent_comment_id') and comment.parent_comment_id else None
-                    )
+                    comment_obj = InstagramComment(**self.comment_row(comment, post_db_id))
                     self.db.add(comment_obj)
                     comments.append(comment_obj)
+                    nodes.append(comment._node)
+                    metrics.SCRAPED_ITEMS.labels(kind="comment").inc()
                     
                 except Exception as e:
                     logger.error(f"处理评论失败: {e}")
@@ -248,6 +380,9 @@ class InstagramScraperService:
         except Exception as e:
             logger.error(f"获取评论失败: {e}")
         
+        if self.archive and nodes:
+            self.archive.write("comments", post.owner_username, {"shortcode": post.shortcode, "comments": nodes})
+        
         return comments
     
     def extract_hashtags(self, text: str) -> List[str]:
@@ -279,66 +414,273 @@ class InstagramScraperService:
         else:
             return "unknown"
     
-    def calculate_engagement_rate(self, post: InstagramPost, account: InstagramAccount) -> float:
-        """计算互动率"""
-        if account.followers_count == 0:
-            return 0.0
-        
-        # 互动率 = (点赞数 + 评论数) / 粉丝数 * 100
-        engagement = (post.likes_count + post.comments_count) / account.followers_count * 100
-        return round(engagement, 4)
+    def hashtag_post_row(self, post) -> Dict:
+        """把hashtag搜索到的帖子转换为写库的行"""
+        normalized_text, tokens = prepare_text(post.caption)
+        caption_hashtags = self.extract_hashtags(post.caption) if post.caption else []
+        media_type = self.determine_media_type(post)
+        return {
+            "post_id": str(post.mediaid),
+            "shortcode": post.shortcode,
+            "caption": post.caption,
+            "caption_hashtags": caption_hashtags,
+            "caption_mentions": self.extract_mentions(post.caption) if post.caption else [],
+            "normalized_text": normalized_text,
+            "tokens": tokens,
+            "media_type": media_type,
+            "content_hash": content_hash(post.caption, media_type, caption_hashtags, post.date),
+            "media_url": post.url if hasattr(post, 'url') else None,
+            "likes_count": post.likes,
+            "comments_count": post.comments,
+            "posted_at": post.date,
+            "owner_username": post.owner_username
+        }
     
-    def search_by_hashtags(self, hashtags: List[str], max_posts_per_tag: int = 30) -> Dict:
-        """通过hashtag搜索相关帖子"""
-        results = {}
+    def load_hashtag_cursors(self, hashtags: List[str]) -> Dict[str, Optional[Dict]]:
+        """读取各hashtag上次停止时的迭代器状态"""
+        rows = self.db.query(HashtagCursor.hashtag, HashtagCursor.state).filter(
+            HashtagCursor.hashtag.in_(hashtags)
+        ).all()
+        return dict(rows)
+    
+    def save_hashtag_cursors(self, cursors: Dict[str, Optional[Dict]], seen: Dict[str, int]):
+        """保存各hashtag的迭代器状态（与帖子在同一事务中提交）"""
+        if not cursors:
+            return
+        
+        stmt = pg_insert(HashtagCursor).values([
+            {"hashtag": hashtag, "state": state, "posts_seen": seen.get(hashtag, 0), "last_run_at": func.now()}
+            for hashtag, state in cursors.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["hashtag"],
+            set_={
+                "state": stmt.excluded.state,
+                "posts_seen": HashtagCursor.posts_seen + stmt.excluded.posts_seen,
+                "last_run_at": stmt.excluded.last_run_at,
+                "updated_at": func.now()
+            }
+        )
+        self.db.execute(stmt)
+    
+    def walk_hashtag(self, hashtag: str, state: Optional[Dict], max_posts: int, out: queue.Queue, stop: threading.Event):
+        """在抓取线程中遍历一个hashtag，从上次的状态继续；帖子逐条放入队列
         
-        for hashtag in hashtags:
+        每个线程租用自己的上下文（requests会话不是线程安全的）。
+        """
+        with session_pool.lease() as loader:
+            hashtag_obj = instaloader.Hashtag.from_name(loader.context, hashtag)
+            posts = hashtag_obj.get_posts_resumable()
+            
+            if state:
+                try:
+                    posts.thaw(instaloader.FrozenNodeIterator(**state))
+                except instaloader.InvalidArgumentException as e:
+                    # 状态过期或查询参数已变化，从最新帖子重新开始
+                    logger.warning(f"hashtag #{hashtag} 的游标无法恢复，从头开始: {e}")
+            
+            count = 0
+            for post in posts:
+                if count >= max_posts or stop.is_set():
+                    return
+                row = self.hashtag_post_row(post)
+                if self.archive:
+                    self.archive.write("post", row["owner_username"], instaloader.get_json_structure(post), source="hashtag")
+                out.put(("post", HashtagPost(hashtag, row, posts.freeze()._asdict())))
+                count += 1
+            
+            # 遍历结束：清空游标，下次从最新帖子开始
+            out.put(("exhausted", hashtag))
+    
+    def iter_hashtag_posts(self, hashtags: List[str], max_posts_per_tag: int = 30,
+                           workers: Optional[int] = None) -> Iterator[HashtagPost]:
+        """并发遍历多个hashtag，帖子到达即产出；请求速率由共享令牌桶限制
+        
+        产出HashtagPost，以及 ("exhausted", hashtag) / ("error", hashtag, 错误信息) 事件。
+        """
+        workers = workers or config.HASHTAG_WORKERS
+        cursors = self.load_hashtag_cursors(hashtags)
+        out = queue.Queue(maxsize=config.INGEST_BATCH_SIZE * 2)
+        stop = threading.Event()
+        
+        def run(hashtag: str):
+            if stop.is_set():
+                out.put(("done", hashtag))
+                return
             try:
                 logger.info(f"搜索hashtag: #{hashtag}")
-                posts_data = []
-                
-                # 使用instaloader搜索hashtag
-                hashtag_obj = instaloader.Hashtag.from_name(self.loader.context, hashtag)
+                self.walk_hashtag(hashtag, cursors.get(hashtag), max_posts_per_tag, out, stop)
+            except Exception as e:
+                logger.error(f"搜索hashtag #{hashtag} 失败: {e}")
+                out.put(("error", hashtag, str(e)))
+            finally:
+                out.put(("done", hashtag))
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hashtag")
+        futures = [executor.submit(run, hashtag) for hashtag in hashtags]
+        try:
+            pending = len(hashtags)
+            while pending:
+                message = out.get()
+                if message[0] == "done":
+                    pending -= 1
+                else:
+                    yield message[1] if message[0] == "post" else message
+        finally:
+            # 调用方提前停止迭代时通知线程退出，并清空队列避免线程阻塞在put上
+            stop.set()
+            while not all(future.done() for future in futures):
+                try:
+                    out.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            executor.shutdown()
+    
+    def discover_hashtags(self, hashtags: Optional[List[str]] = None, max_posts_per_tag: int = 30,
+                          workers: Optional[int] = None, batch_size: Optional[int] = None) -> Dict:
+        """hashtag发现：并发抓取、批量写入帖子和新账户，并保存每个hashtag的游标"""
+        hashtags = hashtags or self.target_hashtags
+        batch_size = batch_size or config.INGEST_BATCH_SIZE
+        ingestion = IngestionService(self.db)
+        
+        results = {hashtag: {"total_found": 0} for hashtag in hashtags}
+        batch: List[Dict] = []
+        cursors: Dict[str, Optional[Dict]] = {}
+        seen: Dict[str, int] = {}
+        
+        def flush():
+            try:
+                ingestion.upsert_posts(batch)
+                self.save_hashtag_cursors(cursors, seen)
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"保存hashtag帖子失败: {e}")
+                self.db.rollback()
+                raise e
+            batch.clear()
+            cursors.clear()
+            seen.clear()
+        
+        for item in self.iter_hashtag_posts(hashtags, max_posts_per_tag, workers):
+            if isinstance(item, HashtagPost):
+                batch.append(item.post)
+                cursors[item.hashtag] = item.cursor
+                seen[item.hashtag] = seen.get(item.hashtag, 0) + 1
+                results[item.hashtag]["total_found"] += 1
+            elif item[0] == "exhausted":
+                cursors[item[1]] = None
+                results[item[1]]["exhausted"] = True
+            else:
+                results[item[1]]["error"] = item[2]
+            
+            if len(batch) >= batch_size:
+                flush()
+        
+        flush()
+        
+        logger.info(f"hashtag发现完成: {sum(result['total_found'] for result in results.values())} 帖子")
+        return results
+    
+    def search_by_hashtags(self, hashtags: List[str], max_posts_per_tag: int = 30) -> Dict:
+        """通过hashtag搜索相关帖子并保存到数据库"""
+        return self.discover_hashtags(hashtags, max_posts_per_tag)
+    
+    def reparse_archive(self, archive: RawArchive, accounts: Optional[List[str]] = None,
+                        since: Optional[date] = None, until: Optional[date] = None) -> Dict:
+        """从原始响应归档重新解析并写库，不访问网络
+        
+        按日期顺序逐个分区（账户+日期）处理，同一分区内每个帖子只取最后一次抓取的内容，
+        经过与抓取时相同的解析和写库路径（资料、帖子、标签/关键词/近似重复索引和互动率），每个分区提交一次。
+        """
+        loader = instaloader.Instaloader(
+            quiet=True,
+            max_connection_attempts=1,
+            rate_controller=lambda context: OfflineRateController(context)
+        )
+        context = loader.context
+        ingestion = IngestionService(self.db)
+        stats = {"partitions": 0, "profiles": 0, "posts": 0, "comments": 0, "failed": 0}
+        
+        for partition in archive.partitions(accounts, since, until):
+            # 同一分区内较晚抓取的记录覆盖较早的
+            profile_record = None
+            post_records: Dict[tuple, Dict] = {}
+            comment_records: Dict[str, Dict] = {}
+            for record in archive.read(partition):
+                if record["kind"] == "profile":
+                    profile_record = record
+                elif record["kind"] == "post":
+                    node = record["payload"]["node"]
+                    post_records[(record["source"], node.get("shortcode"))] = record
+                elif record["kind"] == "comments":
+                    comment_records[record["payload"]["shortcode"]] = record
+            
+            try:
+                account = None
+                if profile_record:
+                    profile = instaloader.load_structure(context, profile_record["payload"])
+                    account = self.save_account_info(profile, profile_record["fetched_at"])
+                    stats["profiles"] += 1
                 
-                count = 0
-                for post in hashtag_obj.get_posts():
-                    if count >= max_posts_per_tag:
-                        break
-                    
+                saved_posts = []
+                hashtag_rows = []
+                for (source, _), record in post_records.items():
                     try:
-                        # 获取帖子基本信息
-                        post_info = {
-                            "shortcode": post.shortcode,
-                            "caption": post.caption,
-                            "likes_count": post.likes,
-                            "comments_count": post.comments,
-                            "posted_at": post.date,
-                            "owner_username": post.owner_username,
-                            "hashtags": self.extract_hashtags(post.caption) if post.caption else []
-                        }
-                        posts_data.append(post_info)
-                        count += 1
-                        
-                        time.sleep(1)
-                        
-                    except Exception as e:
-                        logger.error(f"处理hashtag帖子失败: {e}")
-                        continue
-                
-                results[hashtag] = {
-                    "total_found": len(posts_data),
-                    "posts": posts_data
-                }
-                
-                # 添加延迟避免被限制
-                time.sleep(5)
+                        post = instaloader.load_structure(context, record["payload"])
+                        if source == "hashtag":
+                            hashtag_rows.append(self.hashtag_post_row(post))
+                            continue
+                        if account is None:
+                            account_id = ingestion.ensure_accounts([record["account"]])[record["account"]]
+                            account = self.db.get(InstagramAccount, account_id)
+                        saved_posts.append(self.save_post_info(post, account.id))
+                    except (instaloader.InstaloaderException, KeyError) as e:
+                        logger.warning(f"重新解析帖子失败 ({partition.account}/{partition.day}): {e}")
+                        stats["failed"] += 1
                 
+                if account is not None:
+                    self.index_saved_posts(account.id, saved_posts)
+                ingestion.upsert_posts(hashtag_rows)
+                stats["posts"] += len(saved_posts) + len(hashtag_rows)
+                stats["comments"] += self.upsert_archived_comments(context, comment_records)
+                self.db.commit()
             except Exception as e:
-                logger.error(f"搜索hashtag #{hashtag} 失败: {e}")
-                results[hashtag] = {"error": str(e)}
+                logger.error(f"重新解析分区 {partition.account}/{partition.day} 失败: {e}")
+                self.db.rollback()
+                stats["failed"] += 1
                 continue
+            
+            stats["partitions"] += 1
+            if stats["partitions"] % 100 == 0:
+                logger.info(f"归档重新解析进度: {stats}")
         
-        return results
+        return stats
+    
+    def upsert_archived_comments(self, context, comment_records: Dict[str, Dict]) -> int:
+        """归档的评论按comment_id写入，已存在的评论刷新点赞数；返回写入的评论数"""
+        if not comment_records:
+            return 0
+        post_ids = dict(self.db.query(InstagramPost.shortcode, InstagramPost.id).filter(
+            InstagramPost.shortcode.in_(list(comment_records))
+        ).all())
+        
+        rows = {}
+        for shortcode, record in comment_records.items():
+            if shortcode not in post_ids:
+                continue
+            for node in record["payload"]["comments"]:
+                comment = instaloader.PostComment(context, node, iter(()), None)
+                row = self.comment_row(comment, post_ids[shortcode])
+                rows[row["comment_id"]] = row
+        if not rows:
+            return 0
+        
+        stmt = pg_insert(InstagramComment).values(list(rows.values()))
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=["comment_id"],
+            set_={"likes_count": stmt.excluded.likes_count, "updated_at": func.now()}
+        ))
+        return len(rows)
     
     def get_trending_content(self, competitor_usernames: List[str], days_back: int = 7) -> Dict:
         """获取竞品的趋势内容"""
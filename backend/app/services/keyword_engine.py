@@ -0,0 +1,268 @@
+from sqlalchemy import update, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import List, Dict, Optional, Iterable
+from collections import Counter
+from datetime import datetime, timezone
+import logging
+
+import numpy as np
+from scipy import sparse
+
+from app import config
+from app.models.instagram import InstagramPost
+from app.models.keyword import TermDocumentFrequency, KeywordCorpusStats
+from app.services.text_normalization import words
+
+logger = logging.getLogger(__name__)
+
+# 词表列的长度上限
+MAX_TERM_LENGTH = 100
+
+
+def period_of(timestamp: Optional[datetime]) -> int:
+    """时间所在的月份序号（年*12 + 月-1），没有时间时取当前月"""
+    timestamp = timestamp or datetime.now(timezone.utc)
+    return timestamp.year * 12 + timestamp.month - 1
+
+
+class KeywordEngine:
+    """语料级BM25关键词：按账户和月份增量维护文档频率，整批帖子一次稀疏矩阵计算
+
+    同一账户反复出现的词（品牌名、固定口号）文档频率高、IDF低，不会成为关键词。
+    停用词照常计入文档频率和文档长度（各调用方统计一致），只在打分时排除。
+    文档: (帖子ID, 账户ID, 发布时间, tokens) 元组。
+    """
+
+    def __init__(self, db: Session, stop_words: Iterable[str] = (), months: Optional[int] = None):
+        self.db = db
+        self.stop_words = set(stop_words)
+        self.months = months or config.KEYWORD_DF_MONTHS
+        self.k1 = config.KEYWORD_BM25_K1
+        self.b = config.KEYWORD_BM25_B
+
+    def terms(self, tokens: Optional[List[str]]) -> List[str]:
+        """参与统计的词：去掉hashtag/mention、过短的词和纯数字"""
+        return [
+            token for token in words(tokens or [])
+            if 2 < len(token) <= MAX_TERM_LENGTH and not token.isdigit()
+        ]
+
+    def index_posts(self, post_ids: List[int]):
+        """把尚未计入的帖子计入文档频率（写入时调用，重复调用不会重复计数）
+
+        tokens为空（规范化之前写入）的帖子跳过，normalize_text回填后再计入。
+        """
+        if not post_ids:
+            return
+
+        rows = self.db.query(
+            InstagramPost.id,
+            InstagramPost.account_id,
+            InstagramPost.posted_at,
+            InstagramPost.tokens
+        ).filter(
+            InstagramPost.id.in_(post_ids),
+            InstagramPost.keywords_indexed_at.is_(None),
+            InstagramPost.tokens.isnot(None)
+        ).all()
+        self.index_rows([tuple(row) for row in rows])
+
+    def index_rows(self, documents: List[tuple]):
+        """增量更新文档频率和语料统计，并标记帖子已计入（tokens为None的文档不计入、不标记）"""
+        documents = [document for document in documents if document[3] is not None]
+        if not documents:
+            return
+
+        self.count(documents, 1)
+        self.db.execute(
+            update(InstagramPost).where(InstagramPost.id.in_([document[0] for document in documents])).values(
+                keywords_indexed_at=datetime.now(timezone.utc)
+            )
+        )
+
+    def forget(self, documents: List[tuple]):
+        """撤销帖子之前计入的文档频率（标题变化时用旧的账户、发布时间和tokens调用），并标记为未计入
+
+        之后的index_posts会按新内容重新计入。尚未计入的帖子（keywords_indexed_at为空）跳过，避免文档频率减成负数。
+        """
+        if not documents:
+            return
+        indexed = {
+            row[0] for row in self.db.query(InstagramPost.id).filter(
+                InstagramPost.id.in_([document[0] for document in documents]),
+                InstagramPost.keywords_indexed_at.isnot(None)
+            ).all()
+        }
+        documents = [document for document in documents if document[0] in indexed]
+        if not documents:
+            return
+
+        self.count(documents, -1)
+        self.db.execute(
+            delete(TermDocumentFrequency).where(TermDocumentFrequency.df <= 0)
+            .where(tuple_(TermDocumentFrequency.account_id, TermDocumentFrequency.period).in_(
+                sorted({(document[1], period_of(document[2])) for document in documents})
+            ))
+        )
+        self.db.execute(
+            update(InstagramPost).where(InstagramPost.id.in_([document[0] for document in documents])).values(
+                keywords_indexed_at=None
+            )
+        )
+
+    def count(self, documents: List[tuple], sign: int):
+        """把文档的词频按sign（1计入、-1撤销）累加到文档频率和语料统计"""
+        df = Counter()
+        stats: Dict[tuple, List[int]] = {}
+        for _, account_id, posted_at, tokens in documents:
+            key = (account_id, period_of(posted_at))
+            terms = self.terms(tokens)
+            for term in set(terms):
+                df[key + (term,)] += sign
+            entry = stats.setdefault(key, [0, 0])
+            entry[0] += sign
+            entry[1] += sign * len(terms)
+
+        if df:
+            stmt = pg_insert(TermDocumentFrequency).values([
+                {"account_id": account_id, "period": period, "term": term, "df": count}
+                for (account_id, period, term), count in sorted(df.items())
+            ])
+            self.db.execute(stmt.on_conflict_do_update(
+                index_elements=["account_id", "period", "term"],
+                set_={"df": TermDocumentFrequency.df + stmt.excluded.df}
+            ))
+
+        stmt = pg_insert(KeywordCorpusStats).values([
+            {"account_id": account_id, "period": period, "documents": documents_count, "tokens": tokens_count}
+            for (account_id, period), (documents_count, tokens_count) in sorted(stats.items())
+        ])
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=["account_id", "period"],
+            set_={
+                "documents": KeywordCorpusStats.documents + stmt.excluded.documents,
+                "tokens": KeywordCorpusStats.tokens + stmt.excluded.tokens
+            }
+        ))
+
+    def score(self, documents: List[tuple]) -> tuple[sparse.csr_matrix, List[str]]:
+        """整批计算BM25分数，返回 (文档 x 词 的稀疏分数矩阵, 词表)"""
+        vocabulary: Dict[str, int] = {}
+        indices: List[int] = []
+        indptr = [0]
+        for document in documents:
+            for term in self.terms(document[3]):
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            indptr.append(len(indices))
+
+        n_docs, n_terms = len(documents), len(vocabulary)
+        doc_lengths = np.diff(indptr).astype(np.float64)
+        tf = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr)),
+            shape=(n_docs, n_terms)
+        )
+        tf.sum_duplicates()
+        if tf.nnz == 0:
+            return tf, list(vocabulary)
+
+        # 每篇文档所属的(账户, 月份)组，组内共享IDF和平均文档长度
+        group_keys = [(document[1], period_of(document[2])) for document in documents]
+        groups = {key: index for index, key in enumerate(dict.fromkeys(group_keys))}
+        doc_groups = np.array([groups[key] for key in group_keys])
+
+        idf, avg_lengths = self.load_idf(groups, vocabulary)
+
+        # 只在非零元素上计算BM25
+        rows = np.repeat(np.arange(n_docs), np.diff(tf.indptr))
+        row_groups = doc_groups[rows]
+        term_frequency = tf.data
+        length_norm = 1 - self.b + self.b * doc_lengths[rows] / avg_lengths[row_groups]
+        tf.data = idf[row_groups, tf.indices] * term_frequency * (self.k1 + 1) / (term_frequency + self.k1 * length_norm)
+
+        stop_columns = [column for term, column in vocabulary.items() if term in self.stop_words]
+        if stop_columns:
+            tf.data[np.isin(tf.indices, stop_columns)] = 0
+            tf.eliminate_zeros()
+
+        return tf, list(vocabulary)
+
+    def load_idf(self, groups: Dict[tuple, int], vocabulary: Dict[str, int]) -> tuple[np.ndarray, np.ndarray]:
+        """读取各组最近几个月的文档频率，返回 (组 x 词 的IDF矩阵, 各组平均文档长度)"""
+        account_ids = sorted({account_id for account_id, _ in groups})
+        periods = [period for _, period in groups]
+        first_period, last_period = min(periods) - self.months + 1, max(periods)
+
+        df_rows = self.db.query(
+            TermDocumentFrequency.account_id,
+            TermDocumentFrequency.period,
+            TermDocumentFrequency.term,
+            TermDocumentFrequency.df
+        ).filter(
+            TermDocumentFrequency.account_id.in_(account_ids),
+            TermDocumentFrequency.period.between(first_period, last_period),
+            TermDocumentFrequency.term.in_(list(vocabulary))
+        ).all()
+        stats_rows = self.db.query(
+            KeywordCorpusStats.account_id,
+            KeywordCorpusStats.period,
+            KeywordCorpusStats.documents,
+            KeywordCorpusStats.tokens
+        ).filter(
+            KeywordCorpusStats.account_id.in_(account_ids),
+            KeywordCorpusStats.period.between(first_period, last_period)
+        ).all()
+
+        df = np.zeros((len(groups), len(vocabulary)), dtype=np.float64)
+        documents = np.zeros(len(groups), dtype=np.float64)
+        tokens = np.zeros(len(groups), dtype=np.float64)
+
+        if df_rows:
+            df_accounts = np.array([row[0] for row in df_rows])
+            df_periods = np.array([row[1] for row in df_rows])
+            df_terms = np.array([vocabulary[row[2]] for row in df_rows])
+            df_counts = np.array([row[3] for row in df_rows], dtype=np.float64)
+            for (account_id, period), group in groups.items():
+                mask = (df_accounts == account_id) & (df_periods > period - self.months) & (df_periods <= period)
+                np.add.at(df[group], df_terms[mask], df_counts[mask])
+
+        for account_id, period, documents_count, tokens_count in stats_rows:
+            for (group_account, group_period), group in groups.items():
+                if account_id == group_account and group_period - self.months < period <= group_period:
+                    documents[group] += documents_count
+                    tokens[group] += tokens_count
+
+        # 统计为空（文档尚未计入）时退化为单文档语料
+        documents = np.maximum(documents, 1)
+        df = np.minimum(df, documents[:, None])
+        avg_lengths = np.where(tokens > 0, tokens / documents, 1.0)
+
+        idf = np.log1p((documents[:, None] - df + 0.5) / (df + 0.5))
+        return idf, avg_lengths
+
+    def keywords_for(self, documents: List[tuple], limit: int = 10) -> List[List[str]]:
+        """每篇文档BM25分数最高的词（只读：按已有的文档频率打分，计入由写入路径负责）"""
+        scores, vocabulary = self.score(documents)
+        if scores.nnz == 0:
+            return [[] for _ in documents]
+
+        # 向量化的每行top-k：按(行, -分数)排序后取每行前limit个
+        rows = np.repeat(np.arange(scores.shape[0]), np.diff(scores.indptr))
+        order = np.lexsort((-scores.data, rows))
+        rank = np.arange(len(order)) - scores.indptr[rows[order]]
+        selected = order[rank < limit]
+
+        keywords = [[] for _ in documents]
+        for row, column in zip(rows[selected], scores.indices[selected]):
+            keywords[row].append(vocabulary[column])
+        return keywords
+
+    def top_terms(self, documents: List[tuple], limit: int = 15) -> Dict[str, float]:
+        """整批文档中BM25总分最高的词（趋势分析的热门话题，只读）"""
+        scores, vocabulary = self.score(documents)
+        if scores.nnz == 0:
+            return {}
+
+        totals = np.asarray(scores.sum(axis=0)).ravel()
+        top = np.argsort(-totals)[:limit]
+        return {vocabulary[column]: round(float(totals[column]), 4) for column in top if totals[column] > 0}
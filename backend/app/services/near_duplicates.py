@@ -0,0 +1,389 @@
+from sqlalchemy import func, insert, update, select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+from typing import List, Dict, Optional, Iterable
+from collections import defaultdict
+import logging
+import zlib
+
+import numpy as np
+
+from app import config
+from app.models.instagram import InstagramAccount, InstagramPost
+from app.models.analysis import ContentAnalysis
+from app.models.duplicate import DuplicateCluster, CaptionSignature, LshBucket
+
+logger = logging.getLogger(__name__)
+
+# 按词的3-gram分片；词数少于MIN_TOKENS的标题（纯表情、一两个词）不参与去重
+SHINGLE_SIZE = 3
+MIN_TOKENS = 5
+
+# MinHash置换 h(x) = (a*x + b) mod p，取低32位；a、b由固定种子生成，签名跨进程和重启可比较
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+PERMUTATION_SEED = 1
+# 一次计算的置换数，限制 分片数 x 置换数 的中间矩阵大小
+PERMUTATION_CHUNK = 16
+# 组合一段签名值的FNV乘数（uint64溢出即取模）
+BAND_MULTIPLIER = np.uint64(1099511628211)
+
+
+def shingle_hashes(tokens: Optional[List[str]]) -> Optional[np.ndarray]:
+    """标题tokens的分片哈希（去重后的uint64数组），过短的标题返回None"""
+    if not tokens or len(tokens) < MIN_TOKENS:
+        return None
+    shingles = {
+        " ".join(tokens[start:start + SHINGLE_SIZE]) for start in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64)
+
+
+def permutations(num_perm: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(PERMUTATION_SEED)
+    a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_signatures(shingle_sets: List[np.ndarray], num_perm: int) -> np.ndarray:
+    """整批计算MinHash签名：所有分片拼成一个数组，按文档偏移做分段最小值
+
+    shingle_sets中的数组不能为空；返回 (文档数, num_perm) 的uint32矩阵。
+    """
+    a, b = permutations(num_perm)
+    values = np.concatenate(shingle_sets)
+    offsets = np.concatenate(([0], np.cumsum([len(shingles) for shingles in shingle_sets])[:-1]))
+
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.uint32)
+    for start in range(0, num_perm, PERMUTATION_CHUNK):
+        end = min(start + PERMUTATION_CHUNK, num_perm)
+        # 分片哈希和a、b都小于2^32，a*x+b不会溢出uint64
+        hashed = (values[:, None] * a[None, start:end] + b[None, start:end]) % MERSENNE_PRIME
+        signatures[:, start:end] = np.minimum.reduceat(hashed, offsets, axis=0) & np.uint64(0xFFFFFFFF)
+    return signatures
+
+
+def band_keys(signatures: np.ndarray, bands: int) -> np.ndarray:
+    """LSH分段：每段签名值组合成一个64位桶值，返回 (文档数, bands) 的int64矩阵"""
+    rows = signatures.shape[1] // bands
+    banded = signatures[:, :bands * rows].reshape(len(signatures), bands, rows).astype(np.uint64)
+    keys = np.zeros((len(signatures), bands), dtype=np.uint64)
+    for column in range(rows):
+        keys = keys * BAND_MULTIPLIER + banded[:, :, column]
+    return keys.view(np.int64)
+
+
+def similarity(signature: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """签名相同位置的比例，即Jaccard相似度的估计"""
+    return (candidates == signature).mean(axis=1)
+
+
+class NearDuplicateIndex:
+    """近似重复标题索引：MinHash签名 + LSH分桶存在数据库中，写入时增量更新
+
+    新帖子只和同桶的候选帖子比较签名，估计相似度达到阈值即加入最相似帖子的簇，
+    分析流水线对同簇帖子复用已有的分类和情感结果。
+    """
+
+    def __init__(self, db: Session, num_perm: Optional[int] = None, bands: Optional[int] = None,
+                 threshold: Optional[float] = None):
+        self.db = db
+        self.num_perm = num_perm or config.NEAR_DUPLICATE_NUM_PERM
+        self.bands = bands or config.NEAR_DUPLICATE_BANDS
+        self.threshold = threshold or config.NEAR_DUPLICATE_THRESHOLD
+
+    def index_posts(self, post_ids: List[int]) -> Dict[int, int]:
+        """为尚无签名的帖子建立签名并归簇，返回 帖子ID -> 簇ID（只含本次归簇的帖子）"""
+        if not post_ids:
+            return {}
+
+        rows = self.db.query(InstagramPost.id, InstagramPost.tokens).outerjoin(
+            CaptionSignature, CaptionSignature.post_id == InstagramPost.id
+        ).filter(
+            InstagramPost.id.in_(post_ids),
+            CaptionSignature.post_id.is_(None)
+        ).order_by(InstagramPost.id).all()
+        return self.index_rows([tuple(row) for row in rows])
+
+    def index_rows(self, rows: List[tuple]) -> Dict[int, int]:
+        """rows: (帖子ID, tokens) 元组，按帖子ID顺序归簇（较早的帖子作为簇代表）"""
+        documents = []
+        for post_id, tokens in rows:
+            shingles = shingle_hashes(tokens)
+            if shingles is not None:
+                documents.append((post_id, shingles))
+        if not documents:
+            return {}
+
+        post_ids = [post_id for post_id, _ in documents]
+        signatures = minhash_signatures([shingles for _, shingles in documents], self.num_perm)
+        keys = band_keys(signatures, self.bands)
+
+        # 已入库的同桶候选帖子
+        buckets: Dict[tuple, List[int]] = defaultdict(list)
+        for bucket, band, post_id in self.db.query(LshBucket.bucket, LshBucket.band, LshBucket.post_id).filter(
+            LshBucket.bucket.in_(np.unique(keys).tolist())
+        ).all():
+            buckets[(band, bucket)].append(post_id)
+
+        candidate_ids = sorted({post_id for members in buckets.values() for post_id in members})
+        known_signatures: Dict[int, np.ndarray] = {}
+        clusters: Dict[int, Optional[int]] = {}
+        for post_id, cluster_id, signature in self.db.query(
+            CaptionSignature.post_id, CaptionSignature.cluster_id, CaptionSignature.signature
+        ).filter(CaptionSignature.post_id.in_(candidate_ids)).all():
+            known_signatures[post_id] = np.frombuffer(signature, dtype="<u4")
+            clusters[post_id] = cluster_id
+
+        # 逐篇归簇，本批内较早的帖子也作为候选
+        new_ids = set(post_ids)
+        linked_stored = []
+        for index, post_id in enumerate(post_ids):
+            candidates = sorted({
+                candidate for band in range(self.bands)
+                for candidate in buckets.get((band, int(keys[index, band])), [])
+            } & known_signatures.keys())
+            cluster_id = None
+            if candidates:
+                scores = similarity(signatures[index], np.stack([known_signatures[c] for c in candidates]))
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    match = candidates[best]
+                    if clusters.get(match) is None:
+                        # 匹配到的帖子成为新簇的代表
+                        clusters[match] = self.create_cluster(match)
+                        if match not in new_ids:
+                            linked_stored.append(match)
+                    cluster_id = clusters[match]
+
+            known_signatures[post_id] = signatures[index]
+            clusters[post_id] = cluster_id
+            for band in range(self.bands):
+                buckets[(band, int(keys[index, band]))].append(post_id)
+
+        stmt = pg_insert(CaptionSignature).values([
+            {
+                "post_id": post_id,
+                "cluster_id": clusters[post_id],
+                "signature": signatures[index].astype("<u4").tobytes()
+            }
+            for index, post_id in enumerate(post_ids)
+        ])
+        self.db.execute(stmt.on_conflict_do_nothing(index_elements=["post_id"]))
+        self.db.execute(pg_insert(LshBucket).on_conflict_do_nothing(), [
+            {"bucket": int(keys[index, band]), "band": band, "post_id": post_id}
+            for index, post_id in enumerate(post_ids)
+            for band in range(self.bands)
+        ])
+        if linked_stored:
+            self.db.execute(update(CaptionSignature), [
+                {"post_id": post_id, "cluster_id": clusters[post_id]} for post_id in linked_stored
+            ])
+
+        linked = {
+            post_id: clusters[post_id] for post_id in post_ids + linked_stored if clusters[post_id] is not None
+        }
+        self.refresh_clusters(set(linked.values()))
+        if linked:
+            logger.info(f"近似重复索引: {len(post_ids)} 帖子，{len(linked)} 篇归入 {len(set(linked.values()))} 个簇")
+
+        return linked
+
+    def forget(self, post_ids: List[int]):
+        """删除帖子的签名和分桶（标题变化时调用），之后的index_posts按新标题重新归簇"""
+        if not post_ids:
+            return
+
+        cluster_ids = {
+            row[0] for row in self.db.query(CaptionSignature.cluster_id).filter(
+                CaptionSignature.post_id.in_(post_ids),
+                CaptionSignature.cluster_id.isnot(None)
+            ).all()
+        }
+        self.db.execute(delete(LshBucket).where(LshBucket.post_id.in_(post_ids)))
+        self.db.execute(delete(CaptionSignature).where(CaptionSignature.post_id.in_(post_ids)))
+        self.refresh_clusters(cluster_ids)
+        if cluster_ids:
+            # 没有剩余成员的簇不在refresh_clusters的聚合结果中，单独清零
+            self.db.execute(
+                update(DuplicateCluster).where(
+                    DuplicateCluster.id.in_(sorted(cluster_ids)),
+                    ~select(CaptionSignature.post_id).where(
+                        CaptionSignature.cluster_id == DuplicateCluster.id
+                    ).exists()
+                ).values(size=0, accounts_count=0, updated_at=func.now())
+            )
+
+    def create_cluster(self, representative_post_id: int) -> int:
+        return self.db.execute(
+            insert(DuplicateCluster).values(representative_post_id=representative_post_id).returning(
+                DuplicateCluster.id
+            )
+        ).scalar()
+
+    def refresh_clusters(self, cluster_ids: Iterable[int]):
+        """按成员重新计算簇的帖子数、账户数和时间范围（一条集合UPDATE）"""
+        cluster_ids = sorted(cluster_ids)
+        if not cluster_ids:
+            return
+
+        members = select(
+            CaptionSignature.cluster_id,
+            func.count(InstagramPost.id).label("size"),
+            func.count(func.distinct(InstagramPost.account_id)).label("accounts_count"),
+            func.min(InstagramPost.posted_at).label("first_posted_at"),
+            func.max(InstagramPost.posted_at).label("last_posted_at")
+        ).join(InstagramPost, CaptionSignature.post_id == InstagramPost.id).where(
+            CaptionSignature.cluster_id.in_(cluster_ids)
+        ).group_by(CaptionSignature.cluster_id).subquery()
+
+        self.db.execute(
+            update(DuplicateCluster).where(DuplicateCluster.id == members.c.cluster_id).values(
+                size=members.c.size,
+                accounts_count=members.c.accounts_count,
+                first_posted_at=members.c.first_posted_at,
+                last_posted_at=members.c.last_posted_at,
+                updated_at=func.now()
+            )
+        )
+
+    def clusters_of(self, post_ids: List[int]) -> Dict[int, int]:
+        """帖子ID -> 簇ID（只含有近似重复的帖子）"""
+        if not post_ids:
+            return {}
+        return dict(self.db.query(CaptionSignature.post_id, CaptionSignature.cluster_id).filter(
+            CaptionSignature.post_id.in_(post_ids),
+            CaptionSignature.cluster_id.isnot(None)
+        ).all())
+
+    def unique_posts(self, posts: List[InstagramPost]) -> List[InstagramPost]:
+        """每个簇只保留第一篇帖子，用于按内容计数的统计"""
+        clusters = self.clusters_of([post.id for post in posts])
+        seen = set()
+        unique = []
+        for post in posts:
+            cluster_id = clusters.get(post.id)
+            if cluster_id is None or cluster_id not in seen:
+                unique.append(post)
+                if cluster_id is not None:
+                    seen.add(cluster_id)
+        return unique
+
+    def cluster_analyses(self, post_ids: List[int], analyzer_version: Optional[str] = None) -> Dict[int, tuple]:
+        """同簇其他帖子已有的分析结果：帖子ID -> (分类, 分类置信度, 情感分数, 情感标签, 置信度)
+
+        指定analyzer_version时只复用该版本分析器的结果。
+        """
+        if not post_ids:
+            return {}
+
+        member = aliased(CaptionSignature)
+        query = self.db.query(
+            CaptionSignature.post_id,
+            ContentAnalysis.content_category,
+            ContentAnalysis.category_confidence,
+            ContentAnalysis.sentiment_score,
+            ContentAnalysis.sentiment_label,
+            ContentAnalysis.confidence
+        ).join(member, member.cluster_id == CaptionSignature.cluster_id).join(
+            ContentAnalysis, ContentAnalysis.post_id == member.post_id
+        ).filter(
+            CaptionSignature.post_id.in_(post_ids),
+            member.post_id != CaptionSignature.post_id
+        )
+        if analyzer_version:
+            query = query.filter(ContentAnalysis.analyzer_version == analyzer_version)
+        rows = query.distinct(CaptionSignature.post_id).order_by(CaptionSignature.post_id, ContentAnalysis.id).all()
+
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def clusters(self, min_size: int = 2, account_username: Optional[str] = None,
+                 limit: int = 20, offset: int = 0) -> List[Dict]:
+        """近似重复簇，按帖子数和最近出现时间排序"""
+        query = self.db.query(
+            DuplicateCluster,
+            InstagramPost.post_id,
+            InstagramPost.shortcode,
+            InstagramPost.caption
+        ).outerjoin(InstagramPost, DuplicateCluster.representative_post_id == InstagramPost.id).filter(
+            DuplicateCluster.size >= min_size
+        )
+        if account_username:
+            members = self.db.query(CaptionSignature.cluster_id).join(
+                InstagramPost, CaptionSignature.post_id == InstagramPost.id
+            ).join(InstagramAccount, InstagramPost.account_id == InstagramAccount.id).filter(
+                InstagramAccount.username == account_username
+            )
+            query = query.filter(DuplicateCluster.id.in_(members.scalar_subquery()))
+
+        rows = query.order_by(
+            DuplicateCluster.size.desc(), DuplicateCluster.last_posted_at.desc().nullslast(), DuplicateCluster.id
+        ).offset(offset).limit(limit).all()
+
+        # 当前页簇的成员账户
+        accounts = defaultdict(list)
+        for cluster_id, username in self.db.query(CaptionSignature.cluster_id, InstagramAccount.username).join(
+            InstagramPost, CaptionSignature.post_id == InstagramPost.id
+        ).join(InstagramAccount, InstagramPost.account_id == InstagramAccount.id).filter(
+            CaptionSignature.cluster_id.in_([row[0].id for row in rows])
+        ).distinct().order_by(CaptionSignature.cluster_id, InstagramAccount.username).all():
+            accounts[cluster_id].append(username)
+
+        return [
+            {
+                "cluster_id": cluster.id,
+                "size": cluster.size,
+                "accounts": accounts.get(cluster.id, []),
+                "first_posted_at": cluster.first_posted_at,
+                "last_posted_at": cluster.last_posted_at,
+                "representative": {
+                    "post_id": post_id,
+                    "shortcode": shortcode,
+                    "caption": caption[:200] + "..." if caption and len(caption) > 200 else caption
+                }
+            }
+            for cluster, post_id, shortcode, caption in rows
+        ]
+
+    def cluster_posts(self, cluster_id: int, limit: int = 100) -> List[Dict]:
+        """簇内帖子（含与簇代表的估计相似度），按发布时间排序"""
+        cluster = self.db.get(DuplicateCluster, cluster_id)
+        if cluster is None:
+            return []
+
+        rows = self.db.query(
+            InstagramPost.id,
+            InstagramPost.post_id,
+            InstagramPost.shortcode,
+            InstagramPost.caption,
+            InstagramPost.posted_at,
+            InstagramPost.engagement_rate,
+            InstagramAccount.username,
+            CaptionSignature.signature
+        ).join(CaptionSignature, CaptionSignature.post_id == InstagramPost.id).join(
+            InstagramAccount, InstagramPost.account_id == InstagramAccount.id
+        ).filter(
+            CaptionSignature.cluster_id == cluster_id
+        ).order_by(InstagramPost.posted_at.nullslast(), InstagramPost.id).limit(limit).all()
+        if not rows:
+            return []
+
+        signatures = np.stack([np.frombuffer(row.signature, dtype="<u4") for row in rows])
+        representative = next(
+            (index for index, row in enumerate(rows) if row.id == cluster.representative_post_id), 0
+        )
+        scores = similarity(signatures[representative], signatures)
+
+        return [
+            {
+                "post_id": row.post_id,
+                "shortcode": row.shortcode,
+                "account_username": row.username,
+                "caption": row.caption[:200] + "..." if row.caption and len(row.caption) > 200 else row.caption,
+                "posted_at": row.posted_at,
+                "engagement_rate": row.engagement_rate,
+                "similarity": round(float(score), 3),
+                "is_representative": row.id == cluster.representative_post_id
+            }
+            for row, score in zip(rows, scores)
+        ]
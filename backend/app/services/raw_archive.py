@@ -0,0 +1,129 @@
+"""抓取原始响应归档
+
+RAW_ARCHIVE_ENABLED=true时抓取器把每个账户资料、帖子和帖子评论的原始JSON节点写入本地归档，
+修改字段提取逻辑后可以用 python -m app.jobs.reparse_archive 从归档重新解析入库，不必重新抓取。
+
+归档按内容寻址：文件名是记录内容的SHA-256，相同内容只写一次（重复抓取未变化的帖子不占空间）；
+目录按账户和抓取日期（UTC）分区: <RAW_ARCHIVE_DIR>/<账户>/<YYYY-MM-DD>/<sha256>.json.zst，
+文件修改时间即当天最后一次抓取到该内容的时间（重复抓到相同内容时更新），
+因此内容A→B→A的变化在重新解析时仍按最后一次抓取的顺序回放。
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime, timezone
+from itertools import groupby
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+ENABLED = config.RAW_ARCHIVE_ENABLED and zstandard is not None
+
+if config.RAW_ARCHIVE_ENABLED and zstandard is None:
+    logger.warning("RAW_ARCHIVE_ENABLED已开启但未安装zstandard，原始响应归档将被禁用")
+
+SUFFIX = ".json.zst"
+# 同一分区内按抓取时间排序，时间相同时资料在帖子之前、帖子在评论之前
+KIND_ORDER = {"profile": 0, "post": 1, "comments": 2}
+
+
+class Partition(NamedTuple):
+    account: str
+    day: date
+    path: str
+
+
+def partition_name(account: str) -> str:
+    """账户名作为目录名（Instagram用户名只含字母数字、点和下划线，其他字符替换掉以防万一）"""
+    return re.sub(r"[^\w.]", "_", account) or "_"
+
+
+class RawArchive:
+    """内容寻址、zstd压缩、按账户和日期分区的原始JSON归档"""
+
+    def __init__(self, root: Optional[str] = None, level: Optional[int] = None):
+        if zstandard is None:
+            raise RuntimeError("原始响应归档需要安装zstandard")
+        self.root = root or config.RAW_ARCHIVE_DIR
+        self.level = config.RAW_ARCHIVE_ZSTD_LEVEL if level is None else level
+        # 压缩器不能在线程间共享（hashtag抓取线程会同时写入）
+        self.local = threading.local()
+
+    def compressor(self):
+        if not hasattr(self.local, "compressor"):
+            self.local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return self.local.compressor
+
+    def write(self, kind: str, account: str, payload: Dict, source: str = "profile",
+              fetched_at: Optional[datetime] = None) -> str:
+        """写入一条记录，返回内容哈希；当天分区已有相同内容时不重复写入，只更新修改时间"""
+        record = {"kind": kind, "account": account, "source": source, "payload": payload}
+        data = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str).encode()
+        digest = hashlib.sha256(data).hexdigest()
+
+        day = (fetched_at or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+        directory = os.path.join(self.root, partition_name(account), day.isoformat())
+        path = os.path.join(directory, digest + SUFFIX)
+        if os.path.exists(path):
+            os.utime(path)
+            return digest
+
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(self.compressor().compress(data))
+        os.replace(temporary, path)
+        return digest
+
+    def partitions(self, accounts: Optional[List[str]] = None, since: Optional[date] = None,
+                   until: Optional[date] = None) -> List[Partition]:
+        """按日期（同一天按账户）排序的分区，重新解析时较新的抓取结果最后写入"""
+        if not os.path.isdir(self.root):
+            return []
+        wanted = {partition_name(account) for account in accounts} if accounts else None
+
+        result = []
+        for account_entry in os.scandir(self.root):
+            if not account_entry.is_dir() or (wanted is not None and account_entry.name not in wanted):
+                continue
+            for day_entry in os.scandir(account_entry.path):
+                try:
+                    day = date.fromisoformat(day_entry.name)
+                except ValueError:
+                    continue
+                if (since and day < since) or (until and day > until):
+                    continue
+                result.append(Partition(account_entry.name, day, day_entry.path))
+        return sorted(result, key=lambda partition: (partition.day, partition.account))
+
+    def read(self, partition: Partition) -> Iterator[Dict]:
+        """流式读取一个分区的记录（附加fetched_at），按抓取时间排序
+
+        先按文件修改时间排序，再逐个解压；只有修改时间相同的一组记录需要同时读入以按类型排序。
+        """
+        decompressor = zstandard.ZstdDecompressor()
+        entries = sorted(
+            (entry.stat().st_mtime, entry.path)
+            for entry in os.scandir(partition.path) if entry.name.endswith(SUFFIX)
+        )
+
+        for mtime, group in groupby(entries, key=lambda entry: entry[0]):
+            fetched_at = datetime.fromtimestamp(mtime, tz=timezone.utc)
+            records = []
+            for _, path in group:
+                with open(path, "rb") as f:
+                    record = json.loads(decompressor.decompress(f.read()))
+                record["fetched_at"] = fetched_at
+                records.append(record)
+            records.sort(key=lambda record: KIND_ORDER.get(record["kind"], len(KIND_ORDER)))
+            yield from records
@@ -0,0 +1,233 @@
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from typing import List, Dict, Optional, NamedTuple
+from datetime import datetime, timedelta, timezone
+import logging
+
+import numpy as np
+
+from app.models.instagram import InstagramPost, InstagramAccount
+from app.models.analysis import ContentAnalysis, EngagementModel
+
+logger = logging.getLogger(__name__)
+
+# Asia/Riyadh 固定UTC+3（无夏令时）
+RIYADH_UTC_OFFSET = timedelta(hours=3)
+
+# 媒体类型编码，0为未知类型
+MEDIA_TYPES = ("image", "video", "carousel")
+MEDIA_QUALITY_POINTS = np.array([0, 10, 12, 15])
+
+# 互动率线性模型的特征；没有拟合结果时使用默认系数，结果与原先的经验规则（predict_engagement）相同
+ENGAGEMENT_FEATURES = (
+    "intercept", "quality", "carousel", "video", "hashtags_8_12", "positive_sentiment",
+    "riyadh_evening", "riyadh_afternoon"
+)
+DEFAULT_COEFFICIENTS = {
+    "intercept": 0.02,
+    # 原规则只在帖子已有分析结果时计入质量分，而预测发生在分析结果创建之前，实际从未计入
+    "quality": 0.0,
+    "carousel": 0.01,
+    "video": 0.008,
+    "hashtags_8_12": 0.005,
+    "positive_sentiment": 0.005,
+    "riyadh_evening": 0.0,
+    "riyadh_afternoon": 0.0,
+}
+# 默认系数的预测上限（原规则限制最大预测互动率为10%）；拟合的模型只限制在[0, 1]
+DEFAULT_MAX_PREDICTION = 0.1
+# 拟合所需的最少帖子数，不足时沿用已有系数
+MIN_FIT_SAMPLES = 50
+
+
+class FeatureFrame(NamedTuple):
+    """列式帖子特征，每列一个numpy数组"""
+    caption_length: np.ndarray
+    media_type: np.ndarray
+    hashtag_count: np.ndarray
+    riyadh_hour: np.ndarray
+    sentiment_score: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "FeatureFrame":
+        """rows: (标题长度, 媒体类型, hashtag数, 发布时间, 情感分数) 元组；发布时间为空时小时为-1"""
+        media_codes = {media_type: code for code, media_type in enumerate(MEDIA_TYPES, start=1)}
+        epochs = np.array([
+            (posted_at if posted_at.tzinfo else posted_at.replace(tzinfo=timezone.utc)).timestamp()
+            if posted_at else np.nan
+            for _, _, _, posted_at, _ in rows
+        ], dtype=np.float64)
+        hours = np.floor((epochs + RIYADH_UTC_OFFSET.total_seconds()) / 3600) % 24
+
+        return cls(
+            caption_length=np.array([row[0] or 0 for row in rows], dtype=np.int64),
+            media_type=np.array([media_codes.get(row[1], 0) for row in rows], dtype=np.int8),
+            hashtag_count=np.array([row[2] or 0 for row in rows], dtype=np.int64),
+            riyadh_hour=np.where(np.isnan(hours), -1, hours).astype(np.int8),
+            sentiment_score=np.array([row[4] or 0.0 for row in rows], dtype=np.float64)
+        )
+
+    @classmethod
+    def from_posts(cls, posts: List) -> "FeatureFrame":
+        return cls.from_rows([
+            (
+                len(post.caption) if post.caption else 0,
+                post.media_type,
+                len(post.caption_hashtags) if post.caption_hashtags else 0,
+                post.posted_at,
+                getattr(post, "sentiment_score", None)
+            )
+            for post in posts
+        ])
+
+
+def quality_scores(frame: FeatureFrame) -> np.ndarray:
+    """内容质量评分（0-100），与原先逐帖规则相同"""
+    length = frame.caption_length
+    caption_points = np.select(
+        [length == 0, (length >= 100) & (length <= 500), length > 500, length >= 50], [0, 20, 15, 10], 5
+    )
+    media_points = MEDIA_QUALITY_POINTS[frame.media_type]
+
+    hashtags = frame.hashtag_count
+    hashtag_points = np.select(
+        [hashtags == 0, (hashtags >= 5) & (hashtags <= 15), hashtags > 15, hashtags >= 3], [0, 15, 10, 10], 5
+    )
+    # 多样性：hashtag超过3个
+    diversity_points = np.where(hashtags > 3, 10, 0)
+
+    # 沙特时间晚上6-10点最佳，下午12-4点次之
+    hour = frame.riyadh_hour
+    time_points = np.select([hour < 0, (hour >= 18) & (hour <= 22), (hour >= 12) & (hour <= 16)], [0, 10, 8], 5)
+
+    score = 30 + caption_points + media_points + hashtag_points + diversity_points + time_points
+    return np.minimum(score, 100).astype(np.float64)
+
+
+def engagement_features(frame: FeatureFrame, quality: np.ndarray) -> np.ndarray:
+    """互动率模型的设计矩阵，列顺序与ENGAGEMENT_FEATURES一致"""
+    hour = frame.riyadh_hour
+    return np.column_stack([
+        np.ones(len(quality)),
+        quality / 100,
+        frame.media_type == MEDIA_TYPES.index("carousel") + 1,
+        frame.media_type == MEDIA_TYPES.index("video") + 1,
+        (frame.hashtag_count >= 8) & (frame.hashtag_count <= 12),
+        frame.sentiment_score > 0.5,
+        (hour >= 18) & (hour <= 22),
+        (hour >= 12) & (hour <= 16),
+    ]).astype(np.float64)
+
+
+class BatchScorer:
+    """向量化的内容质量评分和互动率预测：一次调用为整批帖子打分，
+    互动率系数可由历史engagement_rate用最小二乘拟合并存入engagement_models"""
+
+    def __init__(self, db: Optional[Session]):
+        self.db = db
+        self._coefficients: Optional[np.ndarray] = None
+        self._fitted = False
+
+    @property
+    def coefficients(self) -> np.ndarray:
+        """最近一次拟合的系数，没有拟合结果（或无数据库）时使用默认系数"""
+        if self._coefficients is None:
+            values = DEFAULT_COEFFICIENTS
+            if self.db is not None:
+                model = self.db.query(EngagementModel.coefficients).order_by(
+                    EngagementModel.fitted_at.desc(), EngagementModel.id.desc()
+                ).first()
+                if model:
+                    values = DEFAULT_COEFFICIENTS | model[0]
+                    self._fitted = True
+            self._coefficients = np.array([values[name] for name in ENGAGEMENT_FEATURES], dtype=np.float64)
+        return self._coefficients
+
+    def score(self, frame: FeatureFrame) -> tuple[np.ndarray, np.ndarray]:
+        """返回 (内容质量分, 预测互动率)"""
+        quality = quality_scores(frame)
+        engagement = engagement_features(frame, quality) @ self.coefficients
+        return quality, np.clip(engagement, 0.0, 1.0 if self._fitted else DEFAULT_MAX_PREDICTION)
+
+    def rescore(self, chunk_size: int = 50000) -> int:
+        """按主键分块重新计算所有分析结果的质量分和预测互动率，批量回写，返回处理的行数
+
+        标题长度和hashtag数在数据库中计算，不传输标题文本。
+        """
+        processed = 0
+        last_id = 0
+        while True:
+            rows = self.db.query(
+                ContentAnalysis.id,
+                func.coalesce(func.length(InstagramPost.caption), 0),
+                InstagramPost.media_type,
+                func.coalesce(func.json_array_length(InstagramPost.caption_hashtags), 0),
+                InstagramPost.posted_at,
+                ContentAnalysis.sentiment_score
+            ).join(InstagramPost, ContentAnalysis.post_id == InstagramPost.id).filter(
+                ContentAnalysis.id > last_id
+            ).order_by(ContentAnalysis.id).limit(chunk_size).all()
+            if not rows:
+                return processed
+
+            quality, engagement = self.score(FeatureFrame.from_rows([row[1:] for row in rows]))
+            self.db.execute(update(ContentAnalysis), [
+                {
+                    "id": row[0],
+                    "content_quality_score": float(quality_score),
+                    "engagement_prediction": round(float(prediction), 6)
+                }
+                for row, quality_score, prediction in zip(rows, quality, engagement)
+            ])
+            self.db.commit()
+
+            processed += len(rows)
+            last_id = rows[-1][0]
+            logger.info(f"批量打分进度: {processed} 条分析结果")
+
+    def fit(self, since: Optional[datetime] = None) -> Dict:
+        """用历史帖子的engagement_rate拟合互动率系数并保存
+
+        只使用有粉丝数的账户的帖子；engagement_rate是百分数，换算为比例后拟合。
+        """
+        query = self.db.query(
+            func.coalesce(func.length(InstagramPost.caption), 0),
+            InstagramPost.media_type,
+            func.coalesce(func.json_array_length(InstagramPost.caption_hashtags), 0),
+            InstagramPost.posted_at,
+            InstagramPost.sentiment_score,
+            InstagramPost.engagement_rate
+        ).join(InstagramAccount, InstagramPost.account_id == InstagramAccount.id).filter(
+            InstagramAccount.followers_count > 0,
+            InstagramPost.engagement_rate.isnot(None)
+        )
+        if since:
+            query = query.filter(InstagramPost.posted_at >= since)
+        rows = query.all()
+
+        if len(rows) < MIN_FIT_SAMPLES:
+            logger.warning(f"互动率模型拟合数据不足: {len(rows)} 帖子，至少需要 {MIN_FIT_SAMPLES}")
+            return {"fitted": False, "samples": len(rows)}
+
+        frame = FeatureFrame.from_rows([row[:5] for row in rows])
+        design = engagement_features(frame, quality_scores(frame))
+        target = np.array([row[5] for row in rows], dtype=np.float64) / 100
+
+        coefficients, _, rank, _ = np.linalg.lstsq(design, target, rcond=None)
+        residual = target - design @ coefficients
+        total = ((target - target.mean()) ** 2).sum()
+        r_squared = float(1 - (residual ** 2).sum() / total) if total > 0 else 0.0
+
+        values = {name: round(float(value), 6) for name, value in zip(ENGAGEMENT_FEATURES, coefficients)}
+        self.db.add(EngagementModel(
+            coefficients=values,
+            samples=len(rows),
+            r_squared=round(r_squared, 4),
+            fitted_at=datetime.now(timezone.utc)
+        ))
+        self.db.commit()
+        self._coefficients = None
+        self._fitted = False
+
+        logger.info(f"互动率模型拟合完成: {len(rows)} 帖子，R²={r_squared:.4f}，秩 {rank}/{len(ENGAGEMENT_FEATURES)}")
+        return {"fitted": True, "samples": len(rows), "r_squared": round(r_squared, 4), "coefficients": values}
@@ -0,0 +1,355 @@
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import List, Dict, Optional, Iterable
+from datetime import datetime, timedelta, timezone
+import logging
+import math
+
+import numpy as np
+
+from app import config, metrics
+from app.models.instagram import InstagramAccount, InstagramPost
+from app.models.schedule import ScrapeSchedule
+
+logger = logging.getLogger(__name__)
+
+# 一次账户抓取的请求数（账户资料 + 第一页帖子），预算按此估算
+REQUESTS_PER_SCRAPE = 2
+# 帖子发布后在 REFRESH_WINDOW 个衰减时间常数内刷新互动数据（约95%的最终互动）
+REFRESH_WINDOW = 3
+# 观测时帖龄超过该小时数的帖子视为互动已稳定，用于估计最终互动
+MATURE_HOURS = 168
+MIN_DECAY_SAMPLES = 5
+# 衰减时间常数的候选值（小时）
+DECAY_GRID = np.geomspace(1, MATURE_HOURS, 60)
+# 每次抓取的帖子数范围
+MIN_POSTS_PER_SCRAPE = 5
+MAX_POSTS_PER_SCRAPE = 50
+
+
+def posting_rate(posted: np.ndarray, now: float, lookback_days: int) -> float:
+    """回看窗口内的发帖频率（篇/天）；posted为发布时间（epoch秒），账户历史短于窗口时按实际长度计算"""
+    window_start = now - lookback_days * 86400
+    recent = posted[(posted >= window_start) & (posted <= now)]
+    if recent.size == 0:
+        return 0.0
+    span_days = (now - max(window_start, float(recent.min()))) / 86400
+    return float(recent.size / max(span_days, 1.0))
+
+
+def decay_hours(ages: np.ndarray, interactions: np.ndarray, default: float) -> float:
+    """拟合累计互动曲线 interactions(age) = 最终互动 × (1 - exp(-age/τ)) 的时间常数τ（小时）
+
+    每篇帖子只有最后一次观测（ages为观测时的帖龄，小时）：成熟帖子互动的中位数作为最终互动，
+    在τ的候选网格上对未成熟帖子做最小二乘。数据不足时返回默认值。
+    """
+    mature = ages >= MATURE_HOURS
+    young = (ages > 0) & ~mature
+    if mature.sum() < MIN_DECAY_SAMPLES or young.sum() < MIN_DECAY_SAMPLES:
+        return default
+    plateau = float(np.median(interactions[mature]))
+    if plateau <= 0:
+        return default
+
+    observed = interactions[young] / plateau
+    predicted = 1 - np.exp(-ages[young][None, :] / DECAY_GRID[:, None])
+    loss = ((observed[None, :] - predicted) ** 2).sum(axis=1)
+    return float(DECAY_GRID[np.argmin(loss)])
+
+
+def plan_intervals(rates: np.ndarray, decays: np.ndarray, budget: float,
+                   min_hours: float, max_hours: float) -> tuple[np.ndarray, np.ndarray]:
+    """返回每个账户的 (新帖检查间隔, 互动刷新间隔)（小时）
+
+    检查间隔为平均发帖间隔（约每出现一篇新帖检查一次），限制在[min_hours, max_hours]；
+    刷新间隔为衰减时间常数。预计每天的请求数超过预算时，所有间隔按同一比例放大。
+    """
+    checks = np.clip(24 / np.maximum(rates, 1e-6), min_hours, max_hours)
+    refreshes = np.maximum(decays, min_hours)
+    # 每篇新帖在增长期内约刷新REFRESH_WINDOW次，同一账户同时增长的帖子共用一次刷新
+    refreshes_per_day = np.minimum(24 / refreshes, rates * REFRESH_WINDOW)
+    demand = REQUESTS_PER_SCRAPE * float((24 / checks).sum() + refreshes_per_day.sum())
+    factor = max(1.0, demand / budget) if budget > 0 else 1.0
+    return checks * factor, refreshes * factor
+
+
+def advance(now: float, newest_post: Optional[float], check_hours: float, refresh_hours: float,
+            decay: float) -> tuple[float, Optional[float], Optional[float]]:
+    """一次抓取后的 (下次检查, 下次刷新, 刷新截止)（epoch秒）；最新帖子过了增长期后不再刷新"""
+    refresh_until = newest_post + REFRESH_WINDOW * decay * 3600 if newest_post is not None else None
+    next_refresh = None
+    if refresh_until is not None and refresh_until > now:
+        next_refresh = min(now + refresh_hours * 3600, refresh_until)
+    return now + check_hours * 3600, next_refresh, refresh_until
+
+
+def to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp is not None else None
+
+
+class ScrapeScheduler:
+    """自适应账户抓取调度：从posted_at历史学习每个账户的发帖频率和互动衰减曲线，
+    在全局请求预算内安排新帖检查和互动数据刷新，发帖越频繁的账户检查越勤"""
+
+    def __init__(self, db: Session, budget: Optional[int] = None):
+        self.db = db
+        self.budget = config.SCHEDULER_DAILY_REQUEST_BUDGET if budget is None else budget
+
+    def enroll(self, account_ids: Iterable[int]):
+        """把账户加入调度（已加入的不变），首次学习前立即到期"""
+        rows = [{"account_id": account_id} for account_id in set(account_ids)]
+        if rows:
+            self.db.execute(pg_insert(ScrapeSchedule).values(rows).on_conflict_do_nothing())
+
+    def history(self, account_ids: List[int], since: datetime) -> Dict[int, tuple]:
+        """每个账户since之后的帖子: {账户ID: (发布时间, 观测时帖龄(小时), 点赞+评论)}，按发布时间排序"""
+        rows = self.db.query(
+            InstagramPost.account_id,
+            func.extract("epoch", InstagramPost.posted_at),
+            func.extract("epoch", func.coalesce(InstagramPost.updated_at, InstagramPost.created_at)),
+            func.coalesce(InstagramPost.likes_count, 0) + func.coalesce(InstagramPost.comments_count, 0)
+        ).filter(
+            InstagramPost.account_id.in_(account_ids),
+            InstagramPost.posted_at >= since
+        ).order_by(InstagramPost.account_id, InstagramPost.posted_at).all()
+        if not rows:
+            return {}
+
+        accounts = np.array([row[0] for row in rows], dtype=np.int64)
+        values = np.array([row[1:] for row in rows], dtype=np.float64)
+        ids, starts = np.unique(accounts, return_index=True)
+        result = {}
+        for account_id, chunk in zip(ids.tolist(), np.split(values, starts[1:])):
+            posted, observed, interactions = chunk.T
+            result[account_id] = (posted, (observed - posted) / 3600, interactions)
+        return result
+
+    def learn(self, now: Optional[datetime] = None) -> int:
+        """重新学习所有被调度账户的发帖频率和衰减曲线并在预算内分配间隔，返回账户数（不提交）"""
+        now = now or datetime.now(timezone.utc)
+        schedules = self.db.query(ScrapeSchedule).order_by(ScrapeSchedule.account_id).all()
+        if not schedules:
+            return 0
+
+        history = self.history(
+            [schedule.account_id for schedule in schedules], now - timedelta(days=config.SCHEDULER_CADENCE_DAYS)
+        )
+        empty = (np.empty(0), np.empty(0), np.empty(0))
+        rates = np.array([
+            posting_rate(history.get(s.account_id, empty)[0], now.timestamp(), config.SCHEDULER_CADENCE_DAYS)
+            for s in schedules
+        ])
+        decays = np.array([
+            decay_hours(*history.get(s.account_id, empty)[1:], config.SCHEDULER_DEFAULT_DECAY_HOURS)
+            for s in schedules
+        ])
+        checks, refreshes = plan_intervals(
+            rates, decays, self.budget, config.SCHEDULER_MIN_CHECK_HOURS, config.SCHEDULER_MAX_CHECK_HOURS
+        )
+
+        for schedule, rate, decay, check, refresh in zip(schedules, rates, decays, checks, refreshes):
+            schedule.posts_per_day = round(float(rate), 4)
+            schedule.decay_hours = round(float(decay), 2)
+            schedule.check_interval_hours = round(float(check), 3)
+            schedule.refresh_interval_hours = round(float(refresh), 3)
+            schedule.learned_at = now
+
+            if schedule.last_scraped_at is None:
+                schedule.next_check_at = now
+                continue
+            # 按新间隔从上次抓取时间重新排期
+            posted = history.get(schedule.account_id, empty)[0]
+            next_check, next_refresh, refresh_until = advance(
+                schedule.last_scraped_at.timestamp(), float(posted[-1]) if posted.size else None,
+                schedule.check_interval_hours, schedule.refresh_interval_hours, schedule.decay_hours
+            )
+            schedule.next_check_at = to_datetime(next_check)
+            schedule.next_refresh_at = to_datetime(next_refresh)
+            schedule.refresh_until = to_datetime(refresh_until)
+
+        requests = REQUESTS_PER_SCRAPE * float((24 / checks).sum())
+        logger.info(f"调度学习完成: {len(schedules)} 账户，预计新帖检查 {requests:.0f} 请求/天，预算 {self.budget}")
+        return len(schedules)
+
+    def observe(self, account_id: int, now: Optional[datetime] = None):
+        """记录一次账户抓取（手动或调度触发），按学习到的间隔安排下次检查和刷新（不提交）"""
+        now = now or datetime.now(timezone.utc)
+        self.enroll([account_id])
+        schedule = self.db.get(ScrapeSchedule, account_id)
+        if schedule.check_interval_hours is None:
+            self.learn(now)
+
+        newest = self.db.query(func.extract("epoch", func.max(InstagramPost.posted_at))).filter(
+            InstagramPost.account_id == account_id
+        ).scalar()
+        next_check, next_refresh, refresh_until = advance(
+            now.timestamp(), float(newest) if newest is not None else None,
+            schedule.check_interval_hours, schedule.refresh_interval_hours, schedule.decay_hours
+        )
+        schedule.last_scraped_at = now
+        schedule.next_check_at = to_datetime(next_check)
+        schedule.next_refresh_at = to_datetime(next_refresh)
+        schedule.refresh_until = to_datetime(refresh_until)
+
+    def posts_to_fetch(self, schedule: ScrapeSchedule, now: datetime) -> int:
+        """本次抓取的帖子数：上次抓取以来的预计新帖数和增长期内的帖子数，取较大者"""
+        if schedule.last_scraped_at is None or schedule.decay_hours is None:
+            return MAX_POSTS_PER_SCRAPE
+        since_hours = (now - schedule.last_scraped_at).total_seconds() / 3600
+        new_posts = schedule.posts_per_day * since_hours / 24
+        growing = schedule.posts_per_day * REFRESH_WINDOW * schedule.decay_hours / 24
+        return int(min(max(math.ceil(max(new_posts, growing)) + 1, MIN_POSTS_PER_SCRAPE), MAX_POSTS_PER_SCRAPE))
+
+    def due(self, now: Optional[datetime] = None, limit: Optional[int] = None) -> List[Dict]:
+        """到期的检查/刷新，最早到期的在前"""
+        now = now or datetime.now(timezone.utc)
+        query = self.db.query(ScrapeSchedule, InstagramAccount.username).join(
+            InstagramAccount, ScrapeSchedule.account_id == InstagramAccount.id
+        ).filter(
+            or_(ScrapeSchedule.next_check_at <= now, ScrapeSchedule.next_refresh_at <= now)
+        ).order_by(func.least(ScrapeSchedule.next_check_at, ScrapeSchedule.next_refresh_at))
+        if limit:
+            query = query.limit(limit)
+
+        return [
+            {
+                "account_id": schedule.account_id,
+                "username": username,
+                "kind": "check" if schedule.next_check_at is not None and schedule.next_check_at <= now else "refresh",
+                "max_posts": self.posts_to_fetch(schedule, now)
+            }
+            for schedule, username in query.all()
+        ]
+
+    def run_due(self, scraper, now: Optional[datetime] = None, limit: Optional[int] = None,
+                include_comments: bool = False) -> Dict:
+        """抓取到期的账户；scraper为InstagramScraperService，scrape_account内会记录本次抓取并提交"""
+        stats = {"check": 0, "refresh": 0, "failed": 0}
+        for item in self.due(now, limit):
+            try:
+                scraper.scrape_account(item["username"], item["max_posts"], include_comments)
+                stats[item["kind"]] += 1
+                metrics.SCHEDULED_SCRAPES.labels(kind=item["kind"], result="ok").inc()
+            except Exception as e:
+                logger.error(f"调度抓取账户 {item['username']} 失败: {e}")
+                # 失败的账户按正常间隔推迟，避免每次运行都重试
+                self.observe(item["account_id"])
+                self.db.commit()
+                stats["failed"] += 1
+                metrics.SCHEDULED_SCRAPES.labels(kind=item["kind"], result="failed").inc()
+            metrics.sleep(5, "between_accounts")
+        return stats
+
+    def run(self, scraper, limit: Optional[int] = None, include_comments: bool = False) -> Dict:
+        """重新学习间隔后抓取到期的账户"""
+        self.learn()
+        self.db.commit()
+        return self.run_due(scraper, limit=limit, include_comments=include_comments)
+
+    def schedules(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        rows = self.db.query(ScrapeSchedule, InstagramAccount.username).join(
+            InstagramAccount, ScrapeSchedule.account_id == InstagramAccount.id
+        ).order_by(ScrapeSchedule.next_check_at.nulls_first(), ScrapeSchedule.account_id).offset(offset).limit(limit).all()
+        return [
+            {
+                "account_id": schedule.account_id,
+                "username": username,
+                "posts_per_day": schedule.posts_per_day,
+                "decay_hours": schedule.decay_hours,
+                "check_interval_hours": schedule.check_interval_hours,
+                "refresh_interval_hours": schedule.refresh_interval_hours,
+                "next_check_at": schedule.next_check_at,
+                "next_refresh_at": schedule.next_refresh_at,
+                "last_scraped_at": schedule.last_scraped_at,
+            }
+            for schedule, username in rows
+        ]
+
+
+def simulate(history: Dict[int, np.ndarray], decays: Dict[int, float], start: float, end: float,
+             budget: float, baseline_hours: float, min_hours: float, max_hours: float, lookback_days: int) -> Dict:
+    """用历史发帖时间回放调度，与固定间隔轮询比较请求数和新鲜度
+
+    history为每个账户排序后的发布时间（epoch秒）；每天开始时按当时已发布的帖子重新学习发帖频率并分配间隔。
+    每次抓取都能看到已发布的新帖并更新增长期内帖子的互动数据。
+    """
+    accounts = sorted(history)
+    state = {account_id: (start, None) for account_id in accounts}
+    observations = {account_id: [] for account_id in accounts}
+
+    for day_start in np.arange(start, end, 86400):
+        day_end = min(day_start + 86400, end)
+        rates = np.array([posting_rate(history[a][history[a] < day_start], day_start, lookback_days) for a in accounts])
+        checks, refreshes = plan_intervals(
+            rates, np.array([decays[a] for a in accounts]), budget, min_hours, max_hours
+        )
+        for index, account_id in enumerate(accounts):
+            posted = history[account_id]
+            next_check, next_refresh = state[account_id]
+            while True:
+                now = min(next_check, next_refresh if next_refresh is not None else math.inf)
+                if now >= day_end:
+                    break
+                observations[account_id].append(now)
+                published = np.searchsorted(posted, now, side="right")
+                newest = float(posted[published - 1]) if published else None
+                next_check, next_refresh, _ = advance(
+                    now, newest, checks[index], refreshes[index], decays[account_id]
+                )
+            state[account_id] = (next_check, next_refresh)
+
+    baseline = np.arange(start, end, baseline_hours * 3600)
+    adaptive = evaluate(history, decays, {a: np.array(times) for a, times in observations.items()}, start, end)
+    fixed = evaluate(history, decays, {a: baseline for a in accounts}, start, end)
+    days = (end - start) / 86400
+    return {
+        "accounts": len(accounts),
+        "days": round(days, 1),
+        "posts": adaptive["posts"],
+        "daily_budget": budget,
+        "adaptive": adaptive | {"requests_per_day": round(adaptive["requests"] / days, 1)},
+        "fixed_interval": fixed | {"interval_hours": baseline_hours, "requests_per_day": round(fixed["requests"] / days, 1)},
+        "requests_saved": round(1 - adaptive["requests"] / fixed["requests"], 4) if fixed["requests"] else 0.0,
+    }
+
+
+def evaluate(history: Dict[int, np.ndarray], decays: Dict[int, float], observations: Dict[int, np.ndarray],
+             start: float, end: float) -> Dict:
+    """新鲜度：帖子从发布到被发现的延迟（小时），以及增长期内最后一次观测时已获得的最终互动比例"""
+    delays = []
+    captured = []
+    missed = 0
+    requests = 0
+    for account_id, posted in history.items():
+        times = observations[account_id]
+        requests += len(times) * REQUESTS_PER_SCRAPE
+        posted = posted[(posted >= start) & (posted < end)]
+        if posted.size == 0:
+            continue
+        first = np.searchsorted(times, posted, side="left")
+        found = first < len(times)
+        missed += int((~found).sum())
+        if not found.any():
+            continue
+        delays.append((times[first[found]] - posted[found]) / 3600)
+        # 互动数据只在增长期内刷新：取发布后REFRESH_WINDOW个时间常数内（且在评估结束前）的最后一次观测
+        posted = posted[found]
+        cutoff = np.minimum(posted + REFRESH_WINDOW * decays[account_id] * 3600, end)
+        last = np.searchsorted(times, cutoff, side="right") - 1
+        age = np.where(last >= first[found], times[last] - posted, 0.0)
+        captured.append(1 - np.exp(-age / 3600 / decays[account_id]))
+
+    delays = np.concatenate(delays) if delays else np.empty(0)
+    captured = np.concatenate(captured) if captured else np.empty(0)
+    return {
+        "requests": requests,
+        "posts": int(delays.size + missed),
+        "missed_posts": missed,
+        "detection_delay_hours": {
+            "mean": round(float(delays.mean()), 2) if delays.size else 0.0,
+            "p50": round(float(np.percentile(delays, 50)), 2) if delays.size else 0.0,
+            "p95": round(float(np.percentile(delays, 95)), 2) if delays.size else 0.0,
+        },
+        "engagement_captured": round(float(captured.mean()), 4) if captured.size else 0.0,
+    }
@@ -0,0 +1,232 @@
+from sqlalchemy import func, literal_column, or_, and_, cast, case, Float
+from sqlalchemy.orm import Session
+from typing import List, Optional, Dict
+from datetime import datetime
+import base64
+import json
+import re
+import logging
+
+from app import metrics
+from app.models.instagram import InstagramAccount, InstagramPost, InstagramComment
+from app.services.text_normalization import ARABIC_DIACRITICS, ARABIC_FOLD
+
+logger = logging.getLogger(__name__)
+
+_diacritics = re.compile(ARABIC_DIACRITICS)
+_fold = str.maketrans(*ARABIC_FOLD)
+
+# ts_headline参数：高亮标记和片段长度
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+# 与search_vector相同的分词配置
+SEARCH_CONFIGS = ("arabic", "english")
+
+SEARCH_TYPES = ("posts", "comments")
+SORT_ORDERS = ("rank", "recent")
+
+
+def normalize_query(text: str) -> str:
+    """与search_vector_sql相同的阿拉伯语规范化，保证查询词和索引词一致"""
+    return _diacritics.sub("", text).translate(_fold).strip()
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """解析游标为 (排序键, id)：rank排序的键为float，recent排序的键为datetime；格式不对时抛出ValueError"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("无效的分页游标")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("无效的分页游标")
+
+    last_value, last_id = values
+    # bool是int的子类，需单独排除
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError("无效的分页游标")
+    if sort == "rank":
+        if not isinstance(last_value, (int, float)) or isinstance(last_value, bool):
+            raise ValueError("无效的分页游标")
+        return float(last_value), last_id
+    if not isinstance(last_value, str):
+        raise ValueError("无效的分页游标")
+    try:
+        return datetime.fromisoformat(last_value), last_id
+    except ValueError:
+        raise ValueError("无效的分页游标")
+
+
+def normalized_text(column):
+    """与search_vector_sql相同的规范化（去变音符号、统一字母写法）的SQL表达式"""
+    return func.translate(
+        func.regexp_replace(func.coalesce(column, ""), ARABIC_DIACRITICS, "", "g"), *ARABIC_FOLD
+    )
+
+
+def mark_count(headline):
+    """高亮片段中<mark>的个数"""
+    return func.length(headline) - func.length(func.replace(headline, "<mark>", ""))
+
+
+class SearchService:
+    """基于PostgreSQL tsvector/GIN索引的帖子和评论全文检索"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def build_tsquery(self, text: str):
+        """websearch语法（引号短语、OR、-排除），分别按arabic和english配置解析后取并集"""
+        normalized = normalize_query(text)
+        return func.websearch_to_tsquery(literal_column("'arabic'::regconfig"), normalized).op("||")(
+            func.websearch_to_tsquery(literal_column("'english'::regconfig"), normalized)
+        )
+
+    @metrics.timed(metrics.ANALYSIS_DURATION, function="search")
+    def search(
+        self,
+        q: str,
+        search_type: str = "posts",
+        account_username: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        sort: str = "rank",
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict:
+        """全文检索，按相关度或时间排序，使用键集游标分页"""
+        if search_type not in SEARCH_TYPES:
+            raise ValueError(f"不支持的检索类型: {search_type}")
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"不支持的排序方式: {sort}")
+        last_key = decode_cursor(cursor, sort) if cursor else None
+
+        if search_type == "posts":
+            model, text_column, time_column = InstagramPost, InstagramPost.caption, InstagramPost.posted_at
+        else:
+            model, text_column, time_column = InstagramComment, InstagramComment.text, InstagramComment.commented_at
+
+        tsquery = self.build_tsquery(q)
+        # ts_rank_cd返回real；转为double后排序、返回和比较游标，使游标中的值精确往返（否则并列的行被跳过）
+        rank = cast(func.ts_rank_cd(model.search_vector, tsquery), Float)
+        sort_key = rank if sort == "rank" else time_column
+
+        query = self.db.query(model.id, rank.label("rank"), time_column.label("timestamp")).filter(
+            model.search_vector.op("@@")(tsquery)
+        )
+
+        # 账户和日期过滤
+        if account_username:
+            if search_type == "posts":
+                query = query.join(InstagramAccount, InstagramPost.account_id == InstagramAccount.id)
+            else:
+                query = query.join(InstagramPost, InstagramComment.post_id == InstagramPost.id).join(
+                    InstagramAccount, InstagramPost.account_id == InstagramAccount.id
+                )
+            query = query.filter(InstagramAccount.username == account_username)
+        if start_date:
+            query = query.filter(time_column >= start_date)
+        if end_date:
+            query = query.filter(time_column <= end_date)
+        if sort == "recent":
+            query = query.filter(time_column.isnot(None))
+
+        # 键集分页：(排序键, id) 严格小于上一页最后一条
+        if last_key:
+            last_value, last_id = last_key
+            query = query.filter(or_(
+                sort_key < last_value,
+                and_(sort_key == last_value, model.id < last_id)
+            ))
+
+        page = query.order_by(sort_key.desc(), model.id.desc()).limit(limit + 1).all()
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        results = self.load_results(search_type, page, text_column, tsquery)
+
+        next_cursor = None
+        if has_more:
+            last = page[-1]
+            last_value = last.rank if sort == "rank" else last.timestamp.isoformat()
+            next_cursor = encode_cursor([last_value, last.id])
+
+        return {
+            "query": q,
+            "type": search_type,
+            "sort": sort,
+            "results": results,
+            "next_cursor": next_cursor
+        }
+
+    def load_results(self, search_type: str, page: List, text_column, tsquery) -> List[Dict]:
+        """只为当前页的行生成高亮片段和展示字段"""
+        if not page:
+            return []
+
+        ids = [row.id for row in page]
+        # ts_headline只能使用一种配置：在与search_vector相同的规范化文本上分别按两种配置生成，取高亮词较多的一个
+        text = normalized_text(text_column)
+        arabic, english = (
+            func.ts_headline(literal_column(f"'{config}'::regconfig"), text, tsquery, HEADLINE_OPTIONS)
+            for config in SEARCH_CONFIGS
+        )
+        headline = case(
+            (mark_count(english) > mark_count(arabic), english), else_=arabic
+        ).label("headline")
+
+        if search_type == "posts":
+            rows = self.db.query(
+                InstagramPost.id,
+                InstagramPost.post_id,
+                InstagramPost.shortcode,
+                InstagramAccount.username,
+                InstagramPost.likes_count,
+                InstagramPost.comments_count,
+                InstagramPost.engagement_rate,
+                headline
+            ).join(InstagramAccount, InstagramPost.account_id == InstagramAccount.id).filter(
+                InstagramPost.id.in_(ids)
+            ).all()
+            details = {
+                row.id: {
+                    "post_id": row.post_id,
+                    "shortcode": row.shortcode,
+                    "account_username": row.username,
+                    "likes_count": row.likes_count,
+                    "comments_count": row.comments_count,
+                    "engagement_rate": row.engagement_rate,
+                    "headline": row.headline
+                }
+                for row in rows
+            }
+        else:
+            rows = self.db.query(
+                InstagramComment.id,
+                InstagramComment.author_username,
+                InstagramComment.likes_count,
+                InstagramComment.sentiment_label,
+                InstagramPost.shortcode,
+                InstagramAccount.username,
+                headline
+            ).join(InstagramPost, InstagramComment.post_id == InstagramPost.id).join(
+                InstagramAccount, InstagramPost.account_id == InstagramAccount.id
+            ).filter(InstagramComment.id.in_(ids)).all()
+            details = {
+                row.id: {
+                    "author_username": row.author_username,
+                    "likes_count": row.likes_count,
+                    "sentiment_label": row.sentiment_label,
+                    "post_shortcode": row.shortcode,
+                    "account_username": row.username,
+                    "headline": row.headline
+                }
+                for row in rows
+            }
+
+        return [
+            {"id": row.id, "rank": round(row.rank, 6), "timestamp": row.timestamp} | details.get(row.id, {})
+            for row in page
+        ]
@@ -0,0 +1,228 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from app import config, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SentimentBackend:
+    """情感分析推理后端基类：负责分词、前向计算和softmax"""
+
+    name = "base"
+
+    def __init__(self, model_name: str, batch_size: int = 32, max_length: int = 512, stride: int = 64):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        # 长文本滑动窗口之间重叠的token数
+        self.stride = stride
+
+        started = time.perf_counter()
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = self.load_model()
+        self.load_seconds = time.perf_counter() - started
+
+        id2label = self.model.config.id2label
+        self.labels = [id2label[i].lower() for i in range(len(id2label))]
+
+    @property
+    def model_id(self) -> str:
+        """模型标识（模型名 + 后端），用于缓存键等场景"""
+        return f"{self.model_name}@{self.name}"
+
+    @property
+    def cache_id(self) -> str:
+        """情感缓存使用的标识：模型标识 + 长文本窗口参数（窗口参数决定长文本的结果，改变后不能复用旧缓存）"""
+        return f"{self.model_id}#window={self.max_length}/{self.stride}"
+
+    def load_model(self):
+        raise NotImplementedError
+
+    def forward(self, encoded) -> np.ndarray:
+        """执行前向计算，返回logits"""
+        with torch.inference_mode():
+            logits = self.model(**encoded).logits
+        return logits.float().numpy()
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """批量计算各标签概率
+
+        超过max_length的文本按token切分为重叠窗口，所有文本的窗口一起分批推理，
+        再按窗口token数加权合并；不超长的文本只有一个窗口，结果与截断方式一致。
+        """
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+
+        encoded = self.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.max_length,
+            stride=self.stride,
+            return_overflowing_tokens=True
+        )
+        sample_mapping = encoded.pop("overflow_to_sample_mapping")
+        windows = [
+            {key: encoded[key][j] for key in encoded.keys()}
+            for j in range(len(sample_mapping))
+        ]
+        lengths = np.array([len(window["input_ids"]) for window in windows], dtype=np.float32)
+
+        window_probs = self.predict_windows(windows)
+
+        # 按窗口长度加权合并到原文本
+        sums = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        weights = np.zeros(len(texts), dtype=np.float32)
+        np.add.at(sums, sample_mapping, window_probs * lengths[:, None])
+        np.add.at(weights, sample_mapping, lengths)
+        return sums / weights[:, None]
+
+    def predict_proba_truncated(self, texts: List[str]) -> np.ndarray:
+        """批量计算各标签概率，超长文本直接截断（不切分窗口）"""
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        windows = [
+            {key: encoded[key][j] for key in encoded.keys()}
+            for j in range(len(texts))
+        ]
+        return self.predict_windows(windows)
+
+    def predict_windows(self, windows: List[Dict]) -> np.ndarray:
+        """对已分词的窗口分批推理，返回各窗口的softmax概率"""
+        probs = np.zeros((len(windows), len(self.labels)), dtype=np.float32)
+
+        # 按长度排序后分批，减少padding
+        order = sorted(range(len(windows)), key=lambda j: len(windows[j]["input_ids"]))
+        for start in range(0, len(order), self.batch_size):
+            batch_ids = order[start:start + self.batch_size]
+            batch = self.tokenizer.pad([windows[j] for j in batch_ids], return_tensors="pt")
+            with metrics.track(metrics.SENTIMENT_BATCH_DURATION, model_id=self.model_id):
+                logits = self.forward(batch)
+            metrics.SENTIMENT_TEXTS.labels(model_id=self.model_id).inc(len(batch_ids))
+            # softmax
+            logits = logits - logits.max(axis=1, keepdims=True)
+            exp = np.exp(logits)
+            probs[batch_ids] = exp / exp.sum(axis=1, keepdims=True)
+
+        return probs
+
+    def predict(self, texts: List[str]) -> List[tuple[str, float]]:
+        """批量预测，返回 (标签, 置信度) 列表"""
+        probs = self.predict_proba(texts)
+        best = probs.argmax(axis=1)
+        return [(self.labels[idx], float(probs[row, idx])) for row, idx in enumerate(best)]
+
+
+class PyTorchSentimentBackend(SentimentBackend):
+    """全精度PyTorch后端"""
+
+    name = "pytorch"
+
+    def load_model(self):
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        model.eval()
+        return model
+
+
+class QuantizedPyTorchSentimentBackend(PyTorchSentimentBackend):
+    """PyTorch动态int8量化后端（仅量化Linear层）"""
+
+    name = "pytorch-int8"
+
+    def load_model(self):
+        model = super().load_model()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class ONNXSentimentBackend(SentimentBackend):
+    """ONNX Runtime后端，首次使用时导出模型并缓存到磁盘"""
+
+    name = "onnx"
+
+    def export_dir(self) -> str:
+        return os.path.join(config.SENTIMENT_ONNX_DIR, self.model_name.replace("/", "__"))
+
+    def load_model(self):
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+
+        export_dir = self.export_dir()
+        if os.path.exists(os.path.join(export_dir, "model.onnx")):
+            return ORTModelForSequenceClassification.from_pretrained(export_dir)
+
+        logger.info(f"导出ONNX模型: {self.model_name} -> {export_dir}")
+        model = ORTModelForSequenceClassification.from_pretrained(self.model_name, export=True)
+        model.save_pretrained(export_dir)
+        self.tokenizer.save_pretrained(export_dir)
+        return model
+
+    def forward(self, encoded) -> np.ndarray:
+        logits = self.model(**encoded).logits
+        if isinstance(logits, torch.Tensor):
+            logits = logits.float().numpy()
+        return np.asarray(logits, dtype=np.float32)
+
+
+class QuantizedONNXSentimentBackend(ONNXSentimentBackend):
+    """ONNX Runtime动态int8量化后端"""
+
+    name = "onnx-int8"
+
+    def load_model(self):
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        export_dir = self.export_dir()
+        quantized_dir = export_dir + "-int8"
+        if not os.path.exists(os.path.join(quantized_dir, "model_quantized.onnx")):
+            onnx_model = super().load_model()
+            logger.info(f"量化ONNX模型: {export_dir} -> {quantized_dir}")
+            quantizer = ORTQuantizer.from_pretrained(onnx_model)
+            qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=quantized_dir, quantization_config=qconfig)
+
+        return ORTModelForSequenceClassification.from_pretrained(
+            quantized_dir, file_name="model_quantized.onnx"
+        )
+
+
+SENTIMENT_BACKENDS = {
+    PyTorchSentimentBackend.name: PyTorchSentimentBackend,
+    QuantizedPyTorchSentimentBackend.name: QuantizedPyTorchSentimentBackend,
+    ONNXSentimentBackend.name: ONNXSentimentBackend,
+    QuantizedONNXSentimentBackend.name: QuantizedONNXSentimentBackend,
+}
+
+# 进程级缓存，避免每次创建AnalysisService时重复加载模型
+_backends: Dict[tuple, SentimentBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def create_sentiment_backend(backend: str, model_name: str, batch_size: int = 32) -> SentimentBackend:
+    """按名称创建推理后端（不缓存）"""
+    if backend not in SENTIMENT_BACKENDS:
+        raise ValueError(f"未知的情感分析后端: {backend}，可选: {', '.join(SENTIMENT_BACKENDS)}")
+    return SENTIMENT_BACKENDS[backend](model_name, batch_size=batch_size, stride=config.SENTIMENT_WINDOW_STRIDE)
+
+
+def get_sentiment_backend(backend: Optional[str] = None, model_name: Optional[str] = None) -> SentimentBackend:
+    """获取（并缓存）配置的推理后端"""
+    backend = backend or config.SENTIMENT_BACKEND
+    model_name = model_name or config.SENTIMENT_MODEL
+    key = (backend, model_name)
+
+    with _backends_lock:
+        if key not in _backends:
+            instance = create_sentiment_backend(backend, model_name, config.SENTIMENT_BATCH_SIZE)
+            logger.info(f"情感分析后端加载成功: {instance.model_id}，耗时 {instance.load_seconds:.1f}s")
+            metrics.MODEL_LOAD_SECONDS.labels(model_id=instance.model_id).set(instance.load_seconds)
+            _backends[key] = instance
+        return _backends[key]
@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app import config, metrics
+from app.models.cache import SentimentCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_whitespace_re = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """缓存键使用的文本规范化：NFKC、合并空白
+
+    不转小写：模型区分大小写（"GREAT" 与 "great" 的结果可能不同），小写会让不同输入共用一条缓存。
+    """
+    text = unicodedata.normalize("NFKC", text)
+    return _whitespace_re.sub(" ", text).strip()
+
+
+def cache_key(text: str, model_id: str) -> str:
+    """内容寻址的缓存键: sha256(模型标识 + 版本 + 规范化文本)"""
+    payload = f"{model_id}\x00{config.SENTIMENT_CACHE_VERSION}\x00{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """线程安全的进程内LRU缓存"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheStats:
+    """缓存命中统计"""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, memory_hits: int = 0, db_hits: int = 0, misses: int = 0):
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.db_hits += db_hits
+            self.misses += misses
+        metrics.CACHE_LOOKUPS.labels(cache="sentiment", result="memory_hit").inc(memory_hits)
+        metrics.CACHE_LOOKUPS.labels(cache="sentiment", result="db_hit").inc(db_hits)
+        metrics.CACHE_LOOKUPS.labels(cache="sentiment", result="miss").inc(misses)
+
+    def as_dict(self) -> Dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "lookups": lookups,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(_memory_cache),
+        }
+
+
+# 进程级共享：帖子分析和评论分析共用同一份缓存
+_memory_cache = LRUCache(config.SENTIMENT_CACHE_SIZE)
+_stats = CacheStats()
+
+
+class SentimentCache:
+    """情感分析结果缓存：进程内LRU + 数据库表(sentiment_cache)"""
+
+    def __init__(self, db: Optional[Session], model_id: str):
+        self.db = db
+        self.model_id = model_id
+
+    def keys_for(self, texts: List[str]) -> List[str]:
+        return [cache_key(text, self.model_id) for text in texts]
+
+    def get_many(self, keys: List[str]) -> Dict[str, tuple[str, float]]:
+        """批量查找，返回命中的 {缓存键: (标签, 置信度)}
+
+        命中统计按每次出现计：同一批次中重复的文本各计一次查找。
+        """
+        found = {}
+        remaining = []
+        for key in set(keys):
+            value = _memory_cache.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                remaining.append(key)
+
+        in_memory = set(found)
+        if remaining and self.db is not None:
+            rows = self.db.query(
+                SentimentCacheEntry.cache_key,
+                SentimentCacheEntry.label,
+                SentimentCacheEntry.confidence
+            ).filter(SentimentCacheEntry.cache_key.in_(remaining)).all()
+
+            for key, label, confidence in rows:
+                found[key] = (label, confidence)
+                _memory_cache.put(key, (label, confidence))
+
+        memory_hits = sum(1 for key in keys if key in in_memory)
+        db_hits = sum(1 for key in keys if key in found) - memory_hits
+        _stats.record(memory_hits=memory_hits, db_hits=db_hits, misses=len(keys) - memory_hits - db_hits)
+        return found
+
+    def put_many(self, entries: Dict[str, tuple[str, float]]):
+        """批量写入缓存（数据库写入由调用方提交）"""
+        if not entries:
+            return
+
+        for key, value in entries.items():
+            _memory_cache.put(key, value)
+
+        if self.db is None:
+            return
+
+        try:
+            # 使用savepoint，写缓存失败不影响调用方的事务
+            with self.db.begin_nested():
+                stmt = pg_insert(SentimentCacheEntry).values([
+                    {"cache_key": key, "model_id": self.model_id, "label": label, "confidence": confidence}
+                    for key, (label, confidence) in entries.items()
+                ]).on_conflict_do_nothing(index_elements=["cache_key"])
+                self.db.execute(stmt)
+        except Exception as e:
+            logger.error(f"写入情感分析缓存失败: {e}")
+
+
+def get_cache_stats() -> Dict:
+    """当前进程的缓存命中统计"""
+    return _stats.as_dict()
@@ -0,0 +1,226 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import instaloader
+
+from app import config, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PooledLoader:
+    """池中的一个Instaloader上下文；username为空表示未登录"""
+
+    def __init__(self, loader: instaloader.Instaloader, username: Optional[str]):
+        self.loader = loader
+        self.username = username
+        self.in_use = False
+        self.last_used = 0.0
+        self.checked_at = time.monotonic()
+        # 被限流（429）后在该时间之前不再租出
+        self.cooldown_until = 0.0
+
+
+class SessionPool:
+    """进程内共享的Instaloader上下文池
+
+    首次租用时从会话文件加载已登录的会话（没有会话文件的账户用配置的密码登录一次并保存），
+    上下文在抓取任务之间复用，各自的requests会话保持keep-alive连接。每个上下文同一时间只租给一个线程；
+    超过健康检查间隔的已登录上下文在租出前验证登录状态，被限流的上下文冷却一段时间，期间轮换到其他上下文。
+    """
+
+    def __init__(self, factory: Callable[[], instaloader.Instaloader], session_dir: Optional[str] = None,
+                 usernames: Optional[List[str]] = None, size: Optional[int] = None):
+        self.factory = factory
+        self.session_dir = session_dir or config.INSTAGRAM_SESSION_DIR
+        self.usernames = list(config.INSTAGRAM_SESSION_USERNAMES if usernames is None else usernames)
+        self.size = size or config.SESSION_POOL_SIZE
+        self.entries: List[PooledLoader] = []
+        self.by_context: Dict[int, PooledLoader] = {}
+        self.condition = threading.Condition()
+        self.save_lock = threading.Lock()
+        self.opened = False
+
+    def session_file(self, username: str) -> str:
+        return os.path.join(self.session_dir, f"session-{username}")
+
+    def add(self, loader: instaloader.Instaloader, username: Optional[str]) -> PooledLoader:
+        entry = PooledLoader(loader, username)
+        self.entries.append(entry)
+        self.by_context[id(loader.context)] = entry
+        return entry
+
+    def replace(self, entry: PooledLoader, loader: instaloader.Instaloader, username: Optional[str]):
+        self.by_context.pop(id(entry.loader.context), None)
+        entry.loader = loader
+        entry.username = username
+        self.by_context[id(loader.context)] = entry
+
+    def restore(self, username: str) -> Optional[instaloader.Instaloader]:
+        """从会话文件加载；没有文件时用配置的账户密码登录并保存。失败返回None"""
+        loader = self.factory()
+        try:
+            loader.load_session_from_file(username, self.session_file(username))
+            return loader
+        except FileNotFoundError:
+            pass
+
+        if username != config.INSTAGRAM_USERNAME or not config.INSTAGRAM_PASSWORD:
+            logger.warning(f"Instagram账户 {username} 没有会话文件，跳过")
+            return None
+        try:
+            loader.login(username, config.INSTAGRAM_PASSWORD)
+        except instaloader.InstaloaderException as e:
+            logger.error(f"Instagram账户 {username} 登录失败: {e}")
+            return None
+        self.save(loader)
+        return loader
+
+    def save(self, loader: instaloader.Instaloader):
+        """保存会话文件（先写临时文件再替换，避免并发读到不完整的文件）"""
+        username = loader.context.username
+        if not username:
+            return
+        path = self.session_file(username)
+        with self.save_lock:
+            os.makedirs(self.session_dir, exist_ok=True)
+            loader.save_session_to_file(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+
+    def open(self):
+        """建立上下文：每个可用账户至少一个，不足size时按账户轮流复制登录状态（无账户时为匿名上下文）"""
+        sessions = {}
+        for username in self.usernames:
+            loader = self.restore(username)
+            if loader is not None:
+                sessions[username] = loader
+                self.add(loader, username)
+
+        usernames = list(sessions)
+        for index in range(len(self.entries), self.size):
+            loader = self.factory()
+            username = usernames[index % len(usernames)] if usernames else None
+            if username:
+                loader.load_session(username, sessions[username].save_session())
+            self.add(loader, username)
+
+        self.opened = True
+        logger.info(f"Instagram会话池: {len(self.entries)} 个上下文，已登录账户 {usernames or '无'}")
+
+    def healthy(self, entry: PooledLoader) -> bool:
+        """验证已登录上下文的登录状态；失效时重新加载会话文件（可能已被其他进程刷新）或重新登录"""
+        entry.checked_at = time.monotonic()
+        if entry.username is None or entry.loader.test_login() == entry.username:
+            return True
+
+        logger.warning(f"Instagram账户 {entry.username} 的会话已失效，重新加载")
+        loader = self.restore(entry.username)
+        if loader is not None and loader.test_login() == entry.username:
+            with self.condition:
+                self.replace(entry, loader, entry.username)
+            return True
+
+        # 无法恢复时退回匿名上下文，避免反复使用失效的会话
+        with self.condition:
+            self.replace(entry, self.factory(), None)
+        return False
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledLoader:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            started = time.monotonic()
+            with self.condition:
+                if not self.opened:
+                    self.open()
+                while True:
+                    now = time.monotonic()
+                    idle = [entry for entry in self.entries if not entry.in_use]
+                    ready = [entry for entry in idle if entry.cooldown_until <= now]
+                    if ready:
+                        # 轮换：最久未使用的上下文优先
+                        entry = min(ready, key=lambda candidate: candidate.last_used)
+                        entry.in_use = True
+                        break
+                    if deadline is not None and now >= deadline:
+                        raise TimeoutError("没有可用的Instagram会话")
+                    # 全部在使用或冷却中：等待归还或最早的冷却结束
+                    wait = min((entry.cooldown_until - now for entry in idle), default=None)
+                    if deadline is not None:
+                        wait = min(wait, deadline - now) if wait is not None else deadline - now
+                    self.condition.wait(wait)
+            metrics.SCRAPER_SLEEP_SECONDS.labels(reason="session_pool").inc(time.monotonic() - started)
+
+            if time.monotonic() - entry.checked_at < config.SESSION_HEALTH_CHECK_SECONDS:
+                return entry
+            try:
+                self.healthy(entry)
+                return entry
+            except instaloader.InstaloaderException as e:
+                # 健康检查请求本身失败（网络或限流），冷却后换一个上下文
+                logger.warning(f"Instagram会话健康检查失败: {e}")
+                self.release(entry, cooldown=True)
+
+    def release(self, entry: PooledLoader, cooldown: bool = False):
+        if entry.username:
+            try:
+                self.save(entry.loader)
+            except OSError as e:
+                logger.warning(f"保存Instagram会话文件失败: {e}")
+        with self.condition:
+            entry.in_use = False
+            entry.last_used = time.monotonic()
+            if cooldown:
+                entry.cooldown_until = entry.last_used + config.SESSION_COOLDOWN_SECONDS
+            self.condition.notify_all()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[instaloader.Instaloader]:
+        """租用一个上下文，用完自动归还"""
+        entry = self.acquire(timeout)
+        try:
+            yield entry.loader
+        finally:
+            self.release(entry)
+
+    def throttled(self, context: instaloader.InstaloaderContext):
+        """上下文收到429：冷却期间不再租出，新的租用轮换到其他上下文"""
+        with self.condition:
+            entry = self.by_context.get(id(context))
+            if entry is None:
+                return
+            entry.cooldown_until = time.monotonic() + config.SESSION_COOLDOWN_SECONDS
+        logger.warning(f"Instagram会话 {entry.username or '匿名'} 被限流，冷却 {config.SESSION_COOLDOWN_SECONDS}s")
+
+    def login(self, username: str, password: str):
+        """登录账户并保存会话文件，加入池中；登录失败时抛出instaloader异常"""
+        loader = self.factory()
+        loader.login(username, password)
+        self.save(loader)
+        with self.condition:
+            if not self.opened:
+                self.open()
+            # 优先替换一个空闲的匿名上下文
+            anonymous = [entry for entry in self.entries if entry.username is None and not entry.in_use]
+            if anonymous:
+                self.replace(anonymous[0], loader, username)
+            else:
+                self.add(loader, username)
+            if username not in self.usernames:
+                self.usernames.append(username)
+            self.condition.notify_all()
+
+    def status(self) -> List[Dict]:
+        now = time.monotonic()
+        with self.condition:
+            return [
+                {
+                    "username": entry.username,
+                    "in_use": entry.in_use,
+                    "cooldown_seconds": round(max(entry.cooldown_until - now, 0.0), 1),
+                }
+                for entry in self.entries
+            ]
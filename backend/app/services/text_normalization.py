@@ -0,0 +1,87 @@
+"""阿拉伯语/英语文本规范化与分词
+
+写入帖子和评论时执行一次，结果存入 normalized_text / tokens 列，分类、关键词和主题提取直接使用存储的词。
+规范化：NFKC、casefold、去掉变音符号和延长符、统一alef/alef maqsura/ta marbuta写法、阿拉伯数字转为ASCII。
+分词：保留 #hashtag 和 @mention 词，去掉链接，阿拉伯语词去掉定冠词及其前置的连词/介词。
+"""
+import re
+import unicodedata
+from typing import List, Optional
+
+# 变音符号（harakat、shadda、sukun等）、上标alef和延长符tatweel
+ARABIC_DIACRITICS = r"[\u064B-\u065F\u0670\u0640]"
+# أ إ آ ٱ -> ا，ى -> ي，ة -> ه
+ARABIC_FOLD = ("\u0623\u0625\u0622\u0671\u0649\u0629", "\u0627\u0627\u0627\u0627\u064A\u0647")
+# 阿拉伯-印度数字和波斯数字 -> ASCII
+ARABIC_DIGITS = ("\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669"
+                 "\u06F0\u06F1\u06F2\u06F3\u06F4\u06F5\u06F6\u06F7\u06F8\u06F9", "0123456789" * 2)
+
+# 定冠词及其前置的连词/介词，按长度从长到短匹配
+ARABIC_PREFIXES = ("\u0648\u0627\u0644", "\u0628\u0627\u0644", "\u0643\u0627\u0644", "\u0641\u0627\u0644",
+                   "\u0644\u0644", "\u0627\u0644")
+# 去掉前缀后至少保留的字母数
+MIN_STEM_LENGTH = 3
+# 单字母附着词（و ف ب ك ل），分词时不去掉（会误伤以这些字母开头的词），只在关键词匹配时额外尝试
+ARABIC_CLITICS = "\u0648\u0641\u0628\u0643\u0644"
+
+_diacritics = re.compile(ARABIC_DIACRITICS)
+_fold = str.maketrans(ARABIC_FOLD[0] + ARABIC_DIGITS[0], ARABIC_FOLD[1] + ARABIC_DIGITS[1])
+_whitespace = re.compile(r"\s+")
+_urls = re.compile(r"https?://\S+|www\.\S+")
+_tokens = re.compile(r"#\w+|@[\w.]*\w|\w+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """规范化文本（不分词），结果存入normalized_text"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _diacritics.sub("", text).translate(_fold)
+    return _whitespace.sub(" ", text).strip()
+
+
+def strip_prefix(word: str) -> str:
+    """去掉阿拉伯语词的定冠词前缀，例如 التعليم -> تعليم、والتعلم -> تعلم"""
+    for prefix in ARABIC_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= MIN_STEM_LENGTH:
+            return word[len(prefix):]
+    return word
+
+
+def tokenize(text: Optional[str], normalized: bool = False) -> List[str]:
+    """分词；normalized为True时text已经是normalize_text的结果"""
+    if not text:
+        return []
+    if not normalized:
+        text = normalize_text(text)
+
+    tokens = []
+    for token in _tokens.findall(_urls.sub(" ", text)):
+        tokens.append(token if token[0] in "#@" else strip_prefix(token))
+    return tokens
+
+
+def prepare_text(text: Optional[str]) -> tuple[Optional[str], Optional[List[str]]]:
+    """写入时调用：返回 (normalized_text, tokens)，空文本返回 (None, [])"""
+    normalized = normalize_text(text)
+    return (normalized or None), tokenize(normalized, normalized=True)
+
+
+def match_forms(token: str) -> List[str]:
+    """关键词匹配用的词形：hashtag按下划线拆开，阿拉伯语词另加去掉单字母附着词的形式（لتعليم -> تعليم）
+
+    调用方按前缀匹配关键词，覆盖英语屈折形式（games、lessons）和阿拉伯语后缀。
+    """
+    forms = []
+    for part in token.lstrip("#@").split("_"):
+        if not part:
+            continue
+        forms.append(part)
+        if part[0] in ARABIC_CLITICS and len(part) - 1 >= MIN_STEM_LENGTH:
+            forms.append(part[1:])
+    return forms
+
+
+def words(tokens: List[str]) -> List[str]:
+    """普通词（不含hashtag和mention）"""
+    return [token for token in tokens if token[0] not in "#@"]
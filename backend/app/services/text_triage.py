@@ -0,0 +1,136 @@
+import re
+import threading
+from typing import Dict, NamedTuple, Optional
+
+# 阿拉伯字母（含补充区和表现形式区）
+ARABIC_CHARS = re.compile(r"[\u0620-\u064A\u066E-\u06D3\u06FA-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFC]")
+LATIN_CHARS = re.compile(r"[A-Za-z\u00C0-\u024F]")
+# hashtag、mention、链接：对情感没有帮助的噪声
+NOISE = re.compile(r"#[\w\u0600-\u06FF]+|@[\w.]+|https?://\S+|www\.\S+")
+WHITESPACE = re.compile(r"\s+")
+
+# 混合语言判定：少数语种字母占比超过该值视为mixed
+MIXED_RATIO = 0.2
+# 去噪后字母数少于该值的文本不送入模型
+MIN_LETTERS = 2
+
+# 常见表情的情感极性
+EMOJI_SENTIMENT = {
+    "😍": 1, "🥰": 1, "😘": 1, "❤": 1, "♥": 1, "💕": 1, "💖": 1, "💗": 1, "💙": 1, "💚": 1,
+    "💜": 1, "🧡": 1, "💛": 1, "👏": 1, "👍": 1, "🙌": 1, "🔥": 1, "💯": 1, "😊": 1, "☺": 1,
+    "😁": 1, "😀": 1, "😃": 1, "😄": 1, "😂": 1, "🤣": 1, "🤩": 1, "✨": 1, "🌹": 1, "🌸": 1,
+    "🎉": 1, "🥳": 1, "🙏": 1, "👌": 1, "💐": 1, "⭐": 1, "🌟": 1, "😻": 1,
+    "😡": -1, "😠": -1, "🤬": -1, "👎": -1, "💔": -1, "😢": -1, "😭": -1, "😞": -1, "😔": -1,
+    "😒": -1, "🙄": -1, "😤": -1, "😩": -1, "😫": -1, "🤮": -1, "🤢": -1, "😕": -1, "☹": -1,
+}
+# 表情符号所在的码位区间：杂项符号与象形文字、表情、交通地图、补充符号（含国旗的区域指示符）、
+# 杂项技术符号中的表情（⌚⏰）、杂项符号和装饰符号（☀✅❤）、⭐⭕；不含©®°、箭头、۞ 等其他So类符号
+EMOJI_RANGES = (
+    (0x1F000, 0x1FAFF), (0x231A, 0x231B), (0x23E9, 0x23FA), (0x2600, 0x27BF), (0x2B50, 0x2B55),
+)
+# 变体选择符、零宽连接符、肤色修饰符
+EMOJI_MODIFIERS = {"\ufe0f", "\ufe0e", "\u200d"} | {chr(c) for c in range(0x1F3FB, 0x1F400)}
+
+NEUTRAL = (0.0, "neutral", 0.0)
+
+
+class TriageResult(NamedTuple):
+    route: str  # empty, noise, emoji, short, model
+    language: str  # ar, en, mixed, unknown
+    text: str  # 去噪后的文本（route为model时送入模型）
+    sentiment: Optional[tuple]  # 非model路由的结果 (情感分数, 标签, 置信度)
+
+
+class TriageStats:
+    """各路由的文本计数"""
+
+    def __init__(self):
+        self.routes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str):
+        with self._lock:
+            self.routes[route] = self.routes.get(route, 0) + 1
+
+    def as_dict(self) -> Dict:
+        total = sum(self.routes.values())
+        skipped = total - self.routes.get("model", 0)
+        return {
+            "total": total,
+            "routes": dict(self.routes),
+            "skipped_ratio": skipped / total if total else 0.0,
+        }
+
+
+_stats = TriageStats()
+
+
+def detect_language(text: str) -> str:
+    """基于字符类别的语言判定：ar / en / mixed / unknown"""
+    arabic = len(ARABIC_CHARS.findall(text))
+    latin = len(LATIN_CHARS.findall(text))
+    total = arabic + latin
+    if total == 0:
+        return "unknown"
+    if min(arabic, latin) / total > MIXED_RATIO:
+        return "mixed"
+    return "ar" if arabic > latin else "en"
+
+
+def strip_noise(text: str) -> str:
+    """去掉hashtag、mention和链接"""
+    return WHITESPACE.sub(" ", NOISE.sub(" ", text)).strip()
+
+
+def is_emoji(char: str) -> bool:
+    if char in EMOJI_SENTIMENT:
+        return True
+    code = ord(char)
+    return any(low <= code <= high for low, high in EMOJI_RANGES)
+
+
+def emoji_sentiment(text: str) -> Optional[tuple]:
+    """纯表情文本的查表情感；没有表情时返回None"""
+    emojis = [c for c in text if c not in EMOJI_MODIFIERS and is_emoji(c)]
+    if not emojis:
+        return None
+
+    polarities = [EMOJI_SENTIMENT[c] for c in emojis if c in EMOJI_SENTIMENT]
+    if not polarities:
+        return NEUTRAL
+
+    polarity = sum(polarities) / len(emojis)
+    confidence = abs(polarity)
+    if polarity > 0:
+        return confidence, "positive", confidence
+    if polarity < 0:
+        return -confidence, "negative", confidence
+    return NEUTRAL
+
+
+def triage(text: Optional[str]) -> TriageResult:
+    """模型前的廉价分流：只有实质性文本才送入模型"""
+    if not text or not text.strip():
+        result = TriageResult("empty", "unknown", "", NEUTRAL)
+    else:
+        cleaned = strip_noise(text)
+        letters = len(ARABIC_CHARS.findall(cleaned)) + len(LATIN_CHARS.findall(cleaned))
+        if letters == 0:
+            sentiment = emoji_sentiment(cleaned)
+            if sentiment is not None:
+                result = TriageResult("emoji", "unknown", cleaned, sentiment)
+            else:
+                result = TriageResult("noise", "unknown", cleaned, NEUTRAL)
+        elif letters < MIN_LETTERS:
+            result = TriageResult("short", detect_language(cleaned), cleaned, NEUTRAL)
+        else:
+            result = TriageResult("model", detect_language(cleaned), cleaned, None)
+
+    _stats.record(result.route)
+    return result
+
+
+def get_triage_stats() -> Dict:
+    """当前进程的分流统计"""
+    return _stats.as_dict()
+
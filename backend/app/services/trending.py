@@ -0,0 +1,257 @@
+from sqlalchemy import func, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import List, Dict, Optional, Iterable
+from datetime import datetime, timedelta, timezone
+import heapq
+import logging
+from collections import Counter
+
+from app import config
+from app.models.hashtag import Hashtag, PostHashtag, TrendingWindow, TrendingHourCount
+from app.services.hashtag_index import HashtagIndex
+
+logger = logging.getLogger(__name__)
+
+# 滑动窗口: (窗口小时数, 每桶小时数)；每个窗口保留当前和上一个窗口的桶，用于计算上升分数
+WINDOWS = {
+    "day": (24, 1),
+    "week": (168, 6),
+    "month": (720, 24),
+}
+
+
+class SpaceSaving:
+    """Space-Saving热门项统计：最多保留capacity个计数器，内存有界
+
+    每个计数器为 [计数, 误差]，真实次数在 [计数-误差, 计数] 之间；
+    出现次数超过 总数/capacity 的项一定被保留。
+    """
+
+    def __init__(self, capacity: int, counters: Optional[Dict[str, List[int]]] = None):
+        self.capacity = capacity
+        self.counters: Dict[str, List[int]] = counters if counters is not None else {}
+
+    def add(self, item: str, count: int = 1):
+        entry = self.counters.get(item)
+        if entry is not None:
+            entry[0] += count
+            return
+
+        if len(self.counters) < self.capacity:
+            self.counters[item] = [count, 0]
+            return
+
+        # 替换计数最小的项，新项继承其计数作为误差
+        victim = min(self.counters, key=lambda key: self.counters[key][0])
+        floor = self.counters.pop(victim)[0]
+        self.counters[item] = [floor + count, floor]
+
+    def estimate(self, item: str) -> int:
+        entry = self.counters.get(item)
+        return entry[0] if entry else 0
+
+    def top(self, n: int) -> List[tuple]:
+        """计数最大的n项: [(项, 计数, 误差)]"""
+        largest = heapq.nlargest(n, self.counters.items(), key=lambda pair: pair[1][0])
+        return [(item, count, error) for item, (count, error) in largest]
+
+    @classmethod
+    def merge(cls, summaries: Iterable["SpaceSaving"], capacity: int) -> "SpaceSaving":
+        """合并多个桶的统计（计数和误差分别相加），保留计数最大的capacity项"""
+        combined: Dict[str, List[int]] = {}
+        for summary in summaries:
+            for item, (count, error) in summary.counters.items():
+                entry = combined.setdefault(item, [0, 0])
+                entry[0] += count
+                entry[1] += error
+
+        largest = heapq.nlargest(capacity, combined.items(), key=lambda pair: pair[1][0])
+        return cls(capacity, {item: counter for item, counter in largest})
+
+
+def bucket_of(timestamp: datetime, bucket_hours: int) -> int:
+    """时间所在的桶序号（按UTC整点对齐）"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() // (bucket_hours * 3600))
+
+
+class TrendingEngine:
+    """增量热门标签：写入路径只把新的标签关联按小时累加到trending_hour_counts（一条短upsert，不锁窗口行），
+    定时刷新（refresh_trending任务）把累加的计数并入各窗口的分桶Space-Saving统计并预先计算热门/上升标签快照，
+    接口按主键读取一行，与历史数据量无关"""
+
+    def __init__(self, db: Session, capacity: Optional[int] = None, top_k: Optional[int] = None):
+        self.db = db
+        self.capacity = capacity or config.TRENDING_COUNTERS
+        self.top_k = top_k or config.TRENDING_TOP_K
+
+    def load_window(self, window: str) -> TrendingWindow:
+        """读取并锁定窗口状态（仅刷新和重建使用）；窗口行不存在时先插入，并发插入不会冲突"""
+        self.db.execute(
+            pg_insert(TrendingWindow).values(window=window, buckets={}).on_conflict_do_nothing(index_elements=["window"])
+        )
+        return self.db.query(TrendingWindow).filter(TrendingWindow.window == window).with_for_update().one()
+
+    def observe(self, links: List[tuple], now: Optional[datetime] = None):
+        """把新增的 (标签ID, 发布时间) 按小时累加到待合并计数，快照在下次刷新时更新"""
+        now = now or datetime.now(timezone.utc)
+        # 超出最长窗口（及其上一个窗口）的关联不会进入任何统计
+        oldest = bucket_of(now, 1) - 2 * max(window_hours for window_hours, _ in WINDOWS.values()) + 1
+        counts = Counter(
+            (bucket_of(posted_at, 1), hashtag_id) for hashtag_id, posted_at in links
+            if posted_at is not None and bucket_of(posted_at, 1) >= oldest
+        )
+        if not counts:
+            return
+
+        # 按主键顺序写入，并发的写入批次按相同顺序加行锁，避免死锁
+        stmt = pg_insert(TrendingHourCount).values([
+            {"hour": hour, "hashtag_id": hashtag_id, "posts": posts}
+            for (hour, hashtag_id), posts in sorted(counts.items())
+        ])
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=["hour", "hashtag_id"],
+            set_={"posts": TrendingHourCount.posts + stmt.excluded.posts}
+        ))
+
+    def refresh(self, now: Optional[datetime] = None):
+        """并入写入路径累加的计数，丢弃过期的桶并重新计算快照（没有新数据时窗口也在滑动）"""
+        now = now or datetime.now(timezone.utc)
+        states = {window: self.load_window(window) for window in WINDOWS}
+
+        # 取出并删除待合并计数（已锁定全部窗口行，刷新之间不会重复合并）
+        pending = self.db.execute(
+            delete(TrendingHourCount).returning(
+                TrendingHourCount.hour, TrendingHourCount.hashtag_id, TrendingHourCount.posts
+            )
+        ).all()
+
+        for window, state in states.items():
+            bucket_hours = WINDOWS[window][1]
+            buckets = self.load_buckets(state)
+            for hour, hashtag_id, posts in pending:
+                buckets.setdefault(hour // bucket_hours, SpaceSaving(self.capacity)).add(str(hashtag_id), posts)
+            self.save(state, buckets, now)
+
+        if pending:
+            logger.info(f"热门标签刷新: 并入 {len(pending)} 个(小时, 标签)计数")
+
+    def rebuild(self, now: Optional[datetime] = None):
+        """从post_hashtags重建所有窗口的分桶统计（首次启用或回填后运行）"""
+        now = now or datetime.now(timezone.utc)
+        states = {window: self.load_window(window) for window in WINDOWS}
+        # 待合并计数已包含在post_hashtags中
+        self.db.execute(delete(TrendingHourCount))
+        for window, (window_hours, bucket_hours) in WINDOWS.items():
+            state = states[window]
+            seconds = bucket_hours * 3600
+            bucket = func.floor(func.extract("epoch", PostHashtag.posted_at) / seconds)
+
+            rows = self.db.query(bucket, PostHashtag.hashtag_id, func.count(PostHashtag.post_id)).filter(
+                PostHashtag.posted_at >= now - timedelta(hours=2 * window_hours),
+                PostHashtag.posted_at <= now
+            ).group_by(bucket, PostHashtag.hashtag_id).all()
+
+            buckets: Dict[int, SpaceSaving] = {}
+            for bucket_index, hashtag_id, count in rows:
+                buckets.setdefault(int(bucket_index), SpaceSaving(self.capacity)).add(str(hashtag_id), count)
+
+            self.save(state, buckets, now)
+            logger.info(f"热门标签窗口 {window} 重建完成: {len(rows)} 个(桶, 标签)计数")
+
+    def load_buckets(self, state: TrendingWindow) -> Dict[int, SpaceSaving]:
+        return {
+            int(bucket): SpaceSaving(self.capacity, counters)
+            for bucket, counters in (state.buckets or {}).items()
+        }
+
+    def save(self, state: TrendingWindow, buckets: Dict[int, SpaceSaving], now: datetime):
+        """丢弃超出两个窗口的桶，写回状态和快照"""
+        window_hours, bucket_hours = WINDOWS[state.window]
+        current = bucket_of(now, bucket_hours)
+        per_window = window_hours // bucket_hours
+        oldest = current - 2 * per_window + 1
+        buckets = {bucket: summary for bucket, summary in buckets.items() if oldest <= bucket <= current}
+
+        # 重新赋值，JSON列的原地修改不会被ORM检测到
+        state.buckets = {str(bucket): summary.counters for bucket, summary in buckets.items()}
+        state.snapshot = self.compute_snapshot(state.window, buckets, current, per_window, now)
+        state.computed_at = now
+
+    def compute_snapshot(self, window: str, buckets: Dict[int, SpaceSaving], current: int,
+                         per_window: int, now: datetime) -> Dict:
+        """热门标签（候选来自统计，计数为精确值）和相对上一窗口的上升标签"""
+        window_hours = WINDOWS[window][0]
+        current_summary = SpaceSaving.merge(
+            (summary for bucket, summary in buckets.items() if bucket > current - per_window), self.capacity
+        )
+        previous_summary = SpaceSaving.merge(
+            (summary for bucket, summary in buckets.items() if bucket <= current - per_window), self.capacity
+        )
+
+        # 热门候选：估计计数最大的2k项
+        top_candidates = [item for item, _, _ in current_summary.top(self.top_k * 2)]
+
+        # 上升候选：按估计值计算上升分数
+        rising_candidates = heapq.nlargest(
+            self.top_k * 2,
+            (
+                item for item, count, _ in current_summary.top(self.capacity)
+                if count >= config.TRENDING_MIN_POSTS
+            ),
+            key=lambda item: self.rising_score(current_summary.estimate(item), previous_summary.estimate(item))
+        )
+
+        candidate_ids = sorted({int(item) for item in top_candidates + rising_candidates})
+        if not candidate_ids:
+            return {"window": window, "computed_at": now.isoformat(), "top": [], "rising": []}
+
+        # 候选标签的精确计数
+        start = now - timedelta(hours=window_hours)
+        index = HashtagIndex(self.db)
+        current_counts = index.counts_for(candidate_ids, start, now)
+        previous_counts = index.counts_for(candidate_ids, start - timedelta(hours=window_hours), start)
+        names = dict(self.db.query(Hashtag.id, Hashtag.name).filter(Hashtag.id.in_(candidate_ids)).all())
+
+        top = sorted(
+            (int(item) for item in top_candidates),
+            key=lambda hashtag_id: current_counts.get(hashtag_id, 0),
+            reverse=True
+        )[:self.top_k]
+
+        rising = []
+        for hashtag_id in candidate_ids:
+            posts = current_counts.get(hashtag_id, 0)
+            previous = previous_counts.get(hashtag_id, 0)
+            if posts >= config.TRENDING_MIN_POSTS and posts > previous:
+                rising.append((self.rising_score(posts, previous), hashtag_id, posts, previous))
+        rising.sort(reverse=True)
+
+        return {
+            "window": window,
+            "computed_at": now.isoformat(),
+            "top": [
+                {
+                    "hashtag": f"#{names.get(hashtag_id, hashtag_id)}",
+                    "posts": current_counts.get(hashtag_id, 0),
+                    "estimate": current_summary.estimate(str(hashtag_id))
+                }
+                for hashtag_id in top
+            ],
+            "rising": [
+                {
+                    "hashtag": f"#{names.get(hashtag_id, hashtag_id)}",
+                    "posts": posts,
+                    "previous_posts": previous,
+                    "score": round(score, 4)
+                }
+                for score, hashtag_id, posts, previous in rising[:self.top_k]
+            ]
+        }
+
+    @staticmethod
+    def rising_score(current: int, previous: int) -> float:
+        """相对上一窗口的增长，+1平滑避免新标签分数无穷大"""
+        return (current - previous) / (previous + 1)
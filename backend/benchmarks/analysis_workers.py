@@ -0,0 +1,74 @@
+"""多进程CPU分析阶段的扩展性基准测试
+
+用法（在backend目录下运行）:
+    python -m benchmarks.analysis_workers --posts 50000 --workers 1 2 4 8 --output workers.json
+
+使用合成标题（不需要数据库）测量分类和主题阶段在不同进程数下的吞吐量。
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from app.services.text_normalization import tokenize
+from benchmarks.synthetic_data import make_caption
+
+
+def build_items(count: int, seed: int):
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        caption = make_caption(rng)[1]
+        # 与数据库中一致：tokens在写入时已生成
+        items.append((i, caption, tokenize(caption)))
+    return items
+
+
+def main():
+    from app.services.analysis_pipeline import AnalysisPipeline
+
+    parser = argparse.ArgumentParser(description="多进程CPU分析阶段扩展性基准测试")
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    items = build_items(args.posts, args.seed)
+    results = []
+    baseline = None
+
+    for workers in args.workers:
+        pipeline = AnalysisPipeline(None, workers=workers)
+        executor = pipeline.create_executor()
+        try:
+            pipeline.run_cpu_stages(items[:100], executor)  # 预热（启动工作进程）
+            started = time.perf_counter()
+            pipeline.run_cpu_stages(items, executor)
+            elapsed = time.perf_counter() - started
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # 加速比相对于列表中的第一个进程数（默认1）
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        result = {
+            "workers": workers,
+            "seconds": round(elapsed, 3),
+            "posts_per_second": round(args.posts / elapsed, 1),
+            "speedup": round(speedup, 2),
+            "efficiency": round(speedup / (workers / args.workers[0]), 2),
+        }
+        results.append(result)
+        print(f"{workers} 进程: {result['posts_per_second']} 帖子/秒，加速比 {result['speedup']}x，效率 {result['efficiency']:.0%}")
+
+    report = {"posts": args.posts, "cpu_count": os.cpu_count(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
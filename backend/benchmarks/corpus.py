@@ -0,0 +1,23 @@
+from typing import List, Optional
+
+from benchmarks.fixtures import SAMPLE_CAPTIONS
+
+
+def load_texts(limit: int, path: Optional[str] = None, include_comments: bool = True) -> List[str]:
+    """加载基准测试语料：文本文件（每行一条）或数据库中的帖子标题和评论"""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [line.rstrip("\n") for line in f][:limit]
+
+    from app.database import SessionLocal
+    from app.models.instagram import InstagramPost, InstagramComment
+
+    db = SessionLocal()
+    try:
+        texts = [row[0] for row in db.query(InstagramPost.caption).limit(limit).all()]
+        if include_comments and len(texts) < limit:
+            texts += [row[0] for row in db.query(InstagramComment.text).limit(limit - len(texts)).all()]
+    finally:
+        db.close()
+
+    return texts or SAMPLE_CAPTIONS
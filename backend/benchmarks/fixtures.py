@@ -0,0 +1,27 @@
+# 基准测试与一致性校验使用的固定阿拉伯语/英语文本集
+SAMPLE_CAPTIONS = [
+    "مسابقة جديدة! شارك الآن واربح جائزة قيمة لطفلك 🎁 #تعليم_انجليزي_للاطفال",
+    "خصم 50% على جميع الباقات لفترة محدودة، سجل اليوم!",
+    "تعلم اللغة الإنجليزية مع أفضل المعلمين من المنزل",
+    "للأسف الحصة اليوم كانت سيئة جداً والمعلم تأخر",
+    "ما شاء الله مستوى ابني تحسن كثير بعد شهرين",
+    "الخدمة بطيئة والدعم لا يرد على الرسائل",
+    "درس اليوم عن الألوان والحيوانات 🐶🎨",
+    "نتمنى لكم عطلة سعيدة مع عائلتكم ❤️",
+    "كم سعر الاشتراك الشهري؟",
+    "تجربة رائعة، أنصح بها كل الأمهات",
+    "Join our weekly challenge and win amazing prizes for your kids!",
+    "Huge discount this weekend only — don't miss our best offer of the year.",
+    "Learning English has never been this fun. Book a free trial lesson today.",
+    "Terrible experience, the teacher never showed up and nobody answered.",
+    "My daughter loves her classes, thank you so much!",
+    "Price?",
+    "The app keeps crashing during lessons, very disappointed.",
+    "Happy National Day to our amazing community in Saudi Arabia 🇸🇦",
+    "New lesson: 10 phonics tips every parent should know",
+    "It's okay I guess, nothing special.",
+    "Our teachers are certified and experienced. تعلم مع أفضل المعلمين",
+    "Free trial available now — احجز حصتك المجانية الآن",
+    "Great teachers but الأسعار مرتفعة جداً",
+    "Ramadan Kareem from all of us! رمضان كريم",
+]
@@ -0,0 +1,234 @@
+"""端到端HTTP压测与延迟SLO报告
+
+用法（在backend目录下运行）:
+    python -m benchmarks.load_test --rps 5 10 25 50 --duration 30 --output results/load.json
+    python -m benchmarks.load_test --seed-accounts 10 --seed-posts 2000   # 数据库为空时先生成合成数据和趋势分析
+
+在本进程内用uvicorn启动应用（连接DATABASE_URL指向的数据库），按目标RPS开环发送请求，
+请求按权重从前端 services/api.ts 调用的接口中抽取；同时采样数据库连接池占用。
+每个RPS档位输出各接口 p50/p95/p99 延迟、错误率和连接池饱和度，并与声明的SLO对比。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import httpx
+import uvicorn
+
+# 仪表盘加载时并发调用的接口及权重（对应 services/api.ts）
+DEFAULT_MIX = {
+    "/api/instagram/competitors": 4,
+    "/api/analysis/sentiment/overview?days=30": 4,
+    "/api/analysis/trends/latest": 4,
+    "/api/analysis/performance/engagement?days=30": 4,
+    "/api/analysis/content/category-distribution": 2,
+    "/api/instagram/posts?limit=20": 1,
+    "/api/instagram/accounts": 1,
+}
+
+# 声明的SLO：延迟(ms)和错误率；未单独声明的接口使用default
+SLOS = {
+    "default": {"p95_ms": 300, "p99_ms": 800, "error_rate": 0.01},
+    "/api/analysis/trends/latest": {"p95_ms": 100, "p99_ms": 250, "error_rate": 0.01},
+    "/api/instagram/competitors": {"p95_ms": 200, "p99_ms": 500, "error_rate": 0.01},
+}
+# 连接池平均占用超过该比例视为饱和
+POOL_SATURATION_LIMIT = 0.8
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """解析 "path=weight,path=weight" 或JSON文件路径"""
+    if os.path.exists(value):
+        with open(value) as f:
+            return json.load(f)
+    mix = {}
+    for item in value.split(","):
+        path, _, weight = item.rpartition("=")
+        mix[path.strip()] = float(weight)
+    return mix
+
+
+class ServerThread(threading.Thread):
+    """在后台线程中运行uvicorn"""
+
+    def __init__(self, app, port: int):
+        super().__init__(daemon=True)
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+
+    def run(self):
+        self.server.run()
+
+    def stop(self):
+        self.server.should_exit = True
+        self.join()
+
+
+async def sample_pool(engine, stop: asyncio.Event, samples: List[float], interval: float = 0.1):
+    """定期采样连接池占用比例"""
+    pool = engine.pool
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    while not stop.is_set():
+        samples.append(pool.checkedout() / capacity if capacity else 0.0)
+        await asyncio.sleep(interval)
+
+
+async def run_level(base_url: str, mix: Dict[str, float], rps: float, duration: float, engine, rng: random.Random) -> Dict:
+    paths = list(mix)
+    weights = [mix[path] for path in paths]
+    records: Dict[str, List[tuple]] = {path: [] for path in paths}
+
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        async def send(path: str):
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                # 4xx同样计为错误（如缺少数据时的404），否则错误率会掩盖接口未返回数据
+                ok = response.is_success
+            except httpx.HTTPError:
+                ok = False
+            records[path].append(((time.perf_counter() - started) * 1000, ok))
+
+        stop = asyncio.Event()
+        pool_samples: List[float] = []
+        sampler = asyncio.create_task(sample_pool(engine, stop, pool_samples))
+
+        # 开环调度：按固定间隔发出请求，不等待前一个请求完成
+        tasks = []
+        started = time.perf_counter()
+        total = int(rps * duration)
+        for i in range(total):
+            delay = started + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(rng.choices(paths, weights)[0])))
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+    endpoints = {}
+    failed_slos = []
+    for path, rows in records.items():
+        if not rows:
+            continue
+        latencies = [latency for latency, _ in rows]
+        errors = sum(1 for _, ok in rows if not ok)
+        result = {
+            "requests": len(rows),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "error_rate": round(errors / len(rows), 4),
+        }
+        slo = SLOS.get(path.split("?")[0], SLOS["default"])
+        result["slo"] = slo
+        result["slo_passed"] = (
+            result["p95_ms"] <= slo["p95_ms"]
+            and result["p99_ms"] <= slo["p99_ms"]
+            and result["error_rate"] <= slo["error_rate"]
+        )
+        if not result["slo_passed"]:
+            failed_slos.append(path)
+        endpoints[path] = result
+
+    pool_mean = statistics.fmean(pool_samples) if pool_samples else 0.0
+    return {
+        "target_rps": rps,
+        "achieved_rps": round(sum(len(rows) for rows in records.values()) / elapsed, 2),
+        "duration_s": round(elapsed, 2),
+        "pool_saturation_mean": round(pool_mean, 3),
+        "pool_saturation_max": round(max(pool_samples, default=0.0), 3),
+        "pool_saturated": pool_mean > POOL_SATURATION_LIMIT,
+        "endpoints": endpoints,
+        "failed_slos": failed_slos,
+    }
+
+
+def seed_if_empty(accounts: int, posts: int, seed: int):
+    """数据库为空时生成合成数据；没有趋势分析时生成一条，使 /api/analysis/trends/latest 返回200"""
+    from datetime import datetime, timezone
+
+    from app.database import SessionLocal
+    from app.models.analysis import TrendAnalysis
+    from app.models.instagram import InstagramPost
+    from app.services.analysis_service import AnalysisService
+    from benchmarks.synthetic_data import generate
+
+    db = SessionLocal()
+    try:
+        if db.query(InstagramPost.id).first() is None:
+            today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+            print(f"数据库为空，生成合成数据: {accounts} 账户 x {posts} 帖子")
+            generate(db, accounts, posts, comments_per_post=10, now=today, seed=seed)
+        if db.query(TrendAnalysis.id).first() is None:
+            print("没有趋势分析，按最近一周的数据生成")
+            if AnalysisService(db).generate_trend_analysis("weekly") is None:
+                print("警告: 最近一周没有目标竞品的帖子，/api/analysis/trends/latest 将返回404")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端HTTP压测与SLO报告")
+    parser.add_argument("--rps", type=float, nargs="+", default=[5, 10, 25, 50], help="依次测试的目标RPS")
+    parser.add_argument("--duration", type=float, default=30, help="每个RPS档位的持续秒数")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="接口权重: path=weight,... 或JSON文件")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--seed-accounts", type=int, default=0, help="数据库为空时生成的账户数")
+    parser.add_argument("--seed-posts", type=int, default=1000, help="数据库为空时每个账户生成的帖子数")
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    from app.database import engine
+    from app.main import app
+
+    if args.seed_accounts:
+        seed_if_empty(args.seed_accounts, args.seed_posts, args.seed)
+
+    server = ServerThread(app, args.port)
+    server.start()
+    while not server.server.started:
+        time.sleep(0.05)
+
+    rng = random.Random(args.seed)
+    levels = []
+    try:
+        for rps in args.rps:
+            level = asyncio.run(run_level(f"http://127.0.0.1:{args.port}", args.mix, rps, args.duration, engine, rng))
+            levels.append(level)
+            print(f"RPS {rps:>6}: 实际 {level['achieved_rps']} 连接池 平均{level['pool_saturation_mean']:.0%} "
+                  f"峰值{level['pool_saturation_max']:.0%} 未达标: {level['failed_slos'] or '无'}")
+            for path, result in level["endpoints"].items():
+                print(f"    {path:<50} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                      f"p99={result['p99_ms']}ms 错误率={result['error_rate']:.2%}")
+    finally:
+        server.stop()
+
+    report = {"mix": args.mix, "slos": SLOS, "levels": levels}
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    sys.exit(1 if any(level["failed_slos"] or level["pool_saturated"] for level in levels) else 0)
+
+
+if __name__ == "__main__":
+    main()
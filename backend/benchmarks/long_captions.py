@@ -0,0 +1,115 @@
+"""长文本滑动窗口推理基准测试
+
+用法（在backend目录下运行）:
+    python -m benchmarks.long_captions --limit 5000 --output long.json
+
+输出语料的token长度分布，比较截断与滑动窗口两种方式的耗时，
+并校验短文本（不超过512个字符和最大token数）的结果与引入滑动窗口之前的推理方式（legacy_predict_proba）一致。
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.corpus import load_texts
+from benchmarks.fixtures import SAMPLE_CAPTIONS
+
+# 短文本与旧推理方式的最大允许概率偏差（仅padding带来的浮点误差）
+SHORT_TEXT_TOLERANCE = 1e-4
+# 旧推理方式在分词前按字符截断的长度
+LEGACY_CHAR_LIMIT = 512
+
+
+def legacy_predict_proba(backend, texts):
+    """引入滑动窗口之前的推理方式：按字符截断，按输入顺序分批，批内padding后截断到max_length"""
+    texts = [text[:LEGACY_CHAR_LIMIT] for text in texts]
+    outputs = []
+    for start in range(0, len(texts), backend.batch_size):
+        encoded = backend.tokenizer(
+            texts[start:start + backend.batch_size],
+            padding=True,
+            truncation=True,
+            max_length=backend.max_length,
+            return_tensors="pt"
+        )
+        logits = backend.forward(encoded)
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        outputs.append(exp / exp.sum(axis=1, keepdims=True))
+    return np.concatenate(outputs, axis=0)
+
+
+def short_text_drift(backend, texts) -> float:
+    """短文本在当前predict_proba与旧推理方式下的最大概率偏差"""
+    lengths = [len(ids) for ids in backend.tokenizer(texts)["input_ids"]]
+    short_texts = [
+        text for text, length in zip(texts, lengths)
+        if len(text) <= LEGACY_CHAR_LIMIT and length <= backend.max_length
+    ]
+    if not short_texts:
+        return 0.0
+    return float(np.abs(backend.predict_proba(short_texts) - legacy_predict_proba(backend, short_texts)).max())
+
+
+def main():
+    from app.services.sentiment_backends import get_sentiment_backend
+
+    parser = argparse.ArgumentParser(description="长文本滑动窗口推理基准测试")
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--file", help="语料文件（每行一条），默认从数据库读取帖子标题")
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    texts = [text for text in load_texts(args.limit, args.file, include_comments=False) if text]
+    backend = get_sentiment_backend()
+
+    lengths = np.array([len(ids) for ids in backend.tokenizer(texts)["input_ids"]])
+    long_mask = lengths > backend.max_length
+    short_texts = [text for text, is_long in zip(texts, long_mask) if not is_long]
+    long_texts = [text for text, is_long in zip(texts, long_mask) if is_long]
+
+    backend.predict_proba(texts[:2])  # 预热
+
+    started = time.perf_counter()
+    truncated = backend.predict_proba_truncated(texts)
+    truncated_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    windowed = backend.predict_proba(texts)
+    windowed_seconds = time.perf_counter() - started
+
+    # 短文本结果应与旧推理方式保持一致（固定文本集始终参与校验）
+    short_diff = short_text_drift(backend, short_texts + SAMPLE_CAPTIONS)
+    # 长文本标签变化比例
+    changed = int((truncated[long_mask].argmax(axis=1) != windowed[long_mask].argmax(axis=1)).sum()) if long_texts else 0
+
+    report = {
+        "model_id": backend.model_id,
+        "texts": len(texts),
+        "token_length": {
+            "p50": int(np.percentile(lengths, 50)),
+            "p90": int(np.percentile(lengths, 90)),
+            "p99": int(np.percentile(lengths, 99)),
+            "max": int(lengths.max()),
+        },
+        "long_texts": len(long_texts),
+        "long_ratio": round(len(long_texts) / len(texts), 4),
+        "truncated_seconds": round(truncated_seconds, 2),
+        "windowed_seconds": round(windowed_seconds, 2),
+        "long_text_label_changes": changed,
+        "short_text_max_prob_diff": short_diff,
+        "short_text_parity": short_diff <= SHORT_TEXT_TOLERANCE,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    sys.exit(0 if report["short_text_parity"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""近似重复标题索引（MinHash/LSH）基准：建索引和查询耗时
+
+用法（在backend目录下运行）:
+    python -m benchmarks.near_duplicates --captions 1000000 --queries 2000
+    python -m benchmarks.near_duplicates --captions 100000 --output results/near_duplicates.json
+
+合成标题（模板 + 随机词，保证彼此不同），其中--duplicate-rate比例是之前某条标题的小幅改写
+（替换/插入/删除一两个词）。建索引阶段与写入路径相同：分片哈希、整批MinHash签名、LSH分段；
+lsh_buckets表用每段排序后的桶值数组模拟（对应主键索引上的查找），不访问数据库。
+查询阶段对改写副本查找同桶候选并比较签名，报告每条耗时分位数、平均候选数和召回率。
+"""
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app import config
+from app.services.near_duplicates import shingle_hashes, minhash_signatures, band_keys, similarity
+from app.services.text_normalization import tokenize
+from benchmarks.synthetic_data import make_caption
+
+# 随机词表大小，每条标题追加若干随机词
+VOCABULARY_SIZE = 50000
+
+
+def edit(tokens: List[str], rng: random.Random) -> List[str]:
+    """小幅改写：替换、插入或删除一两个词（改价格、换表情等）"""
+    tokens = list(tokens)
+    for _ in range(rng.randint(1, 2)):
+        position = rng.randrange(len(tokens))
+        action = rng.random()
+        if action < 0.5:
+            tokens[position] = f"w{rng.randrange(VOCABULARY_SIZE)}"
+        elif action < 0.8:
+            tokens.insert(position, f"w{rng.randrange(VOCABULARY_SIZE)}")
+        elif len(tokens) > 6:
+            del tokens[position]
+    return tokens
+
+
+def build_corpus(count: int, duplicate_rate: float, seed: int) -> tuple[List[List[str]], Dict[int, int]]:
+    """返回 (每条标题的tokens, 改写副本下标 -> 原标题下标)"""
+    rng = random.Random(seed)
+    documents = []
+    originals = {}
+    for index in range(count):
+        if documents and rng.random() < duplicate_rate:
+            source = rng.randrange(len(documents))
+            documents.append(edit(documents[source], rng))
+            originals[index] = source
+            continue
+        caption = make_caption(rng)[1]
+        extra = " ".join(f"w{rng.randrange(VOCABULARY_SIZE)}" for _ in range(rng.randint(8, 20)))
+        documents.append(tokenize(f"{caption} {extra}"))
+    return documents, originals
+
+
+def percentile(values: List[float], q: float) -> float:
+    return round(float(np.percentile(values, q)), 3) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似重复标题索引基准")
+    parser.add_argument("--captions", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--batch-size", type=int, default=10000, help="每批计算签名的标题数（对应写入批量）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    num_perm, bands, threshold = (
+        config.NEAR_DUPLICATE_NUM_PERM, config.NEAR_DUPLICATE_BANDS, config.NEAR_DUPLICATE_THRESHOLD
+    )
+
+    started = time.perf_counter()
+    documents, originals = build_corpus(args.captions, args.duplicate_rate, args.seed)
+    print(f"生成 {len(documents):,} 条标题（{len(originals):,} 条改写副本），耗时 {time.perf_counter() - started:.1f}s")
+
+    # 建索引：签名和分段（写入路径的计算部分）
+    started = time.perf_counter()
+    indexed = [index for index, tokens in enumerate(documents) if shingle_hashes(tokens) is not None]
+    signatures = np.empty((len(indexed), num_perm), dtype=np.uint32)
+    for start in range(0, len(indexed), args.batch_size):
+        batch = indexed[start:start + args.batch_size]
+        signatures[start:start + len(batch)] = minhash_signatures(
+            [shingle_hashes(documents[index]) for index in batch], num_perm
+        )
+    signature_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    keys = band_keys(signatures, bands)
+    order = np.argsort(keys, axis=0, kind="stable")
+    sorted_keys = np.take_along_axis(keys, order, axis=0)
+    bucket_seconds = time.perf_counter() - started
+    build_seconds = signature_seconds + bucket_seconds
+    print(f"建索引: 签名 {signature_seconds:.1f}s，分桶 {bucket_seconds:.1f}s，"
+          f"{len(indexed) / build_seconds:,.0f} 条/秒")
+
+    # 查询：改写副本查找原标题
+    rng = random.Random(args.seed + 1)
+    position_of = {index: position for position, index in enumerate(indexed)}
+    planted = [(copy, source) for copy, source in originals.items() if copy in position_of and source in position_of]
+    queries = rng.sample(planted, min(args.queries, len(planted)))
+
+    latencies = []
+    candidate_counts = []
+    found = 0
+    for copy, source in queries:
+        started = time.perf_counter()
+        signature = minhash_signatures([shingle_hashes(documents[copy])], num_perm)
+        query_keys = band_keys(signature, bands)[0]
+        candidates = set()
+        for band in range(bands):
+            left = np.searchsorted(sorted_keys[:, band], query_keys[band], side="left")
+            right = np.searchsorted(sorted_keys[:, band], query_keys[band], side="right")
+            candidates.update(order[left:right, band].tolist())
+        candidates.discard(position_of[copy])
+        candidate_list = sorted(candidates)
+        matches = []
+        if candidate_list:
+            scores = similarity(signature[0], signatures[candidate_list])
+            matches = [candidate_list[i] for i in np.flatnonzero(scores >= threshold)]
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        candidate_counts.append(len(candidate_list))
+        found += position_of[source] in matches
+
+    report = {
+        "captions": len(documents),
+        "indexed": len(indexed),
+        "num_perm": num_perm,
+        "bands": bands,
+        "threshold": threshold,
+        "build": {
+            "signature_seconds": round(signature_seconds, 2),
+            "bucket_seconds": round(bucket_seconds, 2),
+            "captions_per_s": round(len(indexed) / build_seconds, 1),
+            "signature_mb": round(signatures.nbytes / 1e6, 1),
+            "bucket_rows": int(keys.size),
+        },
+        "query": {
+            "queries": len(queries),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "avg_candidates": round(float(np.mean(candidate_counts)), 2) if candidate_counts else 0.0,
+            "recall": round(found / len(queries), 4) if queries else 0.0,
+        },
+    }
+    print(f"查询: p50 {report['query']['p50_ms']}ms，p95 {report['query']['p95_ms']}ms，"
+          f"平均候选 {report['query']['avg_candidates']}，召回率 {report['query']['recall']:.2%}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""分析函数与接口的微基准测试
+
+用法（在backend目录下运行，先用benchmarks.synthetic_data生成数据）:
+    python -m benchmarks.run_benchmarks --output results/bench.json
+    python -m benchmarks.run_benchmarks --only classify_content extract_keywords --compare results/bench.json
+
+结果写入JSON（含git提交、数据量和各项耗时分位数），--compare 与之前的结果对比。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict
+
+# 接口基准：前端 services/api.ts 调用的只读接口
+ENDPOINTS = [
+    ("GET", "/api/instagram/accounts"),
+    ("GET", "/api/instagram/competitors"),
+    ("GET", "/api/instagram/posts?limit=100"),
+    ("GET", "/api/instagram/posts?limit=100&account_username=51talkksa"),
+    ("GET", "/api/analysis/content/category-distribution"),
+    ("GET", "/api/analysis/sentiment/overview?days=30"),
+    ("GET", "/api/analysis/trends/latest"),
+    ("GET", "/api/analysis/performance/engagement?days=30"),
+]
+
+
+def measure(func: Callable, repeats: int, inner: int = 1) -> Dict:
+    """运行repeats轮，每轮调用inner次，返回单次调用耗时统计(ms)"""
+    func()  # 预热
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(inner):
+            func()
+        samples.append((time.perf_counter() - started) * 1000 / inner)
+
+    samples.sort()
+    return {
+        "repeats": repeats,
+        "inner": inner,
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[max(int(len(samples) * 0.95) - 1, 0)], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "ops_per_s": round(1000 / statistics.median(samples), 1) if samples[0] > 0 else None,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def dataset_counts(db) -> Dict:
+    from app.models.instagram import InstagramAccount, InstagramPost, InstagramComment
+    from app.models.analysis import ContentAnalysis
+
+    return {
+        "accounts": db.query(InstagramAccount).count(),
+        "posts": db.query(InstagramPost).count(),
+        "comments": db.query(InstagramComment).count(),
+        "analyses": db.query(ContentAnalysis).count(),
+    }
+
+
+def function_benchmarks(db, sample_size: int) -> Dict[str, Callable]:
+    """分析函数基准：在数据库帖子样本上整体运行一遍为一次调用"""
+    from app.models.instagram import InstagramPost
+    from app.services.analysis_service import AnalysisService
+    from app.services.scoring import FeatureFrame
+    from app.services.text_normalization import tokenize
+
+    service = AnalysisService(db)
+    rows = db.query(
+        InstagramPost.caption,
+        InstagramPost.media_type,
+        InstagramPost.caption_hashtags,
+        InstagramPost.posted_at,
+        InstagramPost.tokens
+    ).order_by(InstagramPost.id).limit(sample_size).all()
+    captions = [row.caption for row in rows]
+    # 与生产路径一致：使用写入时存储的tokens，旧数据现场分词
+    tokens = [row.tokens if row.tokens is not None else tokenize(row.caption) for row in rows]
+    posts = [
+        SimpleNamespace(caption=row.caption, media_type=row.media_type,
+                        caption_hashtags=row.caption_hashtags, posted_at=row.posted_at)
+        for row in rows
+    ]
+
+    return {
+        "tokenize": lambda: [tokenize(caption) for caption in captions],
+        "classify_content": lambda: [service.classify_content(caption, words) for caption, words in zip(captions, tokens)],
+        "extract_keywords": lambda: [service.extract_keywords(caption, words) for caption, words in zip(captions, tokens)],
+        "calculate_content_quality": lambda: [service.calculate_content_quality(post) for post in posts],
+        # 同一批帖子的向量化质量分和互动率预测
+        "batch_scoring": lambda: service.scorer.score(FeatureFrame.from_posts(posts)),
+        "generate_trend_analysis": lambda: service.generate_trend_analysis("monthly"),
+        "generate_competitor_benchmark": lambda: service.generate_competitor_benchmark(
+            ["51talkksa", "novakid_mena", "vipkid_ar"], 30
+        ),
+    }
+
+
+def endpoint_benchmarks(client) -> Dict[str, Callable]:
+    def call(method: str, path: str):
+        def run():
+            response = client.request(method, path)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{method} {path} 返回 {response.status_code}")
+        return run
+
+    return {f"{method} {path}": call(method, path) for method, path in ENDPOINTS}
+
+
+def compare(previous: Dict, current: Dict):
+    """打印与之前结果的中位数对比"""
+    before = previous.get("results", {})
+    for name, result in current["results"].items():
+        if name in before:
+            change = (result["median_ms"] - before[name]["median_ms"]) / before[name]["median_ms"] * 100
+            print(f"{name:>70}: {before[name]['median_ms']:.3f}ms -> {result['median_ms']:.3f}ms ({change:+.1f}%)")
+
+
+def main():
+    from fastapi.testclient import TestClient
+
+    from app.database import SessionLocal
+    from app.main import app
+
+    parser = argparse.ArgumentParser(description="分析函数与接口微基准测试")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--sample-size", type=int, default=1000, help="函数基准使用的帖子数")
+    parser.add_argument("--only", nargs="*", help="只运行名称包含这些关键字的基准")
+    parser.add_argument("--output", help="结果JSON输出路径")
+    parser.add_argument("--compare", help="与之前的结果JSON对比")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    client = TestClient(app)
+    try:
+        benchmarks = function_benchmarks(db, args.sample_size)
+        benchmarks.update(endpoint_benchmarks(client))
+        if args.only:
+            benchmarks = {name: func for name, func in benchmarks.items() if any(key in name for key in args.only)}
+
+        results = {}
+        for name, func in benchmarks.items():
+            # 生成趋势/基准会写库，轮数减少
+            repeats = max(args.repeats // 5, 1) if name.startswith("generate_") else args.repeats
+            results[name] = measure(func, repeats)
+            print(f"{name:>70}: median={results[name]['median_ms']:.3f}ms p95={results[name]['p95_ms']:.3f}ms")
+
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "sample_size": args.sample_size,
+            "dataset": dataset_counts(db),
+            "results": results,
+        }
+    finally:
+        db.close()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
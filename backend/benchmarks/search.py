@@ -0,0 +1,95 @@
+"""全文检索基准
+
+用法（在backend目录下运行，先用benchmarks.synthetic_data生成数据，例如
+--accounts 20 --posts-per-account 10000 --comments-per-post 15 约300万条评论）:
+    python -m benchmarks.search --repeats 20 --output results/search.json
+
+对一组阿拉伯语/英语检索词分别检索帖子和评论（相关度/时间排序、账户过滤、翻页），
+报告每个场景的耗时分位数和命中数，p95超过--target-ms时以非零状态退出。
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List
+
+from benchmarks.run_benchmarks import measure, dataset_counts
+
+QUERIES = [
+    "خصم",
+    "السعر",
+    "مسابقة جائزة",
+    "\"free trial\"",
+    "discount OR offer",
+    "teachers -disappointed",
+    "ما شاء الله",
+]
+
+
+def scenarios(service, queries: List[str], account: str) -> Dict:
+    """检索场景：名称 -> 调用"""
+    cases = {}
+    for q in queries:
+        for search_type in ("posts", "comments"):
+            cases[f"{search_type} rank {q}"] = lambda q=q, t=search_type: service.search(q, search_type=t)
+            cases[f"{search_type} recent {q}"] = lambda q=q, t=search_type: service.search(q, search_type=t, sort="recent")
+            cases[f"{search_type} account {q}"] = lambda q=q, t=search_type: service.search(
+                q, search_type=t, account_username=account
+            )
+
+            def second_page(q=q, t=search_type):
+                first = service.search(q, search_type=t)
+                if first["next_cursor"]:
+                    service.search(q, search_type=t, cursor=first["next_cursor"])
+            cases[f"{search_type} page2 {q}"] = second_page
+    return cases
+
+
+def main():
+    from sqlalchemy import func
+
+    from app.database import SessionLocal
+    from app.models.instagram import InstagramComment
+    from app.services.search_service import SearchService
+
+    parser = argparse.ArgumentParser(description="全文检索基准")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--queries", nargs="*", default=QUERIES)
+    parser.add_argument("--account", default="51talkksa", help="账户过滤场景使用的账户")
+    parser.add_argument("--target-ms", type=float, default=100.0, help="p95延迟目标")
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        service = SearchService(db)
+        results = {}
+        for name, call in scenarios(service, args.queries, args.account).items():
+            results[name] = measure(call, args.repeats)
+            print(f"{name:>50}: median={results[name]['median_ms']:.2f}ms p95={results[name]['p95_ms']:.2f}ms")
+
+        # 命中数，便于判断检索词的选择性
+        hits = {}
+        for q in args.queries:
+            tsquery = service.build_tsquery(q)
+            hits[q] = db.query(func.count(InstagramComment.id)).filter(
+                InstagramComment.search_vector.op("@@")(tsquery)
+            ).scalar()
+
+        report = {"dataset": dataset_counts(db), "comment_hits": hits, "results": results}
+    finally:
+        db.close()
+
+    slow = [name for name, result in results.items() if result["p95_ms"] > args.target_ms]
+    print(f"p95超过{args.target_ms}ms的场景: {slow or '无'}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    sys.exit(1 if slow else 0)
+
+
+if __name__ == "__main__":
+    main()
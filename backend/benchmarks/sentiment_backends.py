@@ -0,0 +1,137 @@
+"""情感分析推理后端基准测试与精度一致性校验
+
+用法（在backend目录下运行）:
+    python -m benchmarks.sentiment_backends
+    python -m benchmarks.sentiment_backends --backends pytorch onnx-int8 --output bench.json
+
+每个后端在独立子进程中加载，以便单独统计内存占用；
+以pytorch后端为基准，比较其它后端在固定阿拉伯语/英语文本集上的标签一致率和概率偏差。
+"""
+import argparse
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+
+from benchmarks.fixtures import SAMPLE_CAPTIONS
+
+# 量化后端允许的最低标签一致率和最大概率偏差
+MIN_LABEL_AGREEMENT = 0.9
+MAX_PROB_DIFF = 0.15
+
+
+def rss_mb() -> float:
+    """当前进程常驻内存(MB)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(backend_name: str, model_name: str, repeats: int, queue):
+    from app.services.sentiment_backends import create_sentiment_backend
+
+    rss_before = rss_mb()
+    backend = create_sentiment_backend(backend_name, model_name, batch_size=len(SAMPLE_CAPTIONS))
+    rss_loaded = rss_mb()
+
+    # 预热
+    backend.predict_proba(SAMPLE_CAPTIONS[:2])
+
+    # 单条延迟
+    latencies = []
+    for _ in range(repeats):
+        for text in SAMPLE_CAPTIONS:
+            started = time.perf_counter()
+            backend.predict_proba([text])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    # 批量吞吐
+    started = time.perf_counter()
+    for _ in range(repeats):
+        probs = backend.predict_proba(SAMPLE_CAPTIONS)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    queue.put({
+        "backend": backend_name,
+        "model_id": backend.model_id,
+        "load_seconds": round(backend.load_seconds, 3),
+        "latency_ms_p50": round(statistics.median(latencies), 2),
+        "latency_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "throughput_texts_per_s": round(len(SAMPLE_CAPTIONS) * repeats / elapsed, 1),
+        "rss_model_mb": round(rss_loaded - rss_before, 1),
+        "rss_peak_mb": round(rss_mb(), 1),
+        "labels": backend.labels,
+        "probs": probs.tolist(),
+    })
+
+
+def compare(reference: dict, result: dict) -> dict:
+    """与基准后端比较标签一致率与最大概率偏差"""
+    ref_probs, probs = reference["probs"], result["probs"]
+    agree = 0
+    max_diff = 0.0
+    for ref_row, row in zip(ref_probs, probs):
+        if ref_row.index(max(ref_row)) == row.index(max(row)):
+            agree += 1
+        max_diff = max(max_diff, max(abs(a - b) for a, b in zip(ref_row, row)))
+
+    agreement = agree / len(ref_probs)
+    return {
+        "label_agreement": round(agreement, 3),
+        "max_prob_diff": round(max_diff, 4),
+        "passed": agreement >= MIN_LABEL_AGREEMENT and max_diff <= MAX_PROB_DIFF,
+    }
+
+
+def main():
+    from app import config
+    from app.services.sentiment_backends import SENTIMENT_BACKENDS
+
+    parser = argparse.ArgumentParser(description="情感分析推理后端基准测试")
+    parser.add_argument("--backends", nargs="+", default=list(SENTIMENT_BACKENDS))
+    parser.add_argument("--model", default=config.SENTIMENT_MODEL)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    backends = ["pytorch"] + [b for b in args.backends if b != "pytorch"]
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+
+    for backend_name in backends:
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_backend, args=(backend_name, args.model, args.repeats, queue))
+        process.start()
+        results[backend_name] = queue.get()
+        process.join()
+
+    reference = results["pytorch"]
+    failed = False
+    report = []
+    for backend_name, result in results.items():
+        entry = {k: v for k, v in result.items() if k not in ("probs", "labels")}
+        if backend_name != "pytorch":
+            entry["parity"] = compare(reference, result)
+            failed = failed or not entry["parity"]["passed"]
+        report.append(entry)
+        print(f"{backend_name:>14}: p50={entry['latency_ms_p50']}ms p95={entry['latency_ms_p95']}ms "
+              f"吞吐={entry['throughput_texts_per_s']}条/s 内存={entry['rss_model_mb']}MB "
+              f"{entry.get('parity', '')}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "texts": len(SAMPLE_CAPTIONS), "results": report}, f, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""JSON序列化耗时与传输字节数基准
+
+用法（在backend目录下运行，先用benchmarks.synthetic_data生成数据）:
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --repeats 50 --output results/serialization.json
+
+序列化耗时：对同一份数据比较原路径（ORM对象 -> Pydantic/jsonable_encoder -> 标准库json）
+与新路径（按列查询的行元组 -> orjson），不含数据库查询时间。
+传输字节数：通过TestClient分别以identity、gzip、br请求代表性接口，记录实际收到的字节数和接口耗时。
+"""
+import argparse
+import json
+import os
+
+from benchmarks.run_benchmarks import measure
+
+# 代表性接口：帖子列表、评论最多的帖子详情、最新趋势、仪表盘
+ENDPOINTS = [
+    "/api/instagram/posts?limit=100",
+    "/api/instagram/posts?limit=1000",
+    "/api/instagram/posts/{post_id}",
+    "/api/analysis/trends/latest",
+    "/api/dashboard?days=30",
+]
+ENCODINGS = ["identity", "gzip", "br"]
+
+
+def serialization_benchmarks(db, limit: int) -> dict:
+    """原路径与新路径的序列化函数（数据预先加载）"""
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import func
+
+    from app.models.instagram import InstagramComment, InstagramPost
+    from app.responses import dumps, model_columns, row_dicts
+    from app.routers.instagram import PostResponse
+
+    def stdlib_dumps(content) -> bytes:
+        # 与Starlette JSONResponse.render一致
+        return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                          indent=None, separators=(",", ":")).encode("utf-8")
+
+    posts = db.query(InstagramPost).order_by(InstagramPost.posted_at.desc()).limit(limit).all()
+    post_rows = db.query(*[getattr(InstagramPost, field) for field in PostResponse.model_fields]).order_by(
+        InstagramPost.posted_at.desc()
+    ).limit(limit).all()
+
+    # 评论最多的帖子
+    busiest = db.query(InstagramComment.post_id).group_by(InstagramComment.post_id).order_by(
+        func.count(InstagramComment.id).desc()
+    ).limit(1).scalar()
+    comments = db.query(InstagramComment).filter(InstagramComment.post_id == busiest).all() if busiest else []
+    comment_rows = db.query(*model_columns(InstagramComment)).filter(
+        InstagramComment.post_id == busiest
+    ).all() if busiest else []
+
+    return {
+        f"posts[{len(posts)}] pydantic+json": lambda: stdlib_dumps([PostResponse.model_validate(post) for post in posts]),
+        f"posts[{len(post_rows)}] rows+orjson": lambda: dumps(row_dicts(post_rows)),
+        f"comments[{len(comments)}] orm+json": lambda: stdlib_dumps(comments),
+        f"comments[{len(comment_rows)}] rows+orjson": lambda: dumps(row_dicts(comment_rows)),
+    }
+
+
+def wire_sizes(client, path: str, repeats: int) -> dict:
+    """各编码下实际传输的字节数和接口耗时"""
+    result = {}
+    for encoding in ENCODINGS:
+        headers = {"Accept-Encoding": encoding}
+        response = client.get(path, headers=headers)
+        if response.status_code != 200:
+            result[encoding] = {"status": response.status_code}
+            continue
+        timing = measure(lambda: client.get(path, headers=headers), repeats)
+        result[encoding] = {
+            "content_encoding": response.headers.get("content-encoding", "identity"),
+            "bytes": response.num_bytes_downloaded,
+            "decoded_bytes": len(response.content),
+            "median_ms": timing["median_ms"],
+        }
+    return result
+
+
+def main():
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func
+
+    from app.database import SessionLocal
+    from app.main import app
+    from app.models.instagram import InstagramComment, InstagramPost
+
+    parser = argparse.ArgumentParser(description="JSON序列化与响应压缩基准")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=1000, help="序列化基准使用的帖子数")
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    client = TestClient(app)
+    try:
+        busiest = db.query(InstagramPost.post_id).join(InstagramComment).group_by(InstagramPost.post_id).order_by(
+            func.count(InstagramComment.id).desc()
+        ).limit(1).scalar()
+
+        serialization = {}
+        for name, benchmark in serialization_benchmarks(db, args.limit).items():
+            serialization[name] = measure(benchmark, args.repeats)
+            serialization[name]["bytes"] = len(benchmark())
+            print(f"{name:>40}: median={serialization[name]['median_ms']:.3f}ms bytes={serialization[name]['bytes']}")
+
+        wire = {}
+        for path in ENDPOINTS:
+            if "{post_id}" in path:
+                if busiest is None:
+                    continue
+                path = path.format(post_id=busiest)
+            wire[path] = wire_sizes(client, path, args.repeats)
+            sizes = " ".join(
+                f"{encoding}={entry.get('bytes', entry.get('status'))}" for encoding, entry in wire[path].items()
+            )
+            print(f"{path:>40}: {sizes}")
+    finally:
+        db.close()
+
+    report = {"serialization": serialization, "wire": wire}
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""可复现的合成数据生成器
+
+用法（在backend目录下运行，写入DATABASE_URL指向的数据库）:
+    python -m benchmarks.synthetic_data --accounts 20 --posts-per-account 50000 --comments-per-post 20 --seed 42
+
+相同的seed、参数和--anchor-date（最新帖子的日期，默认今天）生成完全相同的数据：
+每个账户使用独立的随机数生成器，与分块大小无关。前三个账户固定为目标竞品账户，便于接口按默认竞品筛选。
+"""
+import argparse
+import logging
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+from sqlalchemy import insert
+
+from app.services.text_normalization import prepare_text
+from app.services.content_hash import content_hash
+
+logger = logging.getLogger(__name__)
+
+TARGET_COMPETITORS = ["51talkksa", "novakid_mena", "vipkid_ar"]
+
+HASHTAGS = [
+    "#تعليم_انجليزي_للاطفال", "#لغة_انجليزية", "#KSA_K12", "#تعليم_اونلاين", "#تعليم_الاطفال",
+    "#الرياض_تعليم", "#جدة_تعليم", "#الدمام_تعليم", "#السعودية", "#english", "#kids",
+    "#onlinelearning", "#education", "#رمضان", "#اليوم_الوطني", "#عروض", "#مسابقة", "#تعلم",
+]
+
+CAPTION_TEMPLATES = {
+    "互动游戏/竞赛": [
+        "مسابقة جديدة! شارك الآن واربح جائزة قيمة {emoji}",
+        "تحدي الأسبوع: من يعرف الإجابة؟ الفوز لأول ثلاثة مشاركين",
+        "Join our weekly challenge and win amazing prizes! {emoji}",
+        "Contest time! Comment your answer and participate to win a free month",
+    ],
+    "促销/销售": [
+        "خصم {discount}% على جميع الباقات لفترة محدودة، سجل اليوم!",
+        "عرض خاص لأول 100 مشترك، السعر يبدأ من {price} ريال",
+        "Huge discount this weekend only — {discount}% off our best offer {emoji}",
+        "Special price for new families: buy 3 months and get 1 free",
+    ],
+    "纯教育内容": [
+        "درس اليوم: {count} كلمات إنجليزية يحتاجها كل طفل {emoji}",
+        "تعلم مهارة جديدة مع معلمينا، معلومة مفيدة لتطوير لغة طفلك",
+        "New lesson: {count} phonics tips every parent should know",
+        "Learning English through songs helps kids build skills and knowledge",
+    ],
+    "品牌/社区": [
+        "نحن مجتمع من الأسر التي تدعم تعليم أطفالها {emoji}",
+        "شكراً لكل أسرة شاركتنا فعالية اليوم الوطني",
+        "Our community of families keeps growing — thank you for your support {emoji}",
+        "Join our parents event this Friday and connect with other families",
+    ],
+    "其他": [
+        "صباح الخير {emoji}",
+        "جمعة مباركة",
+        "Good morning from our team {emoji}",
+        "{emoji}{emoji}",
+    ],
+}
+CATEGORY_WEIGHTS = [0.15, 0.25, 0.35, 0.15, 0.10]
+
+COMMENTS = [
+    "😍", "😍😍😍", "❤️", "👏👏", "ما شاء الله", "ما شاء الله تبارك الله", "price?", "كم السعر؟",
+    "how much?", "رائع جداً", "الله يوفقكم", "تجربة ممتازة، ابني استفاد كثير", "Amazing teachers!",
+    "My son loves it", "الخدمة سيئة ولا أحد يرد", "Very disappointed with the app", "@friend شوفي هذا",
+    "@mom_of_two", "follow me for more", "متى يبدأ التسجيل؟", "Is there a free trial?", "🔥🔥",
+    "الأسعار مرتفعة", "شكراً لكم", "Great content, thank you!", "😡", "👍",
+]
+EMOJIS = ["🎁", "🎉", "✨", "❤️", "📚", "🌟", "🇸🇦", "👧", "👦", "🔥"]
+MEDIA_TYPES = ["image", "video", "carousel"]
+MEDIA_WEIGHTS = [0.5, 0.2, 0.3]
+SENTIMENT_LABELS = ["positive", "neutral", "negative"]
+
+# 沙特时间(UTC+3)晚间发帖更多
+RIYADH = timezone(timedelta(hours=3))
+HOUR_WEIGHTS = [1, 1, 1, 1, 2, 3, 4, 5, 5, 6, 6, 6, 5, 5, 6, 8, 10, 10, 9, 7, 4, 2, 1, 1]
+
+
+def make_caption(rng: random.Random) -> tuple[str, str, List[str], List[str]]:
+    """生成标题，返回 (分类, 标题, hashtags, mentions)"""
+    category = rng.choices(list(CAPTION_TEMPLATES), CATEGORY_WEIGHTS)[0]
+    caption = rng.choice(CAPTION_TEMPLATES[category]).format(
+        emoji=rng.choice(EMOJIS),
+        discount=rng.choice([10, 20, 25, 30, 50]),
+        price=rng.choice([99, 149, 199, 299]),
+        count=rng.randint(3, 10)
+    )
+    # 偶尔拼接多句形成长标题
+    for _ in range(rng.choices([0, 1, 3, 8], [0.6, 0.25, 0.1, 0.05])[0]):
+        caption += "\n" + rng.choice(CAPTION_TEMPLATES[rng.choice(list(CAPTION_TEMPLATES))]).format(
+            emoji=rng.choice(EMOJIS), discount=20, price=199, count=5
+        )
+
+    hashtags = rng.sample(HASHTAGS, rng.choices([0, 2, 5, 9, 16], [0.1, 0.2, 0.35, 0.25, 0.1])[0])
+    mentions = ["@" + rng.choice(TARGET_COMPETITORS)] if rng.random() < 0.1 else []
+    if hashtags or mentions:
+        caption += "\n" + " ".join(hashtags + mentions)
+
+    return category, caption, hashtags, mentions
+
+
+def account_rows(count: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    usernames = TARGET_COMPETITORS + [f"competitor_{i:04d}" for i in range(max(count - len(TARGET_COMPETITORS), 0))]
+    return [
+        {
+            "username": username,
+            "full_name": username.replace("_", " ").title(),
+            "biography": "تعليم اللغة الإنجليزية للأطفال أونلاين | Online English for kids",
+            "followers_count": int(rng.lognormvariate(11, 1.2)),
+            "following_count": rng.randint(10, 2000),
+            "posts_count": 0,
+            "is_verified": rng.random() < 0.3,
+            "is_business": True,
+        }
+        for username in usernames[:count]
+    ]
+
+
+def post_rows(account_id: int, account_index: int, followers: int, posts: int, seed: int, now: datetime) -> Iterator[Dict]:
+    """单个账户的帖子，按时间倒序"""
+    rng = random.Random(seed * 1_000_003 + account_index)
+    # 每个账户有自己的基础互动率
+    base_engagement = rng.lognormvariate(math.log(0.02), 0.5)
+    posted_at = now
+
+    for i in range(posts):
+        previous = posted_at
+        posted_at -= timedelta(hours=rng.expovariate(1 / 20))
+        # 按沙特时间抽取发帖小时再转回UTC；换小时后晚于上一条帖子时退回前一天，保持时间倒序
+        local = posted_at.astimezone(RIYADH).replace(hour=rng.choices(range(24), HOUR_WEIGHTS)[0])
+        posted_at = local.astimezone(timezone.utc)
+        if posted_at > previous:
+            posted_at -= timedelta(days=1)
+        category, caption, hashtags, mentions = make_caption(rng)
+        media_type = rng.choices(MEDIA_TYPES, MEDIA_WEIGHTS)[0]
+
+        engagement = base_engagement * rng.lognormvariate(0, 0.6)
+        likes = int(followers * engagement * 0.95)
+        comments = int(followers * engagement * 0.05)
+        normalized_text, tokens = prepare_text(caption)
+
+        yield {
+            "post_id": f"{seed}{account_index:04d}{i:08d}",
+            "account_id": account_id,
+            "shortcode": f"S{seed}A{account_index}P{i}",
+            "caption": caption,
+            "caption_hashtags": hashtags,
+            "caption_mentions": mentions,
+            "normalized_text": normalized_text,
+            "tokens": tokens,
+            "media_type": media_type,
+            "content_hash": content_hash(caption, media_type, hashtags, posted_at),
+            "likes_count": likes,
+            "comments_count": comments,
+            "posted_at": posted_at,
+            "engagement_rate": round((likes + comments) / followers * 100, 4) if followers else 0.0,
+            "content_category": category,
+            "sentiment_score": 0.0,
+        }
+
+
+def comment_rows(post_db_id: int, post_key: str, count: int, posted_at: datetime, rng: random.Random) -> List[Dict]:
+    rows = []
+    for j in range(count):
+        text = rng.choice(COMMENTS)
+        normalized_text, tokens = prepare_text(text)
+        rows.append({
+            "comment_id": f"{post_key}{j:05d}",
+            "post_id": post_db_id,
+            "text": text,
+            "normalized_text": normalized_text,
+            "tokens": tokens,
+            "author_username": f"user_{rng.randint(1, 500000)}",
+            "likes_count": int(rng.expovariate(1 / 3)),
+            "commented_at": posted_at + timedelta(minutes=rng.expovariate(1 / 600)),
+        })
+    return rows
+
+
+def analysis_row(post_db_id: int, post: Dict, rng: random.Random) -> Dict:
+    label = rng.choices(SENTIMENT_LABELS, [0.55, 0.35, 0.10])[0]
+    confidence = rng.uniform(0.5, 0.99)
+    score = confidence if label == "positive" else -confidence if label == "negative" else 0.0
+    return {
+        "post_id": post_db_id,
+        "content_category": post["content_category"],
+        "category_confidence": rng.uniform(0.1, 0.5),
+        "sentiment_score": score,
+        "sentiment_label": label,
+        "confidence": confidence,
+        "keywords": [],
+        "topics": [tag[1:] for tag in post["caption_hashtags"][:10]],
+        "content_quality_score": rng.uniform(40, 95),
+        "engagement_prediction": rng.uniform(0.02, 0.08),
+        # 未记录分析器版本：reanalyze_posts --adopt-existing 可将其标记为当前版本
+        "content_hash": post["content_hash"],
+    }
+
+
+def generate(db, accounts: int, posts_per_account: int, comments_per_post: int, now: datetime,
+             seed: int = 42, analyzed_ratio: float = 0.8, chunk_size: int = 5000) -> Dict:
+    """向数据库写入合成数据，返回写入的行数"""
+    from app.models.instagram import InstagramAccount, InstagramPost, InstagramComment
+    from app.models.analysis import ContentAnalysis
+    from app.services.hashtag_index import HashtagIndex
+    from app.services.trending import TrendingEngine
+
+    counts = {"accounts": 0, "posts": 0, "comments": 0, "analyses": 0}
+
+    rows = account_rows(accounts, seed)
+    account_ids = db.scalars(
+        insert(InstagramAccount).returning(InstagramAccount.id, sort_by_parameter_order=True), rows
+    ).all()
+    db.commit()
+    counts["accounts"] = len(account_ids)
+
+    for account_index, (account_id, account) in enumerate(zip(account_ids, rows)):
+        rng = random.Random(seed * 7_919 + account_index)
+        posts = post_rows(account_id, account_index, account["followers_count"], posts_per_account, seed, now)
+
+        while True:
+            chunk = [post for _, post in zip(range(chunk_size), posts)]
+            if not chunk:
+                break
+
+            post_ids = db.scalars(
+                insert(InstagramPost).returning(InstagramPost.id, sort_by_parameter_order=True), chunk
+            ).all()
+
+            HashtagIndex(db).index_rows([
+                (post_db_id, account_id, post["posted_at"], post["caption_hashtags"])
+                for post_db_id, post in zip(post_ids, chunk)
+            ])
+
+            comments = []
+            analyses = []
+            for post_db_id, post in zip(post_ids, chunk):
+                count = min(int(rng.expovariate(1 / comments_per_post)), comments_per_post * 10) if comments_per_post else 0
+                comments.extend(comment_rows(post_db_id, post["post_id"], count, post["posted_at"], rng))
+                if rng.random() < analyzed_ratio:
+                    analyses.append(analysis_row(post_db_id, post, rng))
+
+            for start in range(0, len(comments), chunk_size * 4):
+                db.execute(insert(InstagramComment), comments[start:start + chunk_size * 4])
+            if analyses:
+                db.execute(insert(ContentAnalysis), analyses)
+            db.commit()
+
+            counts["posts"] += len(chunk)
+            counts["comments"] += len(comments)
+            counts["analyses"] += len(analyses)
+
+        logger.info(f"账户 {account['username']} 生成完成，累计 {counts['posts']} 帖子 / {counts['comments']} 评论")
+
+    TrendingEngine(db).rebuild(now)
+    db.commit()
+
+    return counts
+
+
+def main():
+    from app.database import SessionLocal, engine
+    from app.models import Base
+
+    parser = argparse.ArgumentParser(description="生成可复现的合成Instagram数据")
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--posts-per-account", type=int, default=1000)
+    parser.add_argument("--comments-per-post", type=int, default=10, help="每帖平均评论数")
+    parser.add_argument("--analyzed-ratio", type=float, default=0.8, help="带ContentAnalysis的帖子比例")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor-date", help="最新帖子的日期(YYYY-MM-DD)，默认今天")
+    args = parser.parse_args()
+
+    anchor = datetime.strptime(args.anchor_date, "%Y-%m-%d") if args.anchor_date else datetime.now()
+    now = datetime(anchor.year, anchor.month, anchor.day, tzinfo=timezone.utc)
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        counts = generate(db, args.accounts, args.posts_per_account, args.comments_per_post, now,
+                          seed=args.seed, analyzed_ratio=args.analyzed_ratio)
+    finally:
+        db.close()
+
+    logger.info(f"合成数据生成完成: {counts}，耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""文本规范化与分词吞吐量基准
+
+用法（在backend目录下运行）:
+    python -m benchmarks.tokenizer --texts 100000
+    python -m benchmarks.tokenizer --corpus captions.txt --output results/tokenizer.json
+
+使用合成标题和评论（或--corpus文本文件，每行一条），测量prepare_text的条/秒和MB/秒，
+并与原先分类、关键词、主题提取各自对原文小写化和正则分词的开销对比。
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+from typing import Callable, Dict, List
+
+from app.services.text_normalization import normalize_text, prepare_text, tokenize
+from benchmarks.synthetic_data import COMMENTS, make_caption
+
+
+def build_corpus(count: int, seed: int) -> List[str]:
+    """标题和评论约各占一半"""
+    rng = random.Random(seed)
+    return [make_caption(rng)[1] if i % 2 == 0 else rng.choice(COMMENTS) for i in range(count)]
+
+
+def legacy_processing(text: str):
+    """改动前每次分析对原文做的处理：分类小写化、关键词和主题各自用正则分词"""
+    text.lower()
+    re.findall(r'\b\w+\b', text.lower())
+    re.findall(r'#\w+', text)
+    re.findall(r'@\w+', text)
+
+
+def throughput(func: Callable, texts: List[str], repeats: int) -> Dict:
+    total_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for text in texts:
+            func(text)
+        best = min(best, time.perf_counter() - started)
+    return {
+        "seconds": round(best, 4),
+        "texts_per_s": round(len(texts) / best, 1),
+        "mb_per_s": round(total_bytes / best / 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文本规范化与分词吞吐量基准")
+    parser.add_argument("--texts", type=int, default=100000)
+    parser.add_argument("--corpus", help="文本文件，每行一条")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            texts = [line.rstrip("\n") for line in f][:args.texts]
+    else:
+        texts = build_corpus(args.texts, args.seed)
+
+    results = {
+        "normalize_text": throughput(normalize_text, texts, args.repeats),
+        "tokenize": throughput(tokenize, texts, args.repeats),
+        "prepare_text": throughput(prepare_text, texts, args.repeats),
+        "legacy_per_analysis": throughput(legacy_processing, texts, args.repeats),
+    }
+    for name, result in results.items():
+        print(f"{name:>20}: {result['texts_per_s']:>12,.0f} 条/秒 {result['mb_per_s']:>8.2f} MB/秒")
+
+    tokens = [len(tokenize(text)) for text in texts]
+    report = {"texts": len(texts), "avg_tokens": round(sum(tokens) / len(tokens), 2), "results": results}
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
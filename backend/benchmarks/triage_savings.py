@@ -0,0 +1,67 @@
+"""模型前分流节省的推理时间报告
+
+用法（在backend目录下运行）:
+    python -m benchmarks.triage_savings --limit 5000
+    python -m benchmarks.triage_savings --file corpus.txt --output triage.json
+
+对同一语料分别测量：全部文本送入模型的耗时，以及分流后只送入实质性文本的耗时（含分流开销）。
+"""
+import argparse
+import json
+import time
+from collections import Counter
+
+from benchmarks.corpus import load_texts
+
+
+def main():
+    from app.services.sentiment_backends import get_sentiment_backend
+    from app.services.text_triage import triage
+
+    parser = argparse.ArgumentParser(description="模型前分流节省时间报告")
+    parser.add_argument("--limit", type=int, default=5000)
+    parser.add_argument("--file", help="语料文件（每行一条），默认从数据库读取")
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    texts = [text for text in load_texts(args.limit, args.file) if text]
+    backend = get_sentiment_backend()
+    backend.predict_proba(texts[:2])  # 预热
+
+    started = time.perf_counter()
+    results = [triage(text) for text in texts]
+    triage_seconds = time.perf_counter() - started
+
+    routes = Counter(result.route for result in results)
+    languages = Counter(result.language for result in results if result.route == "model")
+    model_texts = [result.text for result in results if result.route == "model"]
+
+    started = time.perf_counter()
+    backend.predict_proba(texts)
+    baseline_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    backend.predict_proba(model_texts)
+    triaged_seconds = time.perf_counter() - started + triage_seconds
+
+    report = {
+        "model_id": backend.model_id,
+        "texts": len(texts),
+        "routes": dict(routes),
+        "model_languages": dict(languages),
+        "triage_seconds": round(triage_seconds, 4),
+        "triage_us_per_text": round(triage_seconds / len(texts) * 1e6, 2),
+        "baseline_inference_seconds": round(baseline_seconds, 2),
+        "triaged_inference_seconds": round(triaged_seconds, 2),
+        "saved_seconds": round(baseline_seconds - triaged_seconds, 2),
+        "saved_ratio": round(1 - triaged_seconds / baseline_seconds, 3) if baseline_seconds else 0.0,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""查询数回归测试：竞品接口和趋势分析的SQL条数不随帖子数增长（防止N+1回归）
+
+需要一个可写的PostgreSQL测试库：TEST_DATABASE_URL=postgresql://... python -m pytest tests/test_query_counts.py
+测试会清空并重建该库中的表，不要指向开发或生产库。
+"""
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    pytest.skip("未设置TEST_DATABASE_URL", allow_module_level=True)
+# 在导入应用之前替换数据库地址（app.database在导入时创建引擎）
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+pytest.importorskip("fastapi")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+for module in ("numpy", "scipy", "torch", "transformers"):
+    pytest.importorskip(module)
+
+from app.database import SessionLocal, engine
+
+try:
+    with engine.connect():
+        pass
+except sqlalchemy.exc.OperationalError as e:
+    pytest.skip(f"测试数据库不可用: {e}", allow_module_level=True)
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import Base
+from app.models.instagram import InstagramAccount, InstagramPost
+from app.profiling import assert_max_queries, profile_queries
+from app.services.analysis_service import AnalysisService
+from benchmarks.synthetic_data import generate, post_rows
+
+NOW = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    generate(session, accounts=3, posts_per_account=40, comments_per_post=2, now=NOW, seed=7)
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def add_posts(db, posts: int, seed: int):
+    """给每个竞品账户追加一批最近的帖子"""
+    accounts = db.query(InstagramAccount).order_by(InstagramAccount.id).all()
+    for account_index, account in enumerate(accounts):
+        db.add_all(
+            InstagramPost(**row)
+            for row in post_rows(account.id, account_index, account.followers_count, posts, seed, NOW)
+        )
+    db.commit()
+
+
+def test_competitors_query_count(db):
+    client = TestClient(app)
+    for posts in (0, 40):
+        add_posts(db, posts, seed=8 + posts)
+        # 账户、帖子统计、分类统计各一条
+        with assert_max_queries(3):
+            response = client.get("/api/instagram/competitors")
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+
+
+def test_trend_analysis_query_count(db):
+    service = AnalysisService(db)
+    with profile_queries() as baseline:
+        assert service.generate_trend_analysis("weekly") is not None
+    # 趋势报告只读关键词和近似重复索引，唯一的写入是趋势分析记录本身
+    writes = [shape for shape in baseline.shapes if shape.split(" ", 1)[0] in ("INSERT", "UPDATE", "DELETE")]
+    assert all("trend_analysis" in shape for shape in writes), writes
+
+    add_posts(db, 40, seed=9)
+    with assert_max_queries(baseline.count):
+        assert service.generate_trend_analysis("weekly") is not None
@@ -0,0 +1,68 @@
+"""互动率预测回归测试：没有拟合模型时，批量打分与原先逐帖的经验规则结果相同"""
+import itertools
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+
+from app.services.scoring import DEFAULT_COEFFICIENTS, BatchScorer, FeatureFrame
+
+
+def legacy_predict_engagement(post) -> float:
+    """原先的predict_engagement；分析时帖子还没有分析结果，质量分不计入"""
+    base_engagement = 0.02
+    if post.media_type == "carousel":
+        base_engagement += 0.01
+    elif post.media_type == "video":
+        base_engagement += 0.008
+    if post.caption_hashtags and 8 <= len(post.caption_hashtags) <= 12:
+        base_engagement += 0.005
+    if post.sentiment_score > 0.5:
+        base_engagement += 0.005
+    return min(base_engagement, 0.1)
+
+
+POSTS = [
+    SimpleNamespace(
+        caption="x" * length,
+        media_type=media_type,
+        caption_hashtags=[f"tag{i}" for i in range(hashtags)],
+        posted_at=datetime(2024, 5, 1, hour, tzinfo=timezone.utc),
+        sentiment_score=sentiment,
+    )
+    for length, media_type, hashtags, hour, sentiment in itertools.product(
+        (0, 120, 600), ("image", "video", "carousel", None), (0, 10, 20), (3, 12, 16), (0.0, 0.8)
+    )
+]
+
+
+class FittedModelSession:
+    """只返回一条拟合系数的假会话"""
+
+    def __init__(self, coefficients: dict):
+        self.row = (coefficients,)
+
+    def query(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def first(self):
+        return self.row
+
+
+def test_default_coefficients_match_legacy_rule():
+    _, engagement = BatchScorer(None).score(FeatureFrame.from_posts(POSTS))
+    expected = [legacy_predict_engagement(post) for post in POSTS]
+    np.testing.assert_allclose(engagement, expected)
+
+
+def test_fitted_model_is_not_capped_at_legacy_maximum():
+    scorer = BatchScorer(FittedModelSession(DEFAULT_COEFFICIENTS | {"intercept": 0.5}))
+    _, engagement = scorer.score(FeatureFrame.from_posts(POSTS))
+    assert engagement.min() >= 0.5
+    assert engagement.max() <= 1.0
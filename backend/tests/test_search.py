@@ -0,0 +1,95 @@
+"""全文检索测试：伪造的分页游标返回400而不是数据库错误；高亮片段与匹配使用相同的规范化和分词配置
+
+高亮测试需要一个可写的PostgreSQL测试库：TEST_DATABASE_URL=postgresql://... python -m pytest tests/test_search.py
+测试会清空并重建该库中的表，不要指向开发或生产库。
+"""
+import base64
+import json
+import os
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from app.services.search_service import SearchService, decode_cursor, encode_cursor
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.mark.parametrize("sort,values", [
+    ("rank", ["1", 5]),
+    ("rank", [[0.5], 5]),
+    ("rank", [True, 5]),
+    ("rank", [0.5, "5"]),
+    ("rank", [0.5, 5.0]),
+    ("rank", [0.5, None]),
+    ("recent", [0.5, 5]),
+    ("recent", ["not a date", 5]),
+    ("recent", ["2024-05-01T12:00:00+00:00", False]),
+    ("rank", [0.5]),
+    ("rank", {"rank": 0.5, "id": 5}),
+])
+def test_malformed_cursor_is_rejected(sort, values):
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor(values), sort)
+    # 游标在查询数据库之前校验，路由把ValueError转为400
+    with pytest.raises(ValueError):
+        SearchService(None).search("تعليم", sort=sort, cursor=raw_cursor(values))
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor([0.25, 7]), "rank") == (0.25, 7)
+    assert decode_cursor(encode_cursor([1, 7]), "rank") == (1.0, 7)
+    last_value, last_id = decode_cursor(encode_cursor(["2024-05-01T12:00:00+00:00", 7]), "recent")
+    assert last_value.isoformat() == "2024-05-01T12:00:00+00:00" and last_id == 7
+
+
+@pytest.fixture(scope="module")
+def db():
+    if not TEST_DATABASE_URL:
+        pytest.skip("未设置TEST_DATABASE_URL")
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Base
+    from app.models.instagram import InstagramAccount, InstagramPost
+
+    engine = sqlalchemy.create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.connect():
+            pass
+    except sqlalchemy.exc.OperationalError as e:
+        pytest.skip(f"测试数据库不可用: {e}")
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    account = InstagramAccount(username="search_test")
+    session.add(account)
+    session.flush()
+    session.add_all([
+        InstagramPost(account_id=account.id, post_id="1", shortcode="en", caption="Teaching kids new skills every week"),
+        InstagramPost(account_id=account.id, post_id="2", shortcode="ar", caption="دروس تَعْلِيم الأطفال"),
+    ])
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+@pytest.mark.parametrize("q,shortcode,highlighted", [
+    # english词干：teach匹配Teaching
+    ("teach", "en", "<mark>Teaching</mark>"),
+    # 标题带变音符号，查询不带
+    ("تعليم", "ar", "<mark>تعليم</mark>"),
+])
+def test_headline_highlights_matched_terms(db, q, shortcode, highlighted):
+    results = SearchService(db).search(q)["results"]
+    assert [result["shortcode"] for result in results] == [shortcode]
+    assert highlighted in results[0]["headline"]
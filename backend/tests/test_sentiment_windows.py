@@ -0,0 +1,40 @@
+"""滑动窗口推理的回归测试：短文本结果与引入窗口之前的推理方式一致，窗口参数计入缓存标识"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app.services.sentiment_backends import PyTorchSentimentBackend, get_sentiment_backend
+from benchmarks.fixtures import SAMPLE_CAPTIONS
+from benchmarks.long_captions import SHORT_TEXT_TOLERANCE, short_text_drift
+
+
+@pytest.fixture(scope="module")
+def backend():
+    try:
+        return get_sentiment_backend()
+    except OSError as e:
+        pytest.skip(f"情感模型不可用: {e}")
+
+
+def test_short_texts_match_legacy_inference(backend):
+    assert short_text_drift(backend, SAMPLE_CAPTIONS) <= SHORT_TEXT_TOLERANCE
+
+
+def test_long_text_is_combined_over_windows(backend):
+    long_text = " ".join(SAMPLE_CAPTIONS * 10)
+    probs = backend.predict_proba([long_text, SAMPLE_CAPTIONS[0]])
+    assert probs.shape == (2, len(backend.labels))
+    assert np.allclose(probs.sum(axis=1), 1.0, atol=1e-5)
+
+
+def test_cache_id_includes_window_scheme():
+    backends = []
+    for stride in (64, 128):
+        # 不加载模型，只比较缓存标识
+        backend = object.__new__(PyTorchSentimentBackend)
+        backend.model_name, backend.max_length, backend.stride = "model", 512, stride
+        backends.append(backend)
+    assert backends[0].model_id == backends[1].model_id
+    assert backends[0].cache_id != backends[1].cache_id
@@ -9,7 +9,7 @@ import {
   BarChartOutlined
 } from '@ant-design/icons';
 import { useQuery } from '@tanstack/react-query';
-import { instagramAPI, analysisAPI } from '@/services/api';
+import { dashboardAPI } from '@/services/api';
 import { Line, Pie, Bar } from 'recharts';
 
 const { Title } = Card;
@@ -39,26 +39,18 @@ export default function Dashboard() {
   const [engagementData, setEngagementData] = useState<any[]>([]);
   const [categoryData, setCategoryData] = useState<any[]>([]);
 
-  // 获取竞品分析数据
-  const { data: competitorData, isLoading: loadingCompetitors, error: competitorError } = useQuery(
-    'competitorAnalysis',
-    () => instagramAPI.getCompetitorAnalysis().then(res => res.data),
+  // 一次请求获取所有面板数据
+  const { data: dashboard, isLoading, error: competitorError } = useQuery(
+    'dashboard',
+    () => dashboardAPI.getDashboard(30).then(res => res.data),
     {
       refetchInterval: 300000, // 5分钟刷新一次
     }
   );
 
-  // 获取情感分析数据
-  const { data: sentimentData, isLoading: loadingSentiment } = useQuery(
-    'sentimentOverview',
-    () => analysisAPI.getSentimentOverview(30).then(res => res.data)
-  );
-
-  // 获取内容分类分布
-  const { data: categoryDistribution, isLoading: loadingCategories } = useQuery(
-    'categoryDistribution',
-    () => analysisAPI.getCategoryDistribution().then(res => res.data)
-  );
+  const competitorData = dashboard?.panels.competitors;
+  const sentimentData = dashboard?.panels.sentiment_overview;
+  const categoryDistribution = dashboard?.panels.category_distribution;
 
   // 处理图表数据
   useEffect(() => {
@@ -116,7 +108,7 @@ export default function Dashboard() {
     ],
   };
 
-  if (loadingCompetitors || loadingSentiment || loadingCategories) {
+  if (isLoading) {
     return (
       <div className="flex justify-center items-center h-64">
         <Spin size="large" />
@@ -105,4 +105,11 @@ export const analysisAPI = {
   }) => api.get('/analysis/performance/engagement', { params }),
 };
 
+// 仪表盘API
+export const dashboardAPI = {
+  // 获取仪表盘全部面板（浏览器按ETag自动重新验证，数据未变化时返回304）
+  getDashboard: (days?: number) =>
+    api.get('/dashboard', { params: { days } }),
+};
+
 export default api;
\ No newline at end of file